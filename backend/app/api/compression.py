@@ -0,0 +1,112 @@
+import gzip
+import zlib
+from typing import Any, List, Optional
+
+from app.core import config
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# 圧縮する Content-Type (SSE は逐次届かなくなるので圧縮しない)
+COMPRESSIBLE_MEDIA_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/plain",
+    "text/html",
+    "text/csv",
+)
+
+
+def supported_encodings() -> List[str]:
+    # 優先する順 (同じ q 値の場合は先にある方を使う)
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """negotiate_encoding
+
+        Accept-Encoding から使用する圧縮形式を選ぶ関数
+
+        Args:
+            accept_encoding (Optional[str]): Accept-Encoding ヘッダーの値
+
+        Returns:
+            Optional[str]: br / gzip (圧縮しない場合は None)
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    if not media_type:
+        return False
+    return media_type.split(";")[0].strip().lower() in COMPRESSIBLE_MEDIA_TYPES
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """compress
+
+        本文を一度に圧縮する関数
+
+        Args:
+            body (bytes): 圧縮する本文
+            encoding (str): br / gzip
+
+        Returns:
+            bytes: 圧縮した本文
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(
+        body, compresslevel=config.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compressor(encoding: str) -> Any:
+    """compressor
+
+        ストリーミングの本文を逐次圧縮するオブジェクトを作成する関数\n
+        compress(data) と flush() を持つ
+
+        Args:
+            encoding (str): br / gzip
+
+        Returns:
+            Any: 圧縮するオブジェクト
+    """
+    if encoding == "br":
+        return _BrotliCompressor()
+    # wbits=31 で gzip のヘッダーとフッターを付ける
+    return zlib.compressobj(config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+class _BrotliCompressor:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(
+            quality=config.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
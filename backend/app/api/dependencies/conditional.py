@@ -0,0 +1,82 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+from app.core import config
+
+
+def make_etag(*parts: Any) -> str:
+    """make_etag
+
+        値の組から弱い ETag を作成する関数\n
+        圧縮形式によって本文のバイト列が変わるので弱い ETag にする
+
+        Args:
+            parts (Any): 表現を一意に決める値 (バージョン, リクエストのキー等)
+
+        Returns:
+            str: W/"..." 形式の ETag
+    """
+    digest = hashlib.blake2b(
+        "\x1f".join(str(part) for part in parts).encode(), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """etag_matches
+
+        If-None-Match が etag と一致するかを弱い比較で判定する関数
+
+        Args:
+            request (Request): リクエストを受け取る
+            etag (str): 現在の表現の ETag
+
+        Returns:
+            bool: 一致する (304 を返せる) 場合は True
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def set_cache_headers(response: Response, etag: Optional[str]) -> None:
+    """set_cache_headers
+
+        ETag と Cache-Control をレスポンスに設定する関数
+
+        Args:
+            response (Response): ヘッダーを設定するレスポンス
+            etag (Optional[str]): ETag (None の場合は設定しない)
+    """
+    if etag is not None:
+        response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = config.HOLO_MEMBER_CACHE_CONTROL
+
+
+def not_modified_response(etag: str) -> Response:
+    """not_modified_response
+
+        本文を持たない 304 Not Modified を作成する関数
+
+        Args:
+            etag (str): 一致した ETag
+
+        Returns:
+            Response: ETag と Cache-Control を付けた 304
+    """
+    response = Response(status_code=HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
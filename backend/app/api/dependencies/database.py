@@ -1,5 +1,7 @@
 from typing import Callable, Type
 
+from app.core.config import READ_PRIMARY_HEADER
+from app.db.broadcast import Broadcaster
 from app.db.repositories.base import BaseRepository
 from databases import Database
 from fastapi import Depends
@@ -20,27 +22,76 @@ def get_database(request: Request) -> Database:
     return request.app.state._db
 
 
-def get_repository(Repo_type: Type[BaseRepository]) -> Callable:
+def get_read_database(request: Request) -> Database:
+    """get_read_database
+
+        読み込みに使用するdbを返却する関数\n
+        レプリカがあればレプリカを、無い場合や READ_PRIMARY_HEADER が
+        付いたリクエストではプライマリを返す
+
+        Args:
+            request (Request): リクエストを受け取る
+
+        Returns:
+            Database: 読み込みに使用するdbを返却する
+    """
+    if request.headers.get(READ_PRIMARY_HEADER):
+        return get_database(request)
+    replica = request.app.state._replicas.choose()
+    return replica if replica is not None else get_database(request)
+
+
+def get_broadcaster(request: Request) -> Broadcaster:
+    """get_broadcaster
+
+        変更通知を配る Broadcaster を返却する関数
+
+        Args:
+            request (Request): リクエストを受け取る
+
+        Returns:
+            Broadcaster: FastAPI ステートの Broadcaster を返却する
+    """
+    return request.app.state._broadcaster
+
+
+def get_repository(
+    Repo_type: Type[BaseRepository],
+    read_primary: bool = False
+) -> Callable:
     """get_repository
 
         Repo_type パラメータを持ち get_repo という別の関数を返します
 
         Args:
             Repo_type (Type[BaseRepository]): Type[BaseRepository]を受け取る
+            read_primary (bool): 読み込みもプライマリで行う場合は True
 
         Returns:
             Callable: get_repoを返却
     """
-    def get_repo(db: Database = Depends(get_database)) -> Type[BaseRepository]:
+    def get_repo(
+        request: Request,
+        db: Database = Depends(get_database),
+        read_db: Database = Depends(get_read_database)
+    ) -> Type[BaseRepository]:
         """get_repo
 
         db パラメータがありget_database関数で返される
 
         Args:
+            request (Request): READ_PRIMARY_HEADER を確認するリクエスト
             db (Database = Depends(get_database)): db パラメータを受け取る
+            read_db (Database = Depends(get_read_database)):
+                読み込みに使用する db パラメータを受け取る
 
         Returns:
             Type[BaseRepository]: get_database関数に返却
         """
-        return Repo_type(db)
+        return Repo_type(
+            db,
+            read_db,
+            read_primary=read_primary or bool(
+                request.headers.get(READ_PRIMARY_HEADER))
+        )
     return get_repo
@@ -0,0 +1,41 @@
+from typing import Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query
+from starlette.status import HTTP_400_BAD_REQUEST
+
+
+def get_fields(
+    allowed: Sequence[str],
+    required: Sequence[str] = ("id",)
+) -> Callable:
+    """get_fields
+
+        ?fields=id,name のような疎なフィールド指定を受け取る依存関係を作成する関数
+
+        Args:
+            allowed (Sequence[str]): 指定できるフィールド (ホワイトリスト)
+            required (Sequence[str]): 常に含めるフィールド
+
+        Returns:
+            Callable: 指定されたフィールドのタプルを返す依存関係
+                (指定がない場合は None)
+    """
+    def parse_fields(
+        fields: Optional[str] = Query(
+            None, title='Comma separated fields to return.')
+    ) -> Optional[Tuple[str, ...]]:
+        if fields is None:
+            return None
+
+        requested = {field.strip() for field in fields.split(",")}
+        requested.discard("")
+        if not requested or not requested <= set(allowed):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail='Invalid fields.')
+        # ホワイトリストの順に並べ、クエリのキャッシュが効くようにする
+        return tuple(
+            field for field in allowed
+            if field in requested or field in required)
+
+    return parse_fields
@@ -0,0 +1,69 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, Request, Response
+from starlette.status import HTTP_400_BAD_REQUEST
+
+
+def encode_cursor(key: Dict[str, Any]) -> str:
+    """encode_cursor
+
+        キーセットページネーションのキーを不透明なカーソル文字列に変換する関数
+
+        Args:
+            key (Dict[str, Any]): 直前のページの最後の行のキー
+
+        Returns:
+            str: URLセーフなbase64文字列
+    """
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """decode_cursor
+
+        encode_cursor で作成したカーソルをキーに戻す関数
+
+        Args:
+            cursor (str): クライアントから受け取ったカーソル
+
+        Raises:
+            HTTPException: 不正なカーソルの場合は400を返す
+
+        Returns:
+            Dict[str, Any]: 直前のページの最後の行のキー
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        key = None
+    if not isinstance(key, dict):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor.')
+    return key
+
+
+def set_next_page_headers(
+    request: Request,
+    response: Response,
+    next_cursor: Optional[str]
+) -> None:
+    """set_next_page_headers
+
+        次のページが存在する場合に Link ヘッダーと X-Next-Cursor ヘッダーを付与する関数
+
+        Args:
+            request (Request): 現在のリクエスト
+            response (Response): ヘッダーを付与するレスポンス
+            next_cursor (Optional[str]): 次のページのカーソル
+    """
+    if next_cursor is None:
+        return
+    next_url = request.url.include_query_params(after=next_cursor)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+    response.headers["X-Next-Cursor"] = next_cursor
@@ -0,0 +1,29 @@
+import hmac
+
+from app.core import config
+from fastapi import HTTPException, Request
+from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+
+
+def verify_profiling_token(request: Request) -> None:
+    """verify_profiling_token
+
+        プロファイル・遅いクエリ・プールの状態の参照を PROFILING_HEADER に
+        正しいトークンを付けたリクエストに限る依存関係
+
+        Args:
+            request (Request): リクエストを受け取る
+
+        Raises:
+            HTTPException: プロファイルが無効な場合は404、トークンが違う場合は403を返す
+    """
+    token = str(config.PROFILING_TOKEN)
+    if not token:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail='Profiling is disabled.')
+    value = request.headers.get(config.PROFILING_HEADER, '')
+    if not hmac.compare_digest(value.encode(), token.encode()):
+        raise HTTPException(
+            status_code=HTTP_403_FORBIDDEN,
+            detail='Invalid profiling token.')
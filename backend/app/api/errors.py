@@ -0,0 +1,27 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+
+from app.db.pool import PoolTimeoutError
+
+
+async def pool_timeout_handler(
+    request: Request,
+    exc: PoolTimeoutError
+) -> JSONResponse:
+    """pool_timeout_handler
+
+        プールから接続を取得できなかった場合に 503 を返すハンドラ
+
+        Args:
+            request (Request): リクエスト
+            exc (PoolTimeoutError): 発生した例外
+
+        Returns:
+            JSONResponse: Retry-After を付けた 503
+    """
+    return JSONResponse(
+        status_code=HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy. Please retry later."},
+        headers={"Retry-After": "1"}
+    )
@@ -0,0 +1,9 @@
+'''middleware
+
+__init__.py
+
+* アプリケーション全体に適用するASGIミドルウェアのモジュール
+* リクエストごとの処理を軽くするため Starlette の BaseHTTPMiddleware は使わず、
+  ASGIアプリケーションとして直接実装する
+
+'''
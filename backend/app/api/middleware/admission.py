@@ -0,0 +1,191 @@
+import asyncio
+from collections import deque
+from typing import Dict, Iterable
+
+from starlette.responses import JSONResponse
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.deadline import remaining
+
+# 読み込みとして扱うメソッド (それ以外は書き込み)
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+# 空きができた時に先に受け付ける順
+PRIORITIES = ("read", "write")
+
+
+class AdmissionRejected(Exception):
+    """AdmissionRejected
+
+    受け付けられなかった場合に送出する例外
+
+    Attributes:
+        reason str: queue_full (キューが一杯) または timeout (待ち時間を超えた)
+
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    """AdmissionController
+
+    同時に処理するリクエストの数を制限するクラス\n
+    読み込みと書き込みで別々の上限のあるキューを持ち、空きができた場合は
+    読み込みを先に受け付ける\n
+    書き込みは write_limit までしか同時に処理しないので、
+    書き込みが集中しても読み込みの枠は残る
+
+    Attributes:
+        limit int: 同時に処理する最大数
+        write_limit int: そのうち書き込みに使える最大数
+        queue_size int: 読み込み・書き込みそれぞれの待ちの最大数
+        timeout float: 待つ最大の時間 (秒, リクエストの期限の方が早ければ期限まで)
+
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        write_limit: int,
+        queue_size: int,
+        timeout: float
+    ) -> None:
+        self.limit = limit
+        self.write_limit = write_limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = {kind: 0 for kind in PRIORITIES}
+        self.admitted = {kind: 0 for kind in PRIORITIES}
+        self.rejected = {
+            (kind, reason): 0
+            for kind in PRIORITIES for reason in ("queue_full", "timeout")
+        }
+        self._waiters: Dict[str, deque] = {kind: deque() for kind in PRIORITIES}
+
+    def _can_admit(self, kind: str) -> bool:
+        if sum(self.active.values()) >= self.limit:
+            return False
+        return kind != "write" or self.active["write"] < self.write_limit
+
+    def _waiting_ahead(self, kind: str) -> bool:
+        # 同じ種類か優先度の高い種類が待っていれば追い越さない
+        for waiting in PRIORITIES[:PRIORITIES.index(kind) + 1]:
+            if self._waiters[waiting]:
+                return True
+        return False
+
+    def _admit(self, kind: str) -> None:
+        self.active[kind] += 1
+        self.admitted[kind] += 1
+
+    async def acquire(self, kind: str) -> None:
+        """acquire
+
+            処理を始めてよくなるまで待つ関数
+
+            Args:
+                kind (str): read または write
+
+            Raises:
+                AdmissionRejected: キューが一杯か、timeout 秒待っても受け付けられない場合
+        """
+        if self._can_admit(kind) and not self._waiting_ahead(kind):
+            self._admit(kind)
+            return
+
+        waiters = self._waiters[kind]
+        if len(waiters) >= self.queue_size:
+            self.rejected[(kind, "queue_full")] += 1
+            raise AdmissionRejected("queue_full")
+
+        future = asyncio.get_event_loop().create_future()
+        waiters.append(future)
+        try:
+            # リクエストの期限の方が早ければ期限までしか待たない
+            await asyncio.wait_for(future, remaining(self.timeout))
+        except asyncio.TimeoutError:
+            self.rejected[(kind, "timeout")] += 1
+            raise AdmissionRejected("timeout")
+        except BaseException:
+            # 受け付けた直後にキャンセルされた場合は枠を返す
+            if future.done() and not future.cancelled():
+                self.release(kind)
+            raise
+        finally:
+            if future in waiters:
+                waiters.remove(future)
+
+    def release(self, kind: str) -> None:
+        self.active[kind] -= 1
+        for waiting in PRIORITIES:
+            waiters = self._waiters[waiting]
+            while waiters and self._can_admit(waiting):
+                future = waiters.popleft()
+                if not future.done():
+                    self._admit(waiting)
+                    future.set_result(None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            kind: {
+                "active": self.active[kind],
+                "queued": len(self._waiters[kind]),
+                "admitted": self.admitted[kind],
+                "rejected_queue_full": self.rejected[(kind, "queue_full")],
+                "rejected_timeout": self.rejected[(kind, "timeout")],
+            }
+            for kind in PRIORITIES
+        }
+
+
+class AdmissionMiddleware:
+    """AdmissionMiddleware
+
+    AdmissionController で受け付けたリクエストだけを処理する\n
+    受け付けられなかったリクエストは Retry-After を付けた 503 をすぐに返す
+
+    Attributes:
+        app ASGIApp: 包むASGIアプリケーション
+        controller AdmissionController: 同時に処理する数を制限するもの
+        exempt_paths Iterable[str]: 制限しないパス (前方一致)
+        retry_after int: Retry-After に返す秒数
+
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        exempt_paths: Iterable[str],
+        retry_after: int
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = tuple(exempt_paths)
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or \
+                scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        kind = "read" if scope["method"] in READ_METHODS else "write"
+        try:
+            await self.controller.acquire(kind)
+        except AdmissionRejected:
+            response = JSONResponse(
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "Server is busy. Please retry later."},
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(kind)
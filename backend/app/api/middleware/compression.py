@@ -0,0 +1,95 @@
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.compression import (
+    compress,
+    compressor,
+    is_compressible,
+    negotiate_encoding
+)
+
+
+class CompressionMiddleware:
+    """CompressionMiddleware
+
+    Accept-Encoding に応じてレスポンスを br / gzip で圧縮する\n
+    本文が minimum_size バイト未満のもの、圧縮済み (Content-Encoding がある) のもの、
+    圧縮しても効果のない Content-Type のものはそのまま返す\n
+    ストリーミングの本文は大きさが分からないので常に逐次圧縮する
+
+    Attributes:
+        app ASGIApp: 包むASGIアプリケーション
+        minimum_size int: 圧縮する本文の最小バイト数
+
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding"))
+        start_message: Optional[Message] = None
+        # None: 未判定, False: そのまま送る, それ以外: 逐次圧縮するオブジェクト
+        stream: Any = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, stream
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or \
+                        not is_compressible(headers.get("content-type")):
+                    stream = False
+                    await send(message)
+                else:
+                    # 本文の大きさが分かるまでヘッダーの送信を遅らせる
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or stream is False:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if encoding is None or \
+                        (not more_body and len(body) < self.minimum_size):
+                    stream = False
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoding
+                if not more_body:
+                    body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    stream = False
+                    await send(start_message)
+                    await send({**message, "body": body})
+                    return
+
+                del headers["Content-Length"]
+                stream = compressor(encoding)
+                await send(start_message)
+
+            body = stream.compress(body)
+            if not more_body:
+                body += stream.flush()
+            if body or not more_body:
+                await send({
+                    "type": "http.response.body",
+                    "body": body,
+                    "more_body": more_body
+                })
+
+        await self.app(scope, receive, send_wrapper)
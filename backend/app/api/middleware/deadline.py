@@ -0,0 +1,146 @@
+import asyncio
+from typing import List, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.status import HTTP_504_GATEWAY_TIMEOUT
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.deadline import parse_timeout, request_deadline
+from app.core.metrics import REGISTRY, Counter
+
+http_requests_cancelled = REGISTRY.register(Counter(
+    "favue_http_requests_cancelled_total",
+    "HTTP requests cancelled before completion.",
+    ("reason",)
+))
+
+
+class DeadlineMiddleware:
+    """DeadlineMiddleware
+
+    リクエストに期限を設け、期限を過ぎたり切断されたりしたリクエストの処理を取り消す\n
+    処理を取り消すと実行中のクエリも asyncpg がサーバー側で取り消し、接続はプールに戻る\n
+    期限はレスポンスを返し始めるまでに適用し、過ぎた場合は 504 を返す
+    (返し始めた後のストリームは取り消さず、切断は receive で処理に伝える)\n
+    処理は呼び出したタスクのまま行い、本文も先に読み込まない\n
+    切断は処理が本文を読み終えた後 (本文が無い場合は最初から) に受信を待つタスクで検知する
+
+    Attributes:
+        app ASGIApp: 包むASGIアプリケーション
+        timeout float: 既定の制限時間 (秒, 0 以下は無制限)
+        max_timeout float: ヘッダーで指定できる最大の制限時間 (秒)
+        header str: 制限時間を指定するヘッダー
+
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        timeout: float,
+        max_timeout: float,
+        header: str
+    ) -> None:
+        self.app = app
+        self.timeout = timeout
+        self.max_timeout = max_timeout
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_event_loop()
+        headers = Headers(scope=scope)
+        timeout = parse_timeout(
+            headers.get(self.header), self.timeout, self.max_timeout)
+        deadline = loop.time() + timeout if timeout > 0 else None
+
+        task = asyncio.current_task()
+        pending: List[Message] = []
+        disconnected = asyncio.Event()
+        watcher: Optional[asyncio.Future] = None
+        started = False
+        finished = False
+        reason: Optional[str] = None
+
+        def cancel(cause: str) -> None:
+            nonlocal reason
+            # 返し始めた後のストリームは receive で切断を受け取り自分で終わる
+            if finished or started or reason is not None:
+                return
+            reason = cause
+            task.cancel()
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            cancel("disconnect")
+
+        def start_watcher() -> None:
+            nonlocal watcher
+            watcher = asyncio.ensure_future(watch_disconnect())
+
+        async def receive_wrapper() -> Message:
+            if pending:
+                return pending.pop()
+            if watcher is not None:
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request" and \
+                    not message.get("more_body", False):
+                # 処理が本文を読み終えた後は watcher が切断を待つ
+                start_watcher()
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        if not has_body(headers):
+            # 本文の無いリクエストは空の http.request だけなので先に受け取っておく
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                http_requests_cancelled.inc("disconnect")
+                return
+            pending.append(message)
+            start_watcher()
+
+        timer = None
+        if deadline is not None:
+            timer = loop.call_at(deadline, cancel, "deadline")
+        # 処理は同じタスクで行い、期限や切断の際はこのタスクを取り消す
+        token = request_deadline.set(deadline)
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except asyncio.CancelledError:
+            # 取り消したのがこのミドルウェアでなければ (サーバーの停止等) そのまま伝える
+            if reason is None:
+                raise
+        finally:
+            finished = True
+            request_deadline.reset(token)
+            if timer is not None:
+                timer.cancel()
+            if watcher is not None:
+                watcher.cancel()
+
+        if reason is None:
+            return
+        http_requests_cancelled.inc(reason)
+        if reason == "deadline" and not started:
+            response = JSONResponse(
+                status_code=HTTP_504_GATEWAY_TIMEOUT,
+                content={"detail": "Request deadline exceeded."}
+            )
+            await response(scope, receive, send)
+
+
+def has_body(headers: Headers) -> bool:
+    return "transfer-encoding" in headers or \
+        headers.get("content-length", "0") != "0"
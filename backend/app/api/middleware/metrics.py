@@ -0,0 +1,84 @@
+import time
+from typing import Any, Callable, Dict
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REGISTRY, Counter, Gauge, Histogram
+
+http_request_duration = REGISTRY.register(Histogram(
+    "favue_http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ("method", "route")
+))
+http_requests = REGISTRY.register(Counter(
+    "favue_http_requests_total",
+    "Handled HTTP requests.",
+    ("method", "route", "status")
+))
+http_requests_in_flight = REGISTRY.register(Gauge(
+    "favue_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    ("method",)
+))
+
+# どのルートにも一致しなかったリクエストのラベル (パスをそのまま使うと種類が増え続ける)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """MetricsMiddleware
+
+    ルートごとのリクエストの所要時間、ステータスコード、処理中の数を計測する\n
+    ルートはパスではなく /api/v1/holo_member/{id}/ のようなルートのパスで区別する
+
+    Attributes:
+        app ASGIApp: 包むASGIアプリケーション
+
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._route_paths: Dict[Callable, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # ルーターが一致したルートの endpoint を scope に書き込む
+            route = self.route_path(scope)
+            http_request_duration.observe(
+                time.perf_counter() - started_at, method, route)
+            http_requests.inc(method, route, str(status))
+            http_requests_in_flight.dec(method)
+
+    def route_path(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = self._find_route_path(scope["app"], endpoint)
+            self._route_paths[endpoint] = path
+        return path
+
+    @staticmethod
+    def _find_route_path(app: Any, endpoint: Callable) -> str:
+        for route in getattr(app, "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.path
+        return UNMATCHED_ROUTE
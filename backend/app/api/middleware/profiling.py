@@ -0,0 +1,113 @@
+import cProfile
+import hmac
+import pstats
+import time
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiling import (
+    ProfileStore,
+    format_stats,
+    request_timings,
+    summarize_stats
+)
+
+
+class ProfilingMiddleware:
+    """ProfilingMiddleware
+
+    header に token を付けたリクエストだけを cProfile で計測する\n
+    結果は store に保存し、X-Profile-Id と Server-Timing ヘッダーで返す\n
+    計測はレスポンスのヘッダーを送る時点まで (ストリーミングの本文は含まない)\n
+    cProfile はプロセス全体で1つなので同時に計測するのは1リクエストのみで、
+    その間に同じワーカーで動いた他のリクエストの処理も呼び出しツリーに含まれる
+
+    Attributes:
+        app ASGIApp: 包むASGIアプリケーション
+        token str: 計測を許可するトークン
+        header str: トークンを付けるヘッダー名
+        store ProfileStore: プロファイルの保存先
+        stats_limit int: 保存する呼び出しツリーの関数の数
+
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str,
+        header: str,
+        store: ProfileStore,
+        stats_limit: int
+    ) -> None:
+        self.app = app
+        self.token = token.encode()
+        self.header = header
+        self.store = store
+        self.stats_limit = stats_limit
+        self._profiling = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._profiling or \
+                not self._authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._profiling = True
+        profiler = cProfile.Profile()
+        timings = {}
+        token = request_timings.set(timings)
+        started_at = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self._profiling:
+                profiler.disable()
+                self._profiling = False
+                headers = self._finish(
+                    scope, profiler, timings, time.perf_counter() - started_at)
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), *headers]
+                }
+            await send(message)
+
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self._profiling:
+                profiler.disable()
+                self._profiling = False
+            request_timings.reset(token)
+
+    def _authorized(self, scope: Scope) -> bool:
+        value = Headers(scope=scope).get(self.header)
+        return value is not None and \
+            hmac.compare_digest(value.encode(), self.token)
+
+    def _finish(
+        self,
+        scope: Scope,
+        profiler: cProfile.Profile,
+        timings: dict,
+        total: float
+    ) -> list:
+        stats = pstats.Stats(profiler)
+        breakdown = {
+            "total": total,
+            "db": timings.get("db", 0.0),
+            **summarize_stats(stats),
+        }
+        profile = self.store.add(
+            scope["method"],
+            scope["path"],
+            breakdown,
+            format_stats(stats, self.stats_limit)
+        )
+        server_timing = ", ".join(
+            f"{name};dur={duration}"
+            for name, duration in profile["timings_ms"].items())
+        return [
+            (b"x-profile-id", profile["id"].encode()),
+            (b"server-timing", server_timing.encode()),
+        ]
@@ -0,0 +1,151 @@
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.api.compression import compress
+from app.db.cache import LRUCache
+from app.db.singleflight import SingleFlight
+
+
+def response_cache_key(request: Request) -> Tuple[str, ...]:
+    """response_cache_key
+
+        レスポンスのキャッシュのキーを作る関数\n
+        クエリパラメータは順序を揃え、Link ヘッダーに含まれるホストもキーに含める
+
+        Args:
+            request (Request): リクエストを受け取る
+
+        Returns:
+            Tuple[str, ...]: ホスト・パス・クエリパラメータ
+    """
+    return (
+        request.url.netloc,
+        request.url.path,
+        *sorted(f"{key}={value}"
+                for key, value in request.query_params.multi_items())
+    )
+
+
+class CachedResponse:
+    """CachedResponse
+
+    エンコード済みの本文と、圧縮形式ごとの圧縮済みの本文を保持するクラス\n
+    圧縮済みの本文は初めて要求された時に作成する
+
+    Attributes:
+        body bytes: エンコード済みの本文
+        raw_headers List[Tuple[bytes, bytes]]: 一緒に返すヘッダー
+        media_type str: Content-Type
+
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        raw_headers: List[Tuple[bytes, bytes]],
+        media_type: str = "application/json"
+    ) -> None:
+        self.body = body
+        self.raw_headers = list(raw_headers)
+        self.media_type = media_type
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding)
+            self._encoded[encoding] = body
+        return body
+
+    def to_response(
+        self,
+        encoding: Optional[str],
+        minimum_size: int
+    ) -> Response:
+        """to_response
+
+            キャッシュした本文からレスポンスを作る関数
+
+            Args:
+                encoding (Optional[str]): negotiate_encoding で選んだ圧縮形式
+                minimum_size (int): 圧縮する本文の最小バイト数
+
+            Returns:
+                Response: 必要に応じて圧縮済みの本文を返すレスポンス
+        """
+        if encoding is not None and len(self.body) >= minimum_size:
+            response = Response(
+                self.encoded(encoding), media_type=self.media_type)
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = Response(self.body, media_type=self.media_type)
+        response.headers["Vary"] = "Accept-Encoding"
+        response.raw_headers.extend(self.raw_headers)
+        return response
+
+
+class ResponseCache:
+    """ResponseCache
+
+    CachedResponse を保持する LRUCache\n
+    同じキーのキャッシュが同時に無い場合は1つの要求だけが本文を作り、
+    他の要求はその完了を待って同じ CachedResponse を返す
+
+    Attributes:
+        cache LRUCache: CachedResponse を保持するキャッシュ
+
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._flights = SingleFlight(name)
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def coalesced(self) -> int:
+        return self._flights.coalesced
+
+    async def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], Awaitable[CachedResponse]],
+        store: bool = True
+    ) -> CachedResponse:
+        """get_or_build
+
+            キャッシュから取得し、無ければ build で作成して保存する関数\n
+            store が False の場合はキャッシュを使わず、同時の要求で作成を共有するだけにする
+            (件数の上限しか無いので、大きな本文を保持し続けないようにする)
+
+            Args:
+                key (Hashable): キャッシュのキー
+                build (Callable[[], Awaitable[CachedResponse]]): 本文を作る関数
+                store (bool): 作成した本文をキャッシュに保存するか
+
+            Returns:
+                CachedResponse: キャッシュした (または作成した) レスポンス
+        """
+        if not store:
+            return await self._flights.do(key, build)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def build_and_set() -> CachedResponse:
+            cached = await build()
+            self.cache.set(key, cached)
+            return cached
+
+        return await self._flights.do(key, build_and_set)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.cache.stats(), "coalesced": self.coalesced}
@@ -0,0 +1,119 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from pydantic import BaseModel
+from pydantic.fields import ModelField
+from starlette.responses import Response
+from starlette.status import HTTP_200_OK
+
+from app.core import config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # エンコーダーが直接扱えない型のみここに来る
+    # モデルは dict() を使わず __dict__ を渡し、入れ子のモデルは再びここで処理する
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """dumps
+
+        モデルを含む値をJSONにエンコードする関数\n
+        orjson があれば orjson を、無ければ標準の json を使用する
+
+        Args:
+            content (Any): エンコードする値
+
+        Returns:
+            bytes: エンコードしたJSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode()
+
+
+class ModelJSONResponse(JSONResponse):
+    """ModelJSONResponse
+
+    pydantic のモデルをそのままエンコードする JSONResponse\n
+    jsonable_encoder による中間の辞書の作成を行わない
+
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_response(
+    content: Any,
+    response: Optional[Response] = None,
+    status_code: int = HTTP_200_OK
+) -> Any:
+    """trusted_response
+
+        リポジトリから返されたモデルを response_model で再検証せずに返却する関数\n
+        FAST_SERIALIZATION が無効な場合は content をそのまま返し、通常通り検証する
+
+        Args:
+            content (Any): リポジトリから返されたモデルまたはその一覧
+            response (Optional[Response]): ヘッダーを引き継ぐ FastAPI のレスポンス
+            status_code (int): ステータスコード
+
+        Returns:
+            Any: ModelJSONResponse または content
+    """
+    if not config.FAST_SERIALIZATION:
+        return content
+
+    trusted = ModelJSONResponse(content, status_code=status_code)
+    if response is not None:
+        trusted.raw_headers.extend(response.raw_headers)
+    return trusted
+
+
+async def encode_response(
+    content: Any,
+    field: ModelField,
+    exclude_unset: bool = False
+) -> bytes:
+    """encode_response
+
+        キャッシュ等に保持する本文をエンコードする関数\n
+        FAST_SERIALIZATION が有効な場合は trusted_response と同じく検証せずにエンコードし、
+        無効な場合は response_model と同じく検証してからエンコードする
+
+        Args:
+            content (Any): リポジトリから返されたモデルまたはその一覧
+            field (ModelField): response_model のフィールド (create_response_field で作る)
+            exclude_unset (bool): response_model_exclude_unset と同じ指定
+
+        Returns:
+            bytes: エンコードしたJSON
+    """
+    if config.FAST_SERIALIZATION:
+        return dumps(content)
+    return dumps(await serialize_response(
+        field=field, response_content=content, exclude_unset=exclude_unset))
@@ -15,7 +15,9 @@ __init__.py
 
 from fastapi import APIRouter
 from app.api.routes.holo_member import router as holo_router
+from app.api.routes.system import router as system_router
 
 
 router = APIRouter()
 router.include_router(holo_router, prefix="/holo_member", tags=["holo_member"])
+router.include_router(system_router, prefix="/system", tags=["system"])
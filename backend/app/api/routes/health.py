@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from app.core.warmup import warm_up
+
+router = APIRouter()
+
+# get 起動時の準備 (接続の確立・文の準備・エンコード) が終わっているかを確認
+# 終わるまでは 503 を返すのでロードバランサーはこのワーカーに振り分けない
+# 準備に失敗していた場合はここで再び準備する
+# listening は変更通知の LISTEN 用の接続の状態 (切れていても 503 にはしない)
+# プライマリの再起動では全てのワーカーで同時に切れるため、振り分け先が無くなってしまう
+
+
+@router.get(
+    '/ready',
+    name='health:get-ready',
+    include_in_schema=False
+)
+async def get_ready(request: Request) -> JSONResponse:
+    listener = getattr(request.app.state, "_listener", None)
+    listening = listener is not None and listener.is_listening
+    if not getattr(request.app.state, "_ready", False):
+        if not await warm_up(request.app):
+            return JSONResponse(
+                {"ready": False, "listening": listening},
+                status_code=HTTP_503_SERVICE_UNAVAILABLE)
+    return JSONResponse(
+        {"ready": True, "listening": listening}, status_code=HTTP_200_OK)
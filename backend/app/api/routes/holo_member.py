@@ -1,16 +1,84 @@
-from typing import List
-from app.api.dependencies.database import get_repository
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
+from app.api.compression import negotiate_encoding
+from app.api.dependencies.conditional import (
+    etag_matches,
+    make_etag,
+    not_modified_response,
+    set_cache_headers
+)
+from app.api.dependencies.database import get_broadcaster, get_repository
+from app.api.dependencies.fields import get_fields
+from app.api.dependencies.pagination import (
+    decode_cursor,
+    encode_cursor,
+    set_next_page_headers
+)
+from app.api.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    response_cache_key
+)
+from app.api.responses import encode_response, trusted_response
+from app.api.streaming import (
+    EVENT_STREAM_MEDIA_TYPE,
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    stream_events,
+    stream_models
+)
+from app.core import config
+from app.db.broadcast import Broadcaster
 from app.db.repositories.holo_member import HoloMemberRepository
+from app.db.repositories.queries.holo_member import (
+    HOLO_MEMBER_COLUMNS,
+    HOLO_MEMBER_SORT_KEYS
+)
 from app.models.holo_member import (
+    GenerationType,
+    HoloMemberChanges,
     HoloMemberCreate,
+    HoloMemberLookup,
+    HoloMemberOrder,
     HoloMemberPublic,
     HoloMemberUpdate
 )
-from fastapi import APIRouter, Body, Depends, HTTPException, Path
-from starlette.status import HTTP_201_CREATED, HTTP_404_NOT_FOUND
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response
+)
+from fastapi.responses import StreamingResponse
+from fastapi.utils import create_response_field
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND
+)
 
 router = APIRouter()
 
+# 一覧のレスポンスのキャッシュ ((バージョン, リクエストのキー) → CachedResponse)
+# 同じキーのキャッシュが同時に無い場合は1つの要求だけがDBから取得する
+# 全件 (all=true) の本文はテーブル全体の大きさになるので保存しない
+holo_member_list_cache = ResponseCache(
+    name='get_all_holo_member',
+    maxsize=config.HOLO_MEMBER_LIST_CACHE_SIZE,
+    ttl=config.HOLO_MEMBER_LIST_CACHE_TTL
+)
+
+# 一覧の本文はキャッシュするため response_model を通らないので、このフィールドで検証する
+# (FAST_SERIALIZATION が有効な場合は他のルートと同じく検証しない)
+holo_member_list_field = create_response_field(
+    name='holo_member_list',
+    type_=List[HoloMemberPublic]
+)
+
 # @router.get("/")
 # async def get_all_3rd_holomember() -> List[dict]:
 #     holo_3rd_list = [
@@ -28,17 +96,264 @@ router = APIRouter()
 
 #     return holo_3rd_list
 
-# get 全取得
+# get 一覧取得
+# 既定では (並び替えのキー, id) のキーセットページネーションで返却し、
+# 次のページのカーソルを Link / X-Next-Cursor ヘッダーで返す
+# 全件取得は all=true を明示した場合のみ
+# fields=id,name のように指定した場合はその列だけを取得して返す (id は常に含む)
+# エンコード・圧縮済みの本文をテーブルのバージョンとリクエストをキーにキャッシュし、
+# 同じバージョンの間の同じリクエストではDBからの取得・エンコード・圧縮を行わない
+# バージョンはプロセス内に保持しているので、キャッシュにあればDBへの問い合わせはない
+# ETag も同じキーから作るので、If-None-Match が一致すれば本文を作らずに304を返す
+
+
+def decode_after(after: str, order_by: HoloMemberOrder) -> List[Any]:
+    """decode_after
+
+        カーソルを並び替えのキーの値に戻す関数
+
+        Args:
+            after (str): 直前のページのカーソル
+            order_by (HoloMemberOrder): 現在の並び順
+
+        Raises:
+            HTTPException: 不正なカーソルや並び順が異なるカーソルの場合は400を返す
+
+        Returns:
+            List[Any]: 直前のページの最後の行の (並び替えのキー, id)
+    """
+    cursor = decode_cursor(after)
+    key = cursor.get('key')
+    if cursor.get('order') != order_by.value or not isinstance(key, list) or \
+            len(key) != len(HOLO_MEMBER_SORT_KEYS[order_by.sort]):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor.')
+
+    value_types = {'id': int, 'name': str, 'updated_at': str}
+    for value, column in zip(key, HOLO_MEMBER_SORT_KEYS[order_by.sort]):
+        if not isinstance(value, value_types[column]):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail='Invalid cursor.')
+    if order_by.sort == 'updated_at':
+        try:
+            key[0] = datetime.fromisoformat(key[0])
+        except ValueError:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail='Invalid cursor.')
+    return key
+
+
+def encode_after(key: List[Any], order_by: HoloMemberOrder) -> str:
+    return encode_cursor({
+        'order': order_by.value,
+        'key': [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in key
+        ],
+    })
 
 
 @router.get('/',
             response_model=List[HoloMemberPublic],
+            response_model_exclude_unset=True,
             name='holo_member:get-all-holo_member')
 async def get_all_holo_member(
+    request: Request,
+    response: Response,
+    limit: int = Query(
+        config.HOLO_MEMBER_PAGE_SIZE,
+        ge=1,
+        le=config.HOLO_MEMBER_MAX_PAGE_SIZE),
+    after: Optional[str] = Query(
+        None, title='Cursor returned by the previous page.'),
+    unpaginated: bool = Query(
+        False, alias='all', title='Return every holo_member at once.'),
+    order_by: HoloMemberOrder = Query(HoloMemberOrder.id_asc),
+    type: Optional[GenerationType] = Query(None),
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    min_age: Optional[float] = Query(None),
+    max_age: Optional[float] = Query(None),
+    fields: Optional[Tuple[str, ...]] = Depends(
+        get_fields(HOLO_MEMBER_COLUMNS)),
     holo_member_repo: HoloMemberRepository = Depends(
         get_repository(HoloMemberRepository))
 ) -> List[HoloMemberPublic]:
-    return await holo_member_repo.get_all_holo_member()
+    after_key = decode_after(after, order_by) if after is not None else None
+    version = await holo_member_repo.get_holo_member_version()
+    cache_key = (version, *response_cache_key(request))
+    etag = make_etag(*cache_key)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+
+    async def build() -> CachedResponse:
+        # バージョンより古いデータをキャッシュしないよう、
+        # レプリカが version まで追いついていなければプライマリから読む
+        page_repo = holo_member_repo
+        if not await holo_member_repo.read_db_is_at_version(version):
+            page_repo = HoloMemberRepository(holo_member_repo.db)
+        holo_members, next_after = await page_repo.get_holo_member_page(
+            limit=None if unpaginated else limit,
+            after=after_key,
+            order_by=order_by,
+            type=type,
+            name_prefix=name_prefix,
+            min_age=min_age,
+            max_age=max_age,
+            fields=fields
+        )
+        if next_after is not None:
+            set_next_page_headers(
+                request, response, encode_after(next_after, order_by))
+        set_cache_headers(response, etag)
+        body = await encode_response(
+            holo_members, holo_member_list_field, exclude_unset=True)
+        return CachedResponse(body, response.raw_headers)
+
+    cached = await holo_member_list_cache.get_or_build(
+        cache_key, build, store=not unpaginated)
+    return cached.to_response(
+        negotiate_encoding(request.headers.get('accept-encoding')),
+        config.COMPRESSION_MINIMUM_SIZE
+    )
+
+# get 全件をストリーミングで取得
+# サーバーサイドカーソルから読んだ行をそのままエンコードして送出するので
+# テーブルの大きさに関わらずメモリ使用量は一定
+
+
+@router.get(
+    '/export/',
+    response_model=List[HoloMemberPublic],
+    name='holo_member:export-holo_member'
+)
+async def export_holo_member(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias='format'),
+    holo_member_repo: HoloMemberRepository = Depends(
+        get_repository(HoloMemberRepository))
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_models(
+            holo_member_repo.iterate_all_holo_member(), export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format]
+    )
+
+# get 変更通知を Server-Sent Events で受け取る
+# ワーカーごとに1本の LISTEN 接続で受け取った通知を購読者全員に配る
+# 切断・切り離し (event: dropped / reset) の後は差分同期で取りこぼしを取得する
+
+
+@router.get(
+    '/events/',
+    name='holo_member:stream-holo_member-events'
+)
+async def stream_holo_member_events(
+    request: Request,
+    broadcaster: Broadcaster = Depends(get_broadcaster)
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_events(
+            request, broadcaster, config.HOLO_MEMBER_EVENTS_HEARTBEAT),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# get 差分同期
+# updated_since 以降 (省略した場合は最初から) に作成・更新・削除されたライバーを返す
+# 2回目以降はレスポンスの next_cursor を cursor に渡すと続きから取得できる
+# has_more が False になれば追いついているので、次のポーリングまで待つ
+
+# 変更の位置の初期値 (省略時は最初から)
+CHANGES_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def decode_changes_cursor(cursor: str) -> List[List[Any]]:
+    """decode_changes_cursor
+
+        差分同期のカーソルを更新・削除それぞれの (日時, id) に戻す関数
+
+        Args:
+            cursor (str): 前回のレスポンスの next_cursor
+
+        Raises:
+            HTTPException: 不正なカーソルの場合は400を返す
+
+        Returns:
+            List[List[Any]]: [更新の (日時, id), 削除の (日時, id)]
+    """
+    decoded = decode_cursor(cursor)
+    positions = []
+    for stream in ('updated', 'deleted'):
+        position = decoded.get(stream)
+        try:
+            timestamp, id = position
+            if not isinstance(timestamp, str) or not isinstance(id, int):
+                raise ValueError
+            positions.append([datetime.fromisoformat(timestamp), id])
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail='Invalid cursor.')
+    return positions
+
+
+def encode_changes_cursor(
+    updated_after: List[Any], deleted_after: List[Any]
+) -> str:
+    return encode_cursor({
+        'updated': [updated_after[0].isoformat(), updated_after[1]],
+        'deleted': [deleted_after[0].isoformat(), deleted_after[1]],
+    })
+
+
+@router.get(
+    '/changes/',
+    response_model=HoloMemberChanges,
+    name='holo_member:get-holo_member-changes'
+)
+async def get_holo_member_changes(
+    updated_since: Optional[datetime] = Query(
+        None, title='Return changes made at or after this time.'),
+    cursor: Optional[str] = Query(
+        None, title='next_cursor returned by the previous response.'),
+    limit: int = Query(
+        config.HOLO_MEMBER_PAGE_SIZE,
+        ge=1,
+        le=config.HOLO_MEMBER_MAX_PAGE_SIZE),
+    holo_member_repo: HoloMemberRepository = Depends(
+        get_repository(HoloMemberRepository))
+) -> HoloMemberChanges:
+    if cursor is not None and updated_since is not None:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail='Specify either updated_since or cursor.')
+    if cursor is not None:
+        updated_after, deleted_after = decode_changes_cursor(cursor)
+    else:
+        since = updated_since or CHANGES_EPOCH
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # id は1以上なので (since, 0) より後ろは since 以降の全ての変更になる
+        updated_after, deleted_after = [since, 0], [since, 0]
+
+    updated, deleted, has_more = \
+        await holo_member_repo.get_holo_member_changes(
+            limit=limit,
+            updated_after=updated_after,
+            deleted_after=deleted_after
+        )
+    if updated:
+        updated_after = [updated[-1].updated_at, updated[-1].id]
+    if deleted:
+        deleted_after = [deleted[-1].deleted_at, deleted[-1].id]
+    return trusted_response(HoloMemberChanges.construct(
+        updated=updated,
+        deleted=deleted,
+        next_cursor=encode_changes_cursor(updated_after, deleted_after),
+        has_more=has_more
+    ))
 
 # post リクエストを受け取る
 
@@ -57,29 +372,94 @@ async def create_new_holo_member(
     created_holo_member = await holo_member_repo.create_holo_member(
         new_holo_member=new_holo_member
     )
-    return created_holo_member
+    return trusted_response(
+        created_holo_member, status_code=HTTP_201_CREATED)
+
+# post 一括作成
+# 全件を1つのトランザクションで作成し、1件でも不正なら何も作成しない
+
+
+@router.post(
+    "/bulk/",
+    response_model=List[HoloMemberPublic],
+    name="holo_member:bulk-create-holo_member",
+    status_code=HTTP_201_CREATED
+)
+async def bulk_create_holo_member(
+    new_holo_members: List[HoloMemberCreate] = Body(
+        ...,
+        embed=True,
+        min_items=1,
+        max_items=config.HOLO_MEMBER_BULK_MAX_SIZE),
+    holo_member_repo: HoloMemberRepository = Depends(
+        get_repository(HoloMemberRepository)),
+) -> List[HoloMemberPublic]:
+    created_holo_members = await holo_member_repo.create_holo_members(
+        new_holo_members=new_holo_members
+    )
+    return trusted_response(
+        created_holo_members, status_code=HTTP_201_CREATED)
+
+# post 複数のidを元に取得
+# 1回のクエリでまとめて取得し、リクエストのid順に返す
+
+
+@router.post(
+    "/lookup/",
+    response_model=HoloMemberLookup,
+    name="holo_member:lookup-holo_member"
+)
+async def lookup_holo_member(
+    ids: List[int] = Body(
+        ...,
+        embed=True,
+        min_items=1,
+        max_items=config.HOLO_MEMBER_LOOKUP_MAX_SIZE),
+    holo_member_repo: HoloMemberRepository = Depends(
+        get_repository(HoloMemberRepository)),
+) -> HoloMemberLookup:
+    holo_members = await holo_member_repo.get_holo_member_by_ids(ids=ids)
+    return trusted_response(HoloMemberLookup.construct(
+        holo_members=[holo_members[id] for id in ids if id in holo_members],
+        missing_ids=[id for id in dict.fromkeys(ids) if id not in holo_members]
+    ))
 
 # get idを元に取得
+# fields を指定した場合はその列だけを返す (id は常に含む)
+# ETag は id・更新日時・fields から作り、If-None-Match が一致すれば304を返す
 
 
 @router.get(
     '/{id}/',
     response_model=HoloMemberPublic,
+    response_model_exclude_unset=True,
     name="holo_member:get-holo_member-by-id"
 )
 async def get_holo_member_by_id(
-    id: int, holo_member_repo: HoloMemberRepository = Depends(
+    request: Request,
+    response: Response,
+    id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(
+        get_fields(HOLO_MEMBER_COLUMNS)),
+    holo_member_repo: HoloMemberRepository = Depends(
         get_repository(HoloMemberRepository)
     )
 ) -> HoloMemberPublic:
-    holo_member = await holo_member_repo.get_holo_member_by_id(id=id)
+    holo_member = await holo_member_repo.get_holo_member_by_id(
+        id=id, fields=fields)
     if not holo_member:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail="指定されたidのホロライブメンバーは見つかりませんでした")
-    return holo_member
 
-# put idを元に更新
+    etag = make_etag(id, holo_member._updated_at, fields)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    set_cache_headers(response, etag)
+    return trusted_response(holo_member, response)
+
+# put / patch idを元に更新
+# どちらも指定された属性のみを更新する
 
 
 @router.put(
@@ -87,6 +467,11 @@ async def get_holo_member_by_id(
     response_model=HoloMemberPublic,
     name='holo_member:update-holo_member-by-id'
 )
+@router.patch(
+    '/{id}/',
+    response_model=HoloMemberPublic,
+    name='holo_member:patch-holo_member-by-id'
+)
 async def update_holo_member_by_id(
     id: int = Path(..., ge=1, title='The ID of the holo_member to update.'),
     holo_member_update: HoloMemberUpdate = Body(..., embed=True),
@@ -101,7 +486,7 @@ async def update_holo_member_by_id(
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail='No holo_member found with that id.')
-    return updated_holo_member
+    return trusted_response(updated_holo_member)
 
 # delete idを元に削除
 
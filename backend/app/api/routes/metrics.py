@@ -0,0 +1,138 @@
+from typing import List
+
+from app.api.routes.holo_member import holo_member_list_cache
+from app.core.metrics import REGISTRY, Gauge, Metric
+from app.db.pool import get_pool_stats
+from app.db.repositories.holo_member import (
+    holo_member_batchers,
+    holo_member_cache,
+    holo_member_flights,
+    holo_member_loaders,
+    holo_member_version
+)
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def collect_state_metrics(request: Request) -> List[Metric]:
+    """collect_state_metrics
+
+        プール・キャッシュ・DataLoader・書き込みのまとめ・アドミッション制御等の
+        現在の状態を集める関数
+
+        Args:
+            request (Request): リクエストを受け取る
+
+        Returns:
+            List[Metric]: 出力のたびに作り直す計測値
+    """
+    state = request.app.state
+    pool = Gauge(
+        "favue_db_pool", "Connection pool statistics.", ("database", "stat"))
+    databases = [("primary", getattr(state, "_db", None))]
+    replicas = getattr(state, "_replicas", None)
+    if replicas is not None:
+        databases.extend(
+            (f"replica_{i}", replica)
+            for i, replica in enumerate(replicas.replicas))
+    for label, database in databases:
+        if database is None:
+            continue
+        for stat, value in get_pool_stats(database).items():
+            pool.set(value, label, stat)
+
+    cache = Gauge(
+        "favue_holo_member_cache", "holo_member cache statistics.", ("stat",))
+    for stat, value in holo_member_cache.stats().items():
+        cache.set(value, stat)
+
+    list_cache = Gauge(
+        "favue_holo_member_list_cache",
+        "holo_member list response cache statistics.",
+        ("stat",))
+    for stat, value in holo_member_list_cache.stats().items():
+        list_cache.set(value, stat)
+
+    version = Gauge(
+        "favue_holo_member_version",
+        "holo_member table version lookups.",
+        ("stat",))
+    for stat, value in holo_member_version.stats().items():
+        version.set(value, stat)
+
+    loader = Gauge(
+        "favue_holo_member_loader",
+        "Batched holo_member by-id loads.",
+        ("stat",))
+    loaders = list(holo_member_loaders.values())
+    loader.set(sum(item.batches for item in loaders), "batches")
+    loader.set(sum(item.loads for item in loaders), "loads")
+
+    flights = Gauge(
+        "favue_holo_member_single_flight",
+        "Concurrent identical holo_member reads sharing one query.",
+        ("method", "stat"))
+    for method, flight in holo_member_flights.items():
+        for stat, value in flight.stats().items():
+            flights.set(value, method, stat)
+
+    batcher = Gauge(
+        "favue_holo_member_write_batcher",
+        "holo_member creates batched into one INSERT.",
+        ("stat",))
+    batchers = list(holo_member_batchers.values())
+    for stat in ("batches", "writes", "fallbacks", "pending"):
+        batcher.set(sum(item.stats()[stat] for item in batchers), stat)
+
+    metrics = [pool, cache, list_cache, version, loader, flights, batcher]
+    admission = getattr(state, "_admission", None)
+    if admission is not None:
+        admitted = Gauge(
+            "favue_admission",
+            "Admission control of concurrent requests.",
+            ("class", "stat"))
+        for kind, stats in admission.stats().items():
+            for stat, value in stats.items():
+                admitted.set(value, kind, stat)
+        metrics.append(admitted)
+
+    broadcaster = getattr(state, "_broadcaster", None)
+    if broadcaster is not None:
+        events = Gauge(
+            "favue_holo_member_events",
+            "holo_member change event subscribers.",
+            ("stat",))
+        for stat, value in broadcaster.stats().items():
+            events.set(value, stat)
+        metrics.append(events)
+
+    listener = getattr(state, "_listener", None)
+    if listener is not None:
+        listening = Gauge(
+            "favue_change_listener",
+            "LISTEN connection for change notifications.",
+            ("stat",))
+        for stat, value in listener.stats().items():
+            listening.set(value, stat)
+        metrics.append(listening)
+    return metrics
+
+# get Prometheus のテキスト形式で計測値を取得
+# 値はワーカーのプロセスごとに集計される
+
+
+@router.get(
+    '/metrics',
+    response_class=PlainTextResponse,
+    name='metrics:get-metrics',
+    include_in_schema=False
+)
+async def get_metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        REGISTRY.render(collect_state_metrics(request)),
+        media_type=PROMETHEUS_MEDIA_TYPE
+    )
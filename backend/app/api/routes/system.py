@@ -0,0 +1,71 @@
+from typing import Any, Dict, List
+
+from app.api.dependencies.database import get_database
+from app.api.dependencies.profiling import verify_profiling_token
+from app.core.profiling import profile_store
+from app.db.pool import get_pool_stats
+from app.db.slow_query import slow_query_log
+from databases import Database
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.status import HTTP_404_NOT_FOUND
+
+router = APIRouter()
+
+# get コネクションプールの状態を取得
+# PROFILING_HEADER にトークンを付けたリクエストのみ参照できる
+
+
+@router.get(
+    '/pool/',
+    response_model=Dict[str, float],
+    name='system:get-pool-stats',
+    dependencies=[Depends(verify_profiling_token)]
+)
+async def get_pool_stats_route(
+    db: Database = Depends(get_database)
+) -> Dict[str, float]:
+    return get_pool_stats(db)
+
+# get 直近の遅いクエリを新しい順に取得
+# SLOW_QUERY_EXPLAIN_RATE で取得した実行計画は plan に入る
+# SQL を含むので PROFILING_HEADER にトークンを付けたリクエストのみ参照できる
+
+
+@router.get(
+    '/slow-queries/',
+    response_model=List[Dict[str, Any]],
+    name='system:get-slow-queries',
+    dependencies=[Depends(verify_profiling_token)]
+)
+async def get_slow_queries() -> List[Dict[str, Any]]:
+    return slow_query_log.entries()
+
+# get 直近のプロファイルの一覧を新しい順に取得
+# PROFILING_HEADER にトークンを付けたリクエストのみ参照できる
+
+
+@router.get(
+    '/profiles/',
+    response_model=List[Dict[str, Any]],
+    name='system:get-profiles',
+    dependencies=[Depends(verify_profiling_token)]
+)
+async def get_profiles() -> List[Dict[str, Any]]:
+    return profile_store.summaries()
+
+# get プロファイルを呼び出しツリーを含めて取得
+
+
+@router.get(
+    '/profiles/{id}/',
+    response_model=Dict[str, Any],
+    name='system:get-profile-by-id',
+    dependencies=[Depends(verify_profiling_token)]
+)
+async def get_profile_by_id(id: str) -> Dict[str, Any]:
+    profile = profile_store.get(id)
+    if profile is None:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail='No profile found with that id.')
+    return profile
@@ -2,7 +2,21 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core import config, task
+from app.api.errors import pool_timeout_handler
+from app.api.middleware.admission import (
+    AdmissionController,
+    AdmissionMiddleware
+)
+from app.api.middleware.compression import CompressionMiddleware
+from app.api.middleware.deadline import DeadlineMiddleware
+from app.api.middleware.metrics import MetricsMiddleware
+from app.api.middleware.profiling import ProfilingMiddleware
+from app.api.responses import ModelJSONResponse
 from app.api.routes import router as api_router
+from app.api.routes.health import router as health_router
+from app.api.routes.metrics import router as metrics_router
+from app.core.profiling import profile_store
+from app.db.pool import PoolTimeoutError
 
 
 def get_application():
@@ -11,8 +25,35 @@ def get_application():
         applicationの各種設定
 
     """
-    app = FastAPI(title=config.PROJECT_NAME, version=config.VERSION)
+    app = FastAPI(
+        title=config.PROJECT_NAME,
+        version=config.VERSION,
+        default_response_class=ModelJSONResponse
+    )
 
+    # 処理できる数を超えたリクエストは待たせ過ぎずに 503 で断る
+    # CORS より内側に置き、503 にも CORS のヘッダーを付ける
+    if config.ADMISSION_ENABLED:
+        app.state._admission = AdmissionController(
+            limit=config.ADMISSION_CONCURRENCY,
+            write_limit=config.ADMISSION_WRITE_CONCURRENCY,
+            queue_size=config.ADMISSION_QUEUE_SIZE,
+            timeout=config.ADMISSION_QUEUE_TIMEOUT
+        )
+        app.add_middleware(
+            AdmissionMiddleware,
+            controller=app.state._admission,
+            exempt_paths=config.ADMISSION_EXEMPT_PATHS,
+            retry_after=config.ADMISSION_RETRY_AFTER
+        )
+    # 期限を過ぎたリクエストや切断されたリクエストの処理 (実行中のクエリも) を取り消す
+    # アドミッション制御の待ち時間も期限に含める
+    app.add_middleware(
+        DeadlineMiddleware,
+        timeout=config.REQUEST_TIMEOUT,
+        max_timeout=config.REQUEST_TIMEOUT_MAX,
+        header=config.REQUEST_TIMEOUT_HEADER
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -20,11 +61,30 @@ def get_application():
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MINIMUM_SIZE
+    )
+    if config.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    # トークンが設定されていない場合はミドルウェア自体を追加しない
+    if str(config.PROFILING_TOKEN):
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=str(config.PROFILING_TOKEN),
+            header=config.PROFILING_HEADER,
+            store=profile_store,
+            stats_limit=config.PROFILING_STATS_LIMIT
+        )
+
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
 
     app.add_event_handler("startup", task.create_start_app_handler(app))
     app.add_event_handler("shutdown", task.create_stop_app_handler(app))
 
     app.include_router(api_router, prefix="/api/v1")
+    app.include_router(metrics_router)
+    app.include_router(health_router)
 
     return app
 
@@ -0,0 +1,130 @@
+import asyncio
+from enum import Enum
+from typing import AsyncIterator
+
+from app.api.responses import dumps
+from app.db.broadcast import DROPPED_EVENT, Broadcaster
+from app.models.core import CoreModel
+from starlette.requests import Request
+
+# ソケットへの書き込み回数を抑えるため、この大きさまで溜めてから送出する
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ExportFormat(str, Enum):
+    """ExportFormat
+
+    ストリーミングで返却する際の形式の列挙型
+
+    Attributes:
+        ndjson str: 1行に1件のJSONを書き出す形式
+        json str: 全体を1つのJSON配列として書き出す形式
+
+    """
+    ndjson = "ndjson"
+    json = "json"
+
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.json: "application/json",
+}
+
+
+async def _chunked(pieces: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = []
+    size = 0
+    async for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+async def _ndjson_pieces(
+    models: AsyncIterator[CoreModel]
+) -> AsyncIterator[bytes]:
+    async for model in models:
+        yield dumps(model)
+        yield b"\n"
+
+
+async def _json_array_pieces(
+    models: AsyncIterator[CoreModel]
+) -> AsyncIterator[bytes]:
+    yield b"["
+    separator = b""
+    async for model in models:
+        yield separator
+        yield dumps(model)
+        separator = b","
+    yield b"]"
+
+
+def stream_models(
+    models: AsyncIterator[CoreModel],
+    export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """stream_models
+
+        モデルを逐次エンコードして StreamingResponse に渡すチャンクを返す関数
+
+        Args:
+            models (AsyncIterator[CoreModel]): エンコードするモデル
+            export_format (ExportFormat): 書き出す形式
+
+        Returns:
+            AsyncIterator[bytes]: エンコード済みのチャンク
+    """
+    if export_format == ExportFormat.ndjson:
+        return _chunked(_ndjson_pieces(models))
+    return _chunked(_json_array_pieces(models))
+
+
+async def stream_events(
+    request: Request,
+    broadcaster: Broadcaster,
+    heartbeat: float
+) -> AsyncIterator[bytes]:
+    """stream_events
+
+        Broadcaster に届いた変更通知を Server-Sent Events として送出する関数\n
+        event は通知の op を小文字にしたもの (insert / update / delete / reset)、
+        data は通知のJSON\n
+        読むのが遅く切り離された場合は dropped を送って終了する
+
+        Args:
+            request (Request): 切断を検知するためのリクエスト
+            broadcaster (Broadcaster): 購読する Broadcaster
+            heartbeat (float): 通知がない間にコメントを送る間隔 (秒)
+
+        Returns:
+            AsyncIterator[bytes]: SSEの形式にエンコードした通知
+    """
+    queue = broadcaster.subscribe()
+    try:
+        # ヘッダーをすぐに送るため最初にコメントを送る
+        yield b": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield b": heartbeat\n\n"
+                continue
+            if event is None:
+                break
+            op = str(event.get("op", "message")).lower()
+            yield b"event: " + op.encode() + b"\ndata: " + dumps(event) + \
+                b"\n\n"
+            if event is DROPPED_EVENT:
+                break
+    finally:
+        broadcaster.unsubscribe(queue)
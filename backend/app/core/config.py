@@ -1,6 +1,6 @@
 from databases import DatabaseURL
 from starlette.config import Config
-from starlette.datastructures import Secret
+from starlette.datastructures import CommaSeparatedStrings, Secret
 
 
 config = Config(".env")
@@ -21,3 +21,174 @@ DATABASE_URL = config(
     cast=DatabaseURL,
     default=f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
+
+# ホロメンバー一覧のページネーション
+HOLO_MEMBER_PAGE_SIZE = config("HOLO_MEMBER_PAGE_SIZE", cast=int, default=100)
+HOLO_MEMBER_MAX_PAGE_SIZE = config(
+    "HOLO_MEMBER_MAX_PAGE_SIZE", cast=int, default=1000)
+
+# ホロメンバーの一括作成
+HOLO_MEMBER_BULK_BATCH_SIZE = config(
+    "HOLO_MEMBER_BULK_BATCH_SIZE", cast=int, default=500)
+HOLO_MEMBER_BULK_MAX_SIZE = config(
+    "HOLO_MEMBER_BULK_MAX_SIZE", cast=int, default=10000)
+
+# id によるホロメンバー取得のキャッシュ (ワーカーごと)
+HOLO_MEMBER_CACHE_SIZE = config("HOLO_MEMBER_CACHE_SIZE", cast=int, default=1024)
+HOLO_MEMBER_CACHE_TTL = config("HOLO_MEMBER_CACHE_TTL", cast=float, default=5.0)
+# holo_member の変更通知を受け取るチャンネル (マイグレーションのトリガーと合わせる)
+HOLO_MEMBER_NOTIFY_CHANNEL = "holo_member_changes"
+# LISTEN 用の接続が切れた場合に接続し直すまでの最初の待ち秒数と上限 (失敗するごとに倍にする)
+LISTEN_RETRY_INTERVAL = config("LISTEN_RETRY_INTERVAL", cast=float, default=0.5)
+LISTEN_MAX_RETRY_INTERVAL = config(
+    "LISTEN_MAX_RETRY_INTERVAL", cast=float, default=30.0)
+# LISTEN 用の接続が応答するかを確認する間隔 (秒)
+LISTEN_HEALTH_CHECK_INTERVAL = config(
+    "LISTEN_HEALTH_CHECK_INTERVAL", cast=float, default=10.0)
+
+# 変更通知の Server-Sent Events
+# 購読者ごとに溜められる通知の上限 (超えた購読者は切り離す)
+HOLO_MEMBER_EVENTS_QUEUE_SIZE = config(
+    "HOLO_MEMBER_EVENTS_QUEUE_SIZE", cast=int, default=100)
+# 通知がない間に接続維持のコメントを送る間隔 (秒)
+HOLO_MEMBER_EVENTS_HEARTBEAT = config(
+    "HOLO_MEMBER_EVENTS_HEARTBEAT", cast=float, default=15.0)
+
+# 差分同期で返す変更の遅延 (秒)
+# updated_at はトランザクション開始時刻なので、実行中のトランザクションの変更を
+# 取りこぼさないようにこの秒数より前の変更のみを返す
+HOLO_MEMBER_CHANGES_LAG = config(
+    "HOLO_MEMBER_CHANGES_LAG", cast=float, default=1.0)
+
+# 複数の id による取得で一度に受け付ける件数
+HOLO_MEMBER_LOOKUP_MAX_SIZE = config(
+    "HOLO_MEMBER_LOOKUP_MAX_SIZE", cast=int, default=1000)
+
+# コネクションプール
+DB_POOL_MIN_SIZE = config("DB_POOL_MIN_SIZE", cast=int, default=2)
+DB_POOL_MAX_SIZE = config("DB_POOL_MAX_SIZE", cast=int, default=5)
+# 接続の取得を待つ最大秒数 (超えた場合は 503)
+DB_POOL_ACQUIRE_TIMEOUT = config(
+    "DB_POOL_ACQUIRE_TIMEOUT", cast=float, default=10.0)
+# 使われていない接続を閉じるまでの秒数
+DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME = config(
+    "DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME", cast=float, default=300.0)
+# 1つの接続で実行するクエリ数の上限 (超えると接続を作り直す)
+DB_POOL_MAX_QUERIES = config("DB_POOL_MAX_QUERIES", cast=int, default=50000)
+# サーバー側の statement_timeout (ミリ秒, 0 は無制限)
+DB_STATEMENT_TIMEOUT = config("DB_STATEMENT_TIMEOUT", cast=int, default=0)
+# 起動時にデータベースに接続できなかった場合に再試行する回数と最初の待ち秒数 (再試行ごとに倍にする)
+# 再試行しても接続できなければ起動を失敗させる
+DB_CONNECT_RETRIES = config("DB_CONNECT_RETRIES", cast=int, default=5)
+DB_CONNECT_RETRY_INTERVAL = config(
+    "DB_CONNECT_RETRY_INTERVAL", cast=float, default=0.5)
+
+# 読み込み専用のレプリカ (カンマ区切りのDSN, 空ならプライマリのみ)
+DATABASE_REPLICA_URLS = config(
+    "DATABASE_REPLICA_URLS", cast=CommaSeparatedStrings, default="")
+# レプリカの選び方 round_robin / least_busy
+DATABASE_REPLICA_STRATEGY = config(
+    "DATABASE_REPLICA_STRATEGY", cast=str, default="round_robin")
+# このヘッダーが付いたリクエストは読み込みもプライマリで行う (自分の書き込みを読む場合)
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+# DBから取得した行を検証せずにモデルにし、response_model による再検証を省略する
+FAST_SERIALIZATION = config("FAST_SERIALIZATION", cast=bool, default=True)
+
+# リクエストとクエリの計測 (/metrics)
+METRICS_ENABLED = config("METRICS_ENABLED", cast=bool, default=True)
+# 遅いクエリの記録 (ミリ秒, 0 以下の場合は記録しない)
+SLOW_QUERY_THRESHOLD = config("SLOW_QUERY_THRESHOLD", cast=float, default=200.0)
+# 直近何件の遅いクエリを保持するか
+SLOW_QUERY_LOG_SIZE = config("SLOW_QUERY_LOG_SIZE", cast=int, default=100)
+# 遅い SELECT の EXPLAIN (ANALYZE, BUFFERS) を取得する割合 (クエリを再実行するので既定は 0)
+SLOW_QUERY_EXPLAIN_RATE = config(
+    "SLOW_QUERY_EXPLAIN_RATE", cast=float, default=0.0)
+
+# リクエストのプロファイル (PROFILING_TOKEN が空の場合は無効)
+# PROFILING_HEADER にトークンを付けたリクエストのみ cProfile で計測する
+PROFILING_TOKEN = config("PROFILING_TOKEN", cast=Secret, default="")
+PROFILING_HEADER = "X-Profile"
+# 直近何件のプロファイルを保持するか
+PROFILING_HISTORY = config("PROFILING_HISTORY", cast=int, default=20)
+# 保持する呼び出しツリーの関数の数
+PROFILING_STATS_LIMIT = config("PROFILING_STATS_LIMIT", cast=int, default=50)
+
+# レスポンスの圧縮 (Accept-Encoding で br / gzip を選ぶ)
+# この大きさ (バイト) 未満の本文は圧縮しない
+COMPRESSION_MINIMUM_SIZE = config(
+    "COMPRESSION_MINIMUM_SIZE", cast=int, default=1024)
+COMPRESSION_GZIP_LEVEL = config("COMPRESSION_GZIP_LEVEL", cast=int, default=6)
+COMPRESSION_BROTLI_QUALITY = config(
+    "COMPRESSION_BROTLI_QUALITY", cast=int, default=5)
+
+# GET のレスポンスに付ける Cache-Control
+# 既定では毎回 ETag で再検証させ (変更がなければ 304)、
+# max-age を延ばすとブラウザや CDN が再検証せずに返せるようになる
+HOLO_MEMBER_CACHE_CONTROL = config(
+    "HOLO_MEMBER_CACHE_CONTROL",
+    cast=str,
+    default="public, max-age=0, must-revalidate")
+
+# 同時に受け付けた作成をまとめて1回の複数行の INSERT にする
+# 最初の作成から DELAY 秒経つか SIZE 件溜まった時点でまとめて書き込む
+HOLO_MEMBER_WRITE_BATCH_ENABLED = config(
+    "HOLO_MEMBER_WRITE_BATCH_ENABLED", cast=bool, default=False)
+HOLO_MEMBER_WRITE_BATCH_SIZE = config(
+    "HOLO_MEMBER_WRITE_BATCH_SIZE", cast=int, default=100)
+HOLO_MEMBER_WRITE_BATCH_DELAY = config(
+    "HOLO_MEMBER_WRITE_BATCH_DELAY", cast=float, default=0.002)
+
+# 同じ引数で同時に実行中の読み込みの結果を共有する (single-flight)
+SINGLE_FLIGHT_ENABLED = config("SINGLE_FLIGHT_ENABLED", cast=bool, default=True)
+
+# 一覧のレスポンス (エンコード・圧縮済みの本文) のキャッシュ
+# キーにテーブルのバージョンを含むので、変更されると使われなくなる
+HOLO_MEMBER_LIST_CACHE_SIZE = config(
+    "HOLO_MEMBER_LIST_CACHE_SIZE", cast=int, default=128)
+HOLO_MEMBER_LIST_CACHE_TTL = config(
+    "HOLO_MEMBER_LIST_CACHE_TTL", cast=float, default=60.0)
+
+# 同時に処理するリクエスト数の制限 (アドミッション制御)
+# 上限を超えたリクエストは読み込み・書き込みごとのキューで最大 QUEUE_TIMEOUT 秒待ち、
+# キューが一杯か待ち時間を超えた場合は Retry-After 付きの 503 を返す
+# 書き込みは WRITE_CONCURRENCY までに抑え、残りを読み込み用に空けておく
+ADMISSION_ENABLED = config("ADMISSION_ENABLED", cast=bool, default=True)
+ADMISSION_CONCURRENCY = config("ADMISSION_CONCURRENCY", cast=int, default=20)
+ADMISSION_WRITE_CONCURRENCY = config(
+    "ADMISSION_WRITE_CONCURRENCY", cast=int, default=10)
+ADMISSION_QUEUE_SIZE = config("ADMISSION_QUEUE_SIZE", cast=int, default=100)
+ADMISSION_QUEUE_TIMEOUT = config(
+    "ADMISSION_QUEUE_TIMEOUT", cast=float, default=2.0)
+ADMISSION_RETRY_AFTER = config("ADMISSION_RETRY_AFTER", cast=int, default=1)
+# 制限しないパス (前方一致) 長時間続くストリームや監視用のエンドポイント
+ADMISSION_EXEMPT_PATHS = config(
+    "ADMISSION_EXEMPT_PATHS",
+    cast=CommaSeparatedStrings,
+    default="/metrics,/ready,/api/v1/system/,/api/v1/holo_member/events/")
+
+# リクエストの制限時間 (秒, 0 以下は無制限)
+# クライアントは REQUEST_TIMEOUT_HEADER で REQUEST_TIMEOUT_MAX までの制限時間を指定できる
+# レスポンスを返し始める前に期限を過ぎた場合は処理 (実行中のクエリも) を取り消して 504 を返す
+REQUEST_TIMEOUT = config("REQUEST_TIMEOUT", cast=float, default=30.0)
+REQUEST_TIMEOUT_MAX = config("REQUEST_TIMEOUT_MAX", cast=float, default=60.0)
+REQUEST_TIMEOUT_HEADER = config(
+    "REQUEST_TIMEOUT_HEADER", cast=str, default="X-Request-Timeout")
+
+# 本番用のサーバー (python -m app.serve)
+SERVER_HOST = config("SERVER_HOST", cast=str, default="0.0.0.0")
+SERVER_PORT = config("SERVER_PORT", cast=int, default=8000)
+# ワーカーのプロセス数 (0 以下の場合はCPU数)
+SERVER_WORKERS = config("SERVER_WORKERS", cast=int, default=0)
+# Keep-Alive の接続を保持する秒数 (前段のロードバランサーの idle timeout より長くする)
+SERVER_KEEP_ALIVE = config("SERVER_KEEP_ALIVE", cast=int, default=75)
+# accept 待ちの接続数の上限
+SERVER_BACKLOG = config("SERVER_BACKLOG", cast=int, default=2048)
+# 停止時に処理中のリクエストの完了を待つ最大秒数
+SERVER_GRACEFUL_TIMEOUT = config(
+    "SERVER_GRACEFUL_TIMEOUT", cast=float, default=30.0)
+# Postgres の max_connections と、そのうちワーカー以外 (管理・マイグレーション等) に残す数
+# ワーカー数 × (プールの max_size + LISTEN 用の1本) がこの範囲に収まるようにプールを小さくする
+DB_MAX_CONNECTIONS = config("DB_MAX_CONNECTIONS", cast=int, default=100)
+DB_RESERVED_CONNECTIONS = config(
+    "DB_RESERVED_CONNECTIONS", cast=int, default=10)
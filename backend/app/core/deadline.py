@@ -0,0 +1,78 @@
+import asyncio
+import contextvars
+from typing import Optional
+
+# 処理中のリクエストの期限 (イベントループの時刻, 期限がない場合は None)
+request_deadline: "contextvars.ContextVar[Optional[float]]" = \
+    contextvars.ContextVar("request_deadline", default=None)
+
+
+def parse_timeout(
+    value: Optional[str],
+    default: float,
+    maximum: float
+) -> float:
+    """parse_timeout
+
+        リクエストのヘッダーで指定された制限時間を読む関数\n
+        指定がない・不正な場合は default を使い、maximum を超える値は maximum にする
+
+        Args:
+            value (Optional[str]): ヘッダーの値 (秒)
+            default (float): 既定の制限時間 (秒, 0 以下は無制限)
+            maximum (float): 指定できる最大の制限時間 (秒, 0 以下は無制限)
+
+        Returns:
+            float: 制限時間 (秒, 0 以下は無制限)
+    """
+    timeout = default
+    if value is not None:
+        try:
+            requested = float(value)
+        except ValueError:
+            requested = 0.0
+        if requested > 0:
+            timeout = requested
+    if maximum > 0 and (timeout <= 0 or timeout > maximum):
+        timeout = maximum
+    return timeout
+
+
+def remaining(timeout: Optional[float] = None) -> Optional[float]:
+    """remaining
+
+        リクエストの期限までの残り時間を返す関数\n
+        timeout を渡した場合は残り時間と短い方を返す
+
+        Args:
+            timeout (Optional[float]): 待つ最大秒数
+
+        Returns:
+            Optional[float]: 待つ秒数 (期限も timeout もない場合は None)
+    """
+    deadline = request_deadline.get()
+    if deadline is None:
+        return timeout
+    left = max(deadline - asyncio.get_event_loop().time(), 0.0)
+    return left if timeout is None else min(timeout, left)
+
+
+def later_deadline(
+    deadline: Optional[float],
+    other: Optional[float]
+) -> Optional[float]:
+    """later_deadline
+
+        複数のリクエストで共有する処理の期限を決める関数\n
+        期限のないリクエストがあれば期限なし、それ以外は遅い方にする
+
+        Args:
+            deadline (Optional[float]): 一方のリクエストの期限
+            other (Optional[float]): もう一方のリクエストの期限
+
+        Returns:
+            Optional[float]: 共有する処理の期限
+    """
+    if deadline is None or other is None:
+        return None
+    return max(deadline, other)
@@ -0,0 +1,155 @@
+import bisect
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# リクエストやクエリの所要時間のヒストグラムの境界 (秒)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0
+)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace(
+        '"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Metric
+
+    Prometheus のテキスト形式で出力できる計測値のベースクラス\n
+    ラベルの値の組ごとに値を持つ (ワーカーのプロセスごとに集計する)
+
+    Attributes:
+        name str: メトリクス名
+        documentation str: HELP に出力する説明
+        labelnames Tuple[str, ...]: ラベル名
+
+    """
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Labels, float]]:
+        for labels, value in self._values.items():
+            yield self.name, self.labelnames, labels, value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labelnames, labels, value in self.samples():
+            lines.append(
+                f"{name}{_format_labels(labelnames, labels)} "
+                f"{_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ラベルの値の組ごとに [各区間の件数..., 合計]
+        self._observations: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        observation = self._observations.get(labels)
+        if observation is None:
+            observation = [0] * (len(self.buckets) + 2)
+            self._observations[labels] = observation
+        observation[bisect.bisect_left(self.buckets, value)] += 1
+        observation[-1] += value
+
+    def samples(self) -> Iterable[Tuple[str, Labels, Labels, float]]:
+        bucket_labelnames = self.labelnames + ("le",)
+        for labels, observation in self._observations.items():
+            count = 0
+            for bound, bucket_count in zip(
+                    self.buckets + (float("inf"),), observation):
+                count += bucket_count
+                yield (
+                    self.name + "_bucket", bucket_labelnames,
+                    labels + (_format_value(bound),), count)
+            yield self.name + "_sum", self.labelnames, labels, observation[-1]
+            yield self.name + "_count", self.labelnames, labels, count
+
+
+class Registry:
+    """Registry
+
+    /metrics で出力する計測値の登録先
+
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, extra: Iterable[Metric] = ()) -> str:
+        lines = []
+        for metric in [*self._metrics, *extra]:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# プロセス全体で共有する登録先
+REGISTRY = Registry()
@@ -0,0 +1,139 @@
+import contextvars
+import io
+import pstats
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core import config
+
+# プロファイル中のリクエストの所要時間の内訳 (プロファイルしていない場合は None)
+# cProfile では await 中の時間が分からないため、DBの待ち時間はここに積み上げる
+request_timings: "contextvars.ContextVar[Optional[Dict[str, float]]]" = \
+    contextvars.ContextVar("request_timings", default=None)
+
+# 内訳に集計する関数 (ファイル名の末尾, 関数名)
+PROFILE_BREAKDOWN: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    # リクエストのパラメータ・ボディとレスポンスの検証
+    "validation": (
+        ("fastapi/dependencies/utils.py", "request_params_to_args"),
+        ("fastapi/dependencies/utils.py", "request_body_to_args"),
+        ("fastapi/routing.py", "serialize_response"),
+    ),
+    # レスポンスのJSONエンコード
+    "serialization": (
+        ("fastapi/encoders.py", "jsonable_encoder"),
+        ("app/api/responses.py", "dumps"),
+        ("starlette/responses.py", "render"),
+    ),
+}
+
+
+def add_timing(name: str, seconds: float) -> None:
+    """add_timing
+
+        プロファイル中のリクエストであれば内訳に所要時間を加える関数\n
+        プロファイルしていない場合は何もしない
+
+        Args:
+            name (str): 内訳の名前
+            seconds (float): 所要時間 (秒)
+    """
+    timings = request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def detached_context() -> contextvars.Context:
+    """detached_context
+
+        要求元とは独立したタスクを実行するためのコンテキストを作る関数\n
+        要求元の接続やトランザクションは引き継がず、プロファイル中の内訳だけを引き継ぐ
+
+        Returns:
+            contextvars.Context: 新しいコンテキスト
+    """
+    context = contextvars.Context()
+    context.run(request_timings.set, request_timings.get())
+    return context
+
+
+def summarize_stats(stats: pstats.Stats) -> Dict[str, float]:
+    """summarize_stats
+
+        PROFILE_BREAKDOWN の関数の累積時間を内訳ごとに合計する関数
+
+        Args:
+            stats (pstats.Stats): プロファイルの結果
+
+        Returns:
+            Dict[str, float]: 内訳ごとの所要時間 (秒)
+    """
+    summary = {name: 0.0 for name in PROFILE_BREAKDOWN}
+    for (filename, _, function), entry in stats.stats.items():
+        cumulative = entry[3]
+        for name, targets in PROFILE_BREAKDOWN.items():
+            for suffix, target in targets:
+                if function == target and filename.endswith(suffix):
+                    summary[name] += cumulative
+    return summary
+
+
+def format_stats(stats: pstats.Stats, limit: int) -> str:
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+class ProfileStore:
+    """ProfileStore
+
+    取得したプロファイルを直近 size 件まで保持するクラス
+
+    Attributes:
+        size int: 保持する件数
+
+    """
+
+    def __init__(self, size: int) -> None:
+        self._profiles: deque = deque(maxlen=size)
+
+    def add(
+        self,
+        method: str,
+        path: str,
+        timings: Dict[str, float],
+        call_tree: str
+    ) -> Dict[str, Any]:
+        profile = {
+            "id": uuid.uuid4().hex,
+            "method": method,
+            "path": path,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "timings_ms": {
+                name: round(seconds * 1000, 3)
+                for name, seconds in timings.items()
+            },
+            "call_tree": call_tree,
+        }
+        self._profiles.append(profile)
+        return profile
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        for profile in self._profiles:
+            if profile["id"] == id:
+                return profile
+        return None
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        return [
+            {key: value for key, value in profile.items()
+             if key != "call_tree"}
+            for profile in reversed(self._profiles)
+        ]
+
+
+# 取得したプロファイル (ワーカーごと)
+profile_store = ProfileStore(config.PROFILING_HISTORY)
@@ -1,18 +1,35 @@
 from typing import Callable
 from fastapi import FastAPI
 
-from app.db.tasks import connect_to_db, close_db_connection
+from app.core.warmup import warm_up
+from app.db.tasks import (
+    close_db_connection,
+    close_replica_connections,
+    connect_to_db,
+    connect_to_replicas,
+    start_change_listener,
+    stop_change_listener
+)
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:
     async def start_app() -> None:
         await connect_to_db(app)
+        await connect_to_replicas(app)
+        await start_change_listener(app)
+        # 最初のリクエストが接続の確立や文の準備を待たないように済ませておく
+        # 失敗した場合は /ready が 503 を返し、次の確認で再び準備する
+        app.state._ready = False
+        await warm_up(app)
 
     return start_app
 
 
 def create_stop_app_handler(app: FastAPI) -> Callable:
     async def stop_app() -> None:
+        app.state._ready = False
+        await stop_change_listener(app)
+        await close_replica_connections(app)
         await close_db_connection(app)
 
     return stop_app
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+
+from app.api.compression import compress, supported_encodings
+from app.api.responses import dumps
+from app.db.repositories.queries import holo_member as query
+from app.db.warmup import warm_up_pool
+from app.models.core import JST
+from app.models.holo_member import (
+    HoloMemberChanges,
+    HoloMemberLookup,
+    HoloMemberPublic
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_warm_up_queries() -> List[str]:
+    """get_warm_up_queries
+
+        起動時に準備するクエリを返す関数\n
+        queries/holo_member.py の全ての文と、組み立てるクエリのうち
+        最もよく使う組み合わせ (絞り込み無し、id 順の一覧) を含む
+
+        Returns:
+            List[str]: :name 形式のパラメータを含むクエリ
+    """
+    query.build_get_holo_member_page_query()
+    query.build_get_holo_member_page_query(after=True)
+    return list(query.QUERY_NAMES)
+
+
+def warm_up_serialization() -> int:
+    """warm_up_serialization
+
+        各レスポンスのモデルを一度ずつ検証・エンコード・圧縮する関数\n
+        最初のリクエストで行われる初期化 (エンコーダーや圧縮の準備) を済ませておく
+
+        Returns:
+            int: エンコードしたモデルの数
+    """
+    now = datetime.now(JST)
+    holo_member = {
+        "id": 0,
+        "type": "0",
+        "name": "warm up",
+        "description": "",
+        "age": 0.0,
+        "twitter": "",
+    }
+    samples = [
+        [HoloMemberPublic(**holo_member)],
+        HoloMemberLookup(holo_members=[holo_member], missing_ids=[1]),
+        HoloMemberChanges(
+            updated=[{**holo_member, "created_at": now, "updated_at": now}],
+            deleted=[{"id": 1, "deleted_at": now}],
+            next_cursor="",
+            has_more=False
+        ),
+    ]
+    for sample in samples:
+        # response_model で検証する経路と trusted_response の経路
+        jsonable_encoder(sample)
+        body = dumps(sample)
+        for encoding in supported_encodings():
+            compress(body, encoding)
+    return len(samples)
+
+
+async def warm_up(app: FastAPI) -> bool:
+    """warm_up
+
+        プールの接続を min_size まで確立して各接続でクエリを準備し、
+        レスポンスのエンコードを一度行う関数\n
+        成功した場合のみ app.state._ready を True にする (readiness の確認に使う)\n
+        レプリカの準備に失敗した場合は記録のみ行う (レプリカ無しでも動けるため)
+
+        Args:
+            app (FastAPI): 起動中のアプリケーション
+
+        Returns:
+            bool: 準備に成功した場合は True
+    """
+    # 同時に届いた readiness の確認で準備を重複して行わない
+    if not hasattr(app.state, "_warm_up_lock"):
+        app.state._warm_up_lock = asyncio.Lock()
+
+    async with app.state._warm_up_lock:
+        if getattr(app.state, "_ready", False):
+            return True
+
+        queries = get_warm_up_queries()
+        try:
+            connections = await warm_up_pool(app.state._db, queries)
+            warm_up_serialization()
+        except Exception as e:
+            logger.warn("--- WARM UP ERROR ---")
+            logger.warn(e)
+            logger.warn("--- WARM UP ERROR ---")
+            return False
+
+        for replica in app.state._replicas.replicas:
+            try:
+                connections += await warm_up_pool(replica, queries)
+            except Exception as e:
+                logger.warn("--- REPLICA WARM UP ERROR ---")
+                logger.warn(e)
+                logger.warn("--- REPLICA WARM UP ERROR ---")
+
+        logger.info(
+            "warmed up %d statements on %d connections",
+            len(queries), connections)
+        app.state._ready = True
+        return True
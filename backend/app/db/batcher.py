@@ -0,0 +1,116 @@
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    TypeVar
+)
+
+from app.core.profiling import detached_context
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class WriteBatcher(Generic[T, R]):
+    """WriteBatcher
+
+    短い時間に受け付けた書き込みを1回の複数行の書き込みにまとめるクラス\n
+    最初の書き込みから max_delay 秒経つか max_size 件溜まった時点でまとめて書き込む
+    (1件だけの場合は write_one で書き込む)\n
+    まとめた書き込みが失敗した場合は1件ずつ書き込み直し、
+    それぞれの要求元に自分の結果か自分の例外だけを返す
+
+    Attributes:
+        write_many Callable[[List[T]], Awaitable[List[R]]]:
+            受け付けた順の一覧を書き込み、同じ順の結果を返す関数
+        write_one Callable[[T], Awaitable[R]]: 1件を書き込む関数
+        max_size int: まとめる最大件数
+        max_delay float: 最初の書き込みからまとめて書き込むまでの最大の待ち時間 (秒)
+        batches int: まとめて書き込んだ回数
+        writes int: 受け付けた書き込みの回数
+        fallbacks int: 失敗して1件ずつ書き込み直した回数
+
+    """
+
+    def __init__(
+        self,
+        write_many: Callable[[List[T]], Awaitable[List[R]]],
+        write_one: Callable[[T], Awaitable[R]],
+        max_size: int,
+        max_delay: float
+    ) -> None:
+        self.write_many = write_many
+        self.write_one = write_one
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self.fallbacks = 0
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def submit(self, item: T) -> Awaitable[R]:
+        self.writes += 1
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        # 要求元がキャンセルされても同じ書き込みにまとめた他の要求には影響させない
+        return asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        # 書き込みは要求元の接続やトランザクションを引き継がずに行う
+        detached_context().run(asyncio.ensure_future, self._run(pending))
+
+    async def _run(self, pending: List[Tuple[T, asyncio.Future]]) -> None:
+        if len(pending) == 1:
+            # 1件だけの場合はまとめずにそのまま書き込む
+            item, future = pending[0]
+            await self._write_one(item, future)
+            return
+
+        try:
+            results = await self.write_many([item for item, _ in pending])
+        except Exception:
+            # 1件でも不正なら文全体が失敗するので、どれが原因か分かるよう1件ずつ書き込む
+            self.fallbacks += 1
+            for item, future in pending:
+                await self._write_one(item, future)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _write_one(self, item: T, future: asyncio.Future) -> None:
+        try:
+            result = await self.write_one(item)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "fallbacks": self.fallbacks,
+            "pending": len(self._pending),
+        }
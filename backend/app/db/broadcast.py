@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+# 購読者のキューが溢れて切り離された際に最後に届く擬似イベント
+# 受け取った側は取りこぼした変更があるので差分同期等で取得し直す
+DROPPED_EVENT = {"op": "DROPPED"}
+
+
+class Broadcaster:
+    """Broadcaster
+
+    LISTEN 用の接続で受け取った変更通知をワーカー内の購読者全員に配る\n
+    購読者ごとに上限のあるキューを持ち、溢れた (読むのが遅い) 購読者は切り離す
+
+    Attributes:
+        queue_size int: 購読者ごとのキューの上限
+        published int: 配った通知の数
+        dropped int: 切り離した購読者の数
+        closed bool: close() の後は True (以降の購読はすぐに終了する)
+
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self.closed = False
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """subscribe
+
+            購読を開始する関数\n
+            キューから None を受け取った場合は購読が終了している
+
+            Returns:
+                asyncio.Queue: 通知が届くキュー
+        """
+        # 上限は publish で判定する (終了を伝える通知は上限を超えても入れる)
+        queue: asyncio.Queue = asyncio.Queue()
+        if self.closed:
+            queue.put_nowait(None)
+            return queue
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.published += 1
+        for queue in list(self._subscribers):
+            if queue.qsize() >= self.queue_size:
+                self._end(queue, DROPPED_EVENT)
+                self.dropped += 1
+            else:
+                queue.put_nowait(event)
+
+    def close(self) -> None:
+        self.closed = True
+        for queue in list(self._subscribers):
+            self._end(queue, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+    def _end(
+        self,
+        queue: asyncio.Queue,
+        last_event: Optional[Dict[str, Any]]
+    ) -> None:
+        self._subscribers.discard(queue)
+        # 溜まっている通知は捨て、すぐに終了が伝わるようにする
+        while not queue.empty():
+            queue.get_nowait()
+        if last_event is not None:
+            queue.put_nowait(last_event)
+        queue.put_nowait(None)
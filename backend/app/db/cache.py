@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """LRUCache
+
+    件数の上限と有効期限を持つプロセス内キャッシュ\n
+    上限を超えた場合は最も長く参照されていないものから破棄する
+
+    Attributes:
+        maxsize int: 保持する最大件数 (0 以下の場合はキャッシュしない)
+        ttl float: 有効期限 (秒)
+        hits int: キャッシュにヒットした回数
+        misses int: キャッシュにヒットしなかった回数
+        generation int: 無効化のたびに増える世代番号
+
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._clock = clock
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        generation: Optional[int] = None
+    ) -> None:
+        # 読み込み開始後に無効化が起きていれば古い値の可能性があるので保存しない
+        if self.maxsize <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
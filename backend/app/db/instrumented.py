@@ -0,0 +1,109 @@
+import time
+from typing import Any, AsyncIterator, Mapping, Optional
+
+from databases import Database
+
+from app.core.metrics import REGISTRY, Counter, Histogram
+from app.core.profiling import add_timing
+from app.db.slow_query import SlowQueryLog
+
+db_query_duration = REGISTRY.register(Histogram(
+    "favue_db_query_duration_seconds",
+    "Time spent executing database queries.",
+    ("query",)
+))
+db_query_errors = REGISTRY.register(Counter(
+    "favue_db_query_errors_total",
+    "Database queries that raised an exception.",
+    ("query",)
+))
+
+
+class InstrumentedDatabase:
+    """InstrumentedDatabase
+
+    Database を包み、クエリごとの実行時間を計測するクラス\n
+    クエリは query_names でクエリ文字列から引いた名前 (定数名) で区別し、
+    名前が分からないクエリは other にまとめる\n
+    slow_query_log がある場合は遅いクエリをそこに記録する\n
+    それ以外の属性 (transaction 等) は包んだ Database にそのまま渡す
+
+    Attributes:
+        database Database: 包んだ Database
+        query_names Mapping[str, str]: クエリ文字列と名前の対応
+        slow_query_log Optional[SlowQueryLog]: 遅いクエリの記録先
+
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        query_names: Mapping[str, str],
+        slow_query_log: Optional[SlowQueryLog] = None
+    ) -> None:
+        self.database = database
+        self.query_names = query_names
+        self.slow_query_log = slow_query_log
+
+    def query_name(self, query: Any) -> str:
+        return self.query_names.get(query, "other") \
+            if isinstance(query, str) else "other"
+
+    async def _timed(
+        self,
+        method: str,
+        query: Any,
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        name = self.query_name(query)
+        started_at = time.perf_counter()
+        try:
+            return await getattr(self.database, method)(query, *args, **kwargs)
+        except Exception:
+            db_query_errors.inc(name)
+            raise
+        finally:
+            duration = time.perf_counter() - started_at
+            db_query_duration.observe(duration, name)
+            add_timing("db", duration)
+            if self.slow_query_log is not None:
+                values = args[0] if args and isinstance(args[0], dict) else None
+                self.slow_query_log.record(
+                    self.database, name, query, values, duration)
+
+    async def execute(self, query: Any, values: dict = None) -> Any:
+        return await self._timed("execute", query, values)
+
+    async def execute_many(self, query: Any, values: list) -> None:
+        return await self._timed("execute_many", query, values)
+
+    async def fetch_all(self, query: Any, values: dict = None) -> Any:
+        return await self._timed("fetch_all", query, values)
+
+    async def fetch_one(self, query: Any, values: dict = None) -> Any:
+        return await self._timed("fetch_one", query, values)
+
+    async def fetch_val(
+        self, query: Any, values: dict = None, column: Any = 0
+    ) -> Any:
+        return await self._timed("fetch_val", query, values, column)
+
+    async def iterate(
+        self, query: Any, values: dict = None
+    ) -> AsyncIterator[Any]:
+        # カーソルを読み終えるまで (呼び出し側の処理時間も含む) を計測する
+        # 呼び出し側の処理時間を含むので遅いクエリとしては記録しない
+        name = self.query_name(query)
+        started_at = time.perf_counter()
+        try:
+            async for record in self.database.iterate(query, values):
+                yield record
+        except Exception:
+            db_query_errors.inc(name)
+            raise
+        finally:
+            db_query_duration.observe(time.perf_counter() - started_at, name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.database, name)
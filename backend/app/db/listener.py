@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# LISTEN用の接続が切れた場合と、接続し直した場合に通知する擬似イベント
+# 切断中の変更は受け取れないので、受け取った側はキャッシュ等を破棄する
+RESET_EVENT = {"op": "RESET"}
+
+
+class ChangeListener:
+    """ChangeListener
+
+    ワーカーごとに1本だけ持つ LISTEN 専用の接続\n
+    プールとは別に接続し、受け取った通知を登録されたハンドラに配る\n
+    接続が切れた場合 (起動時に接続できなかった場合も) は間隔を倍にしながら接続し直し、
+    全てのチャンネルを LISTEN し直してから RESET を配る\n
+    接続中も health_check_interval ごとに応答を確認し、応答しない接続は切断として扱う
+
+    Attributes:
+        dsn str: 接続先のDSN
+        channels Tuple[str, ...]: LISTEN するチャンネル名
+        retry_interval float: 接続し直すまでの最初の待ち秒数
+        max_retry_interval float: 接続し直すまでの待ち秒数の上限
+        health_check_interval float: 接続中に応答を確認する間隔 (秒)
+        reconnects int: 接続し直した回数
+
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *channels: str,
+        retry_interval: float = 0.5,
+        max_retry_interval: float = 30.0,
+        health_check_interval: float = 10.0
+    ) -> None:
+        self.dsn = dsn
+        self.channels: Tuple[str, ...] = channels
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.health_check_interval = health_check_interval
+        self.reconnects = 0
+        self._connection: Optional[asyncpg.Connection] = None
+        self._lost = asyncio.Event()
+        self._supervisor: Optional[asyncio.Future] = None
+        self._handlers: List[Callable[[Dict[str, Any]], None]] = []
+
+    @property
+    def is_listening(self) -> bool:
+        return self._connection is not None and \
+            not self._connection.is_closed()
+
+    def add_handler(self, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._handlers.append(handler)
+
+    def remove_handler(
+        self,
+        handler: Callable[[Dict[str, Any]], None]
+    ) -> None:
+        self._handlers.remove(handler)
+
+    async def start(self) -> None:
+        """start
+
+            LISTEN を開始する関数\n
+            最初の接続に失敗した場合は例外を送出するが、接続し直しは続ける
+        """
+        try:
+            await self._connect()
+        finally:
+            self._supervisor = asyncio.ensure_future(self._supervise())
+
+    async def stop(self) -> None:
+        supervisor, self._supervisor = self._supervisor, None
+        if supervisor is not None:
+            supervisor.cancel()
+            await asyncio.wait({supervisor})
+
+        connection, self._connection = self._connection, None
+        if connection is None or connection.is_closed():
+            return
+        for channel in self.channels:
+            await connection.remove_listener(channel, self._on_notify)
+        await connection.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "listening": int(self.is_listening),
+            "reconnects": self.reconnects,
+        }
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            for channel in self.channels:
+                await connection.add_listener(channel, self._on_notify)
+        except BaseException:
+            connection.terminate()
+            raise
+        self._lost.clear()
+        self._connection = connection
+        connection.add_termination_listener(self._on_terminate)
+
+    async def _supervise(self) -> None:
+        interval = self.retry_interval
+        while True:
+            if self.is_listening:
+                await self._wait_until_lost()
+                interval = self.retry_interval
+            await asyncio.sleep(interval)
+            try:
+                await self._connect()
+            except Exception as e:
+                logger.warning("LISTEN reconnect failed: %s", e)
+                interval = min(interval * 2, self.max_retry_interval)
+                continue
+            self.reconnects += 1
+            logger.warning("--- LISTEN CONNECTION RESTORED ---")
+            # 切断中の変更は受け取れていないので、もう一度破棄させる
+            self._dispatch(RESET_EVENT)
+
+    async def _wait_until_lost(self) -> None:
+        # 通知を待つだけの接続は、相手が黙って消えても切断に気付けないため確認する
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._lost.wait(), self.health_check_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            connection = self._connection
+            if connection is None:
+                return
+            try:
+                await asyncio.wait_for(
+                    self._ping(connection), self.health_check_interval)
+            except Exception as e:
+                logger.warning("LISTEN health check failed: %s", e)
+                # 切断を通知するため _on_terminate が呼ばれる
+                connection.terminate()
+                return
+
+    async def _ping(self, connection: asyncpg.Connection) -> None:
+        await connection.fetchval("SELECT 1")
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        for handler in list(self._handlers):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("change handler failed: %r", event)
+
+    def _on_notify(
+        self,
+        connection: asyncpg.Connection,
+        pid: int,
+        channel: str,
+        payload: str
+    ) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("invalid notification payload: %r", payload)
+            return
+        self._dispatch(event)
+
+    def _on_terminate(self, connection: asyncpg.Connection) -> None:
+        if self._connection is not connection:
+            return
+        logger.warning("--- LISTEN CONNECTION LOST ---")
+        self._connection = None
+        self._lost.set()
+        self._dispatch(RESET_EVENT)
@@ -0,0 +1,109 @@
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    TypeVar
+)
+
+from app.core.deadline import later_deadline, request_deadline
+from app.core.profiling import detached_context
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Batch(Generic[K, V]):
+    # 1回の一括取得で取得するキーと、その結果を待っている要求元の数
+    def __init__(self, deadline: Optional[float]) -> None:
+        self.futures: Dict[K, asyncio.Future] = {}
+        self.deadline = deadline
+        self.waiters = 0
+        self.task: Optional[asyncio.Future] = None
+
+
+class DataLoader(Generic[K, V]):
+    """DataLoader
+
+    同じイベントループの1周の間に要求されたキーをまとめて1回で取得するクラス\n
+    同じキーの要求は1つの取得結果を共有する\n
+    結果を待つ要求元が全てキャンセルされた場合は一括取得 (実行中のクエリも) を取り消し、
+    一括取得は待っている要求元のうち最も遅いリクエストの期限まで実行する
+
+    Attributes:
+        batch_load Callable[[List[K]], Awaitable[Dict[K, V]]]:
+            キーの一覧を受け取り、見つかったキーと値の辞書を返す関数
+        batches int: 実行した一括取得の回数
+        loads int: 受け付けた取得要求の回数
+
+    """
+
+    def __init__(
+        self,
+        batch_load: Callable[[List[K]], Awaitable[Dict[K, V]]]
+    ) -> None:
+        self.batch_load = batch_load
+        self.batches = 0
+        self.loads = 0
+        self._batch: Optional[_Batch] = None
+
+    async def load(self, key: K) -> Optional[V]:
+        self.loads += 1
+        deadline = request_deadline.get()
+        batch = self._batch
+        if batch is None:
+            batch = self._batch = _Batch(deadline)
+            asyncio.get_event_loop().call_soon(self._dispatch)
+        else:
+            batch.deadline = later_deadline(batch.deadline, deadline)
+        future = batch.futures.get(key)
+        if future is None:
+            future = asyncio.get_event_loop().create_future()
+            batch.futures[key] = future
+
+        batch.waiters += 1
+        try:
+            # 要求元がキャンセルされても同じキーを待つ他の要求には影響させない
+            return await asyncio.shield(future)
+        finally:
+            batch.waiters -= 1
+            if batch.waiters == 0 and batch.task is not None and \
+                    not batch.task.done():
+                # 最後の要求元がキャンセルされたので結果を待つ者はいない
+                batch.task.cancel()
+
+    def _dispatch(self) -> None:
+        batch, self._batch = self._batch, None
+        if batch.waiters == 0:
+            # 一括取得を始める前に全ての要求元がキャンセルされた
+            for future in batch.futures.values():
+                future.cancel()
+            return
+        self.batches += 1
+        # 一括取得は要求元のリクエストとは独立したタスクで行うので
+        # 要求元の接続やトランザクションは引き継がず、期限だけを引き継ぐ
+        context = detached_context()
+        context.run(request_deadline.set, batch.deadline)
+        batch.task = context.run(
+            asyncio.ensure_future, self._run(batch.futures))
+
+    async def _run(self, pending: Dict[K, asyncio.Future]) -> None:
+        try:
+            values = await self.batch_load(list(pending))
+        except asyncio.CancelledError:
+            for future in pending.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(values.get(key))
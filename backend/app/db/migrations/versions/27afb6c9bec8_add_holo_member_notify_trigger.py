@@ -0,0 +1,61 @@
+"""add_holo_member_notify_trigger
+
+Revision ID: 27afb6c9bec8
+Revises: 9527b55844ae
+Create Date: 2026-10-18 10:12:41.503218
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '27afb6c9bec8'
+down_revision = '9527b55844ae'
+branch_labels = None
+depends_on = None
+
+
+# holo_memberの変更を holo_member_changes チャンネルに通知するトリガー
+# ペイロードは {"op": "INSERT" | "UPDATE" | "DELETE", "id": <id>}
+def create_notify_trigger() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_holo_member_change()
+            RETURNS TRIGGER AS
+        $$
+        DECLARE
+            changed_id integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed_id = OLD.id;
+            ELSE
+                changed_id = NEW.id;
+            END IF;
+            PERFORM pg_notify(
+                'holo_member_changes',
+                json_build_object('op', TG_OP, 'id', changed_id)::text
+            );
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER notify_holo_member_change
+            AFTER INSERT OR UPDATE OR DELETE
+            ON holo_member
+            FOR EACH ROW
+        EXECUTE PROCEDURE notify_holo_member_change();
+        """
+    )
+
+
+def upgrade() -> None:
+    create_notify_trigger()
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER notify_holo_member_change ON holo_member")
+    op.execute("DROP FUNCTION notify_holo_member_change")
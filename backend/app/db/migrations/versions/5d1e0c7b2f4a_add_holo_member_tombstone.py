@@ -0,0 +1,78 @@
+"""add_holo_member_tombstone
+
+Revision ID: 5d1e0c7b2f4a
+Revises: aba6733fbaa9
+Create Date: 2026-10-18 12:24:05.611873
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = '5d1e0c7b2f4a'
+down_revision = 'aba6733fbaa9'
+branch_labels = None
+depends_on = None
+
+
+# 削除されたholo_memberのidを残すテーブル (差分同期で削除を伝えるため)
+def create_tombstone_table() -> None:
+    op.create_table(
+        "holo_member_tombstone",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column(
+            "deleted_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_holo_member_tombstone_deleted_at_id",
+        "holo_member_tombstone",
+        ["deleted_at", "id"]
+    )
+
+# holo_memberの削除時に holo_member_tombstone へ記録するトリガー
+
+
+def create_tombstone_trigger() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_holo_member_tombstone()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            INSERT INTO holo_member_tombstone (id, deleted_at)
+            VALUES (OLD.id, now())
+            ON CONFLICT (id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER record_holo_member_tombstone
+            AFTER DELETE
+            ON holo_member
+            FOR EACH ROW
+        EXECUTE PROCEDURE record_holo_member_tombstone();
+        """
+    )
+
+
+def upgrade() -> None:
+    create_tombstone_table()
+    create_tombstone_trigger()
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER record_holo_member_tombstone ON holo_member")
+    op.execute("DROP FUNCTION record_holo_member_tombstone")
+    op.drop_index(
+        "ix_holo_member_tombstone_deleted_at_id",
+        table_name="holo_member_tombstone")
+    op.drop_table("holo_member_tombstone")
@@ -0,0 +1,43 @@
+"""add_holo_member_list_indexes
+
+Revision ID: aba6733fbaa9
+Revises: 27afb6c9bec8
+Create Date: 2026-10-18 11:03:27.918342
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = 'aba6733fbaa9'
+down_revision = '27afb6c9bec8'
+branch_labels = None
+depends_on = None
+
+
+# 一覧取得の絞り込み・並び替え用のインデックス
+# (type, id) は type のみでの絞り込みにも使われるので type 単体のインデックスは作らない
+# name の並び替えには既存の ix_holo_member_name を使い、
+# 前方一致 (LIKE 'xxx%') は照合順序に依存しない text_pattern_ops のインデックスを使う
+def create_list_indexes() -> None:
+    op.create_index(
+        "ix_holo_member_type_id", "holo_member", ["type", "id"])
+    op.create_index(
+        "ix_holo_member_updated_at_id", "holo_member", ["updated_at", "id"])
+    op.execute(
+        """
+        CREATE INDEX ix_holo_member_name_pattern
+            ON holo_member (name text_pattern_ops);
+        """
+    )
+
+
+def upgrade() -> None:
+    create_list_indexes()
+
+
+def downgrade() -> None:
+    op.drop_index("ix_holo_member_name_pattern", table_name="holo_member")
+    op.drop_index("ix_holo_member_updated_at_id", table_name="holo_member")
+    op.drop_index("ix_holo_member_type_id", table_name="holo_member")
@@ -0,0 +1,74 @@
+"""add_table_version
+
+Revision ID: c3f8a1d2e9b7
+Revises: 5d1e0c7b2f4a
+Create Date: 2026-10-18 14:02:47.215390
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = 'c3f8a1d2e9b7'
+down_revision = '5d1e0c7b2f4a'
+branch_labels = None
+depends_on = None
+
+
+# テーブルごとの変更のバージョン (変更する文が実行されるたびに1増える)
+# 一覧のレスポンスのキャッシュや ETag のキーに使う
+def create_table_version_table() -> None:
+    op.create_table(
+        "table_version",
+        sa.Column("table_name", sa.Text, primary_key=True),
+        sa.Column(
+            "version",
+            sa.BigInteger,
+            nullable=False,
+            server_default="0"
+        ),
+    )
+    op.execute(
+        "INSERT INTO table_version (table_name) VALUES ('holo_member')")
+
+# holo_memberを変更する文ごとにバージョンを上げるトリガー
+# 行ごとではなく文ごとに1回なので一括作成でも1回しか上がらない
+
+
+def create_bump_version_trigger() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            UPDATE table_version
+            SET version = version + 1
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER bump_holo_member_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE
+            ON holo_member
+            FOR EACH STATEMENT
+        EXECUTE PROCEDURE bump_table_version();
+        """
+    )
+
+
+def upgrade() -> None:
+    create_table_version_table()
+    create_bump_version_trigger()
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER bump_holo_member_version ON holo_member")
+    op.execute("DROP FUNCTION bump_table_version")
+    op.drop_table("table_version")
@@ -0,0 +1,54 @@
+"""add_holo_member_truncate_notify
+
+Revision ID: e4a7b9c1d3f6
+Revises: c3f8a1d2e9b7
+Create Date: 2026-10-18 16:41:09.382114
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = 'e4a7b9c1d3f6'
+down_revision = 'c3f8a1d2e9b7'
+branch_labels = None
+depends_on = None
+
+
+# TRUNCATE は行ごとのトリガーが動かないので、文ごとに1回通知するトリガー
+# ペイロードは {"op": "TRUNCATE"}
+def create_truncate_notify_trigger() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_holo_member_truncate()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            PERFORM pg_notify(
+                'holo_member_changes',
+                json_build_object('op', TG_OP)::text
+            );
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER notify_holo_member_truncate
+            AFTER TRUNCATE
+            ON holo_member
+            FOR EACH STATEMENT
+        EXECUTE PROCEDURE notify_holo_member_truncate();
+        """
+    )
+
+
+def upgrade() -> None:
+    create_truncate_notify_trigger()
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER notify_holo_member_truncate ON holo_member")
+    op.execute("DROP FUNCTION notify_holo_member_truncate")
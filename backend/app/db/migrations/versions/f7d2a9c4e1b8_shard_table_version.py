@@ -0,0 +1,143 @@
+"""shard_table_version
+
+Revision ID: f7d2a9c4e1b8
+Revises: e4a7b9c1d3f6
+Create Date: 2026-10-18 19:12:33.604817
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic
+revision = 'f7d2a9c4e1b8'
+down_revision = 'e4a7b9c1d3f6'
+branch_labels = None
+depends_on = None
+
+# バージョンを分けて持つ行の数
+# 1行だと全ての書き込みがその行のロックを待つので、接続ごとに別の行を上げる
+TABLE_VERSION_SLOTS = 16
+
+
+# テーブルのバージョンは slot ごとの version の合計にする
+# (合計は変更した文がコミットされた時に初めて増える)
+def shard_table_version_table() -> None:
+    op.add_column(
+        "table_version",
+        sa.Column("slot", sa.SmallInteger, nullable=False, server_default="0")
+    )
+    op.drop_constraint("table_version_pkey", "table_version")
+    op.create_primary_key(
+        "table_version_pkey", "table_version", ["table_name", "slot"])
+    op.execute(
+        f"""
+        INSERT INTO table_version (table_name, slot)
+        SELECT table_name, slot
+        FROM (SELECT DISTINCT table_name FROM table_version) AS t,
+             generate_series(1, {TABLE_VERSION_SLOTS - 1}) AS slot
+        """
+    )
+
+# 行を変更しなかった文ではバージョンを上げない (TRUNCATE は常に上げる)
+# 遷移テーブルは1つのトリガーに1つのイベントしか指定できないのでイベントごとに作る
+
+
+def create_bump_version_triggers() -> None:
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION bump_table_version()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            IF TG_OP <> 'TRUNCATE' THEN
+                IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            UPDATE table_version
+            SET version = version + 1
+            WHERE table_name = TG_TABLE_NAME
+              AND slot = pg_backend_pid() % {TABLE_VERSION_SLOTS};
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute("DROP TRIGGER bump_holo_member_version ON holo_member")
+    for event, transition in (
+        ("INSERT", "NEW"),
+        ("UPDATE", "NEW"),
+        ("DELETE", "OLD"),
+    ):
+        op.execute(
+            f"""
+            CREATE TRIGGER bump_holo_member_version_{event.lower()}
+                AFTER {event}
+                ON holo_member
+                REFERENCING {transition} TABLE AS changed_rows
+                FOR EACH STATEMENT
+            EXECUTE PROCEDURE bump_table_version();
+            """
+        )
+    op.execute(
+        """
+        CREATE TRIGGER bump_holo_member_version_truncate
+            AFTER TRUNCATE
+            ON holo_member
+            FOR EACH STATEMENT
+        EXECUTE PROCEDURE bump_table_version();
+        """
+    )
+
+
+def upgrade() -> None:
+    shard_table_version_table()
+    create_bump_version_triggers()
+
+
+def downgrade() -> None:
+    for event in ("insert", "update", "delete", "truncate"):
+        op.execute(
+            f"DROP TRIGGER bump_holo_member_version_{event} ON holo_member")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version()
+            RETURNS TRIGGER AS
+        $$
+        BEGIN
+            UPDATE table_version
+            SET version = version + 1
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql';
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER bump_holo_member_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE
+            ON holo_member
+            FOR EACH STATEMENT
+        EXECUTE PROCEDURE bump_table_version();
+        """
+    )
+    # 合計を slot 0 に集めてから他の slot を消す
+    op.execute(
+        """
+        UPDATE table_version AS v
+        SET version = t.version
+        FROM (
+            SELECT table_name, sum(version) AS version
+            FROM table_version
+            GROUP BY table_name
+        ) AS t
+        WHERE v.table_name = t.table_name AND v.slot = 0
+        """
+    )
+    op.execute("DELETE FROM table_version WHERE slot <> 0")
+    op.drop_constraint("table_version_pkey", "table_version")
+    op.create_primary_key("table_version_pkey", "table_version", ["table_name"])
+    op.drop_column("table_version", "slot")
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from databases import Database
+
+from app.core.deadline import remaining
+
+
+class PoolTimeoutError(Exception):
+    """PoolTimeoutError
+
+    プールからの接続の取得が acquire_timeout 内に終わらなかった場合の例外
+
+    """
+    pass
+
+
+class InstrumentedPool:
+    """InstrumentedPool
+
+    asyncpg のプールを包み、接続の取得待ちを計測するクラス\n
+    databases のバックエンドが使用するプールを差し替えて使う
+    (databases 0.4.1 の内部の _pool に依存するので requirements.txt で固定している)
+
+    Attributes:
+        acquire_timeout Optional[float]:
+            接続の取得を待つ最大秒数 (リクエストの期限の方が早ければ期限まで)
+        in_use int: 使用中の接続数
+        waiters int: 接続の取得を待っている数
+        acquired int: 接続を取得した回数
+        timeouts int: 接続の取得がタイムアウトした回数
+        wait_seconds_total float: 接続の取得を待った合計秒数
+        wait_seconds_max float: 接続の取得を待った最大秒数
+
+    """
+
+    def __init__(self, pool: Any, acquire_timeout: Optional[float]) -> None:
+        self._pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.in_use = 0
+        self.waiters = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def acquire(self) -> Any:
+        self.waiters += 1
+        started_at = time.perf_counter()
+        try:
+            # リクエストの期限の方が早ければ期限までしか待たない
+            connection = await self._pool.acquire(
+                timeout=remaining(self.acquire_timeout))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolTimeoutError(
+                f"could not acquire a connection in {self.acquire_timeout}s")
+        finally:
+            self.waiters -= 1
+            waited = time.perf_counter() - started_at
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        self.in_use += 1
+        self.acquired += 1
+        return connection
+
+    async def release(self, connection: Any) -> None:
+        self.in_use -= 1
+        await self._pool.release(connection)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    def stats(self) -> Dict[str, float]:
+        size = self._pool.get_size()
+        return {
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "size": size,
+            "in_use": self.in_use,
+            "idle": size - self.in_use,
+            "waiters": self.waiters,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+def instrument_pool(
+    database: Database,
+    acquire_timeout: Optional[float]
+) -> InstrumentedPool:
+    """instrument_pool
+
+        接続済みの Database のプールを InstrumentedPool に差し替える関数\n
+        databases の内部が変わっていて差し替えられない場合は、計測されないまま
+        動き続けないよう起動時に RuntimeError を送出する
+
+        Args:
+            database (Database): connect() 済みの Database
+            acquire_timeout (Optional[float]): 接続の取得を待つ最大秒数
+
+        Returns:
+            InstrumentedPool: 差し替えたプール
+    """
+    backend = database._backend
+    pool = getattr(backend, "_pool", None)
+    if not all(hasattr(pool, name) for name in ("acquire", "release")):
+        raise RuntimeError(
+            f"{type(backend).__name__} has no connection pool to instrument; "
+            "app.db.pool requires databases==0.4.1")
+    if not isinstance(backend._pool, InstrumentedPool):
+        backend._pool = InstrumentedPool(backend._pool, acquire_timeout)
+    return backend._pool
+
+
+def get_pool_stats(database: Database) -> Dict[str, float]:
+    """get_pool_stats
+
+        Database のプールの統計を返す関数
+
+        Args:
+            database (Database): 対象の Database
+
+        Returns:
+            Dict[str, float]: プールの統計 (計測していない場合は空)
+    """
+    pool = getattr(database._backend, "_pool", None)
+    if not isinstance(pool, InstrumentedPool):
+        return {}
+    return pool.stats()
@@ -0,0 +1,53 @@
+import itertools
+from typing import Callable, List, Optional
+
+from databases import Database
+
+from app.db.pool import get_pool_stats
+
+
+def pool_load(database: Database) -> float:
+    """pool_load
+
+        使用中の接続数と取得待ちの数の合計を負荷として返す関数
+
+        Args:
+            database (Database): 対象の Database
+
+        Returns:
+            float: 負荷 (大きいほど混んでいる)
+    """
+    stats = get_pool_stats(database)
+    return stats.get("in_use", 0) + stats.get("waiters", 0)
+
+
+class ReplicaSet:
+    """ReplicaSet
+
+    読み込み専用のレプリカを選択するクラス
+
+    Attributes:
+        replicas List[Database]: 接続済みのレプリカ
+        strategy str: round_robin (順番) または least_busy (最も空いているもの)
+
+    """
+
+    def __init__(
+        self,
+        replicas: List[Database],
+        strategy: str = "round_robin",
+        load: Callable[[Database], float] = pool_load
+    ) -> None:
+        if strategy not in ("round_robin", "least_busy"):
+            raise ValueError(f"unknown replica selection strategy: {strategy}")
+        self.replicas = replicas
+        self.strategy = strategy
+        self._load = load
+        self._counter = itertools.count()
+
+    def choose(self) -> Optional[Database]:
+        if not self.replicas:
+            return None
+        if self.strategy == "least_busy":
+            return min(self.replicas, key=self._load)
+        return self.replicas[next(self._counter) % len(self.replicas)]
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from databases import Database
 
 
@@ -6,7 +8,21 @@ class BaseRepository:
 
     データベースコネクションへの参照を保持するだけのクラス
 
+    Attributes:
+        db Database: 書き込みに使用するプライマリ
+        read_db Database: 読み込みに使用するdb (指定がなければプライマリ)
+        read_primary bool:
+            呼び出し元が読み込みもプライマリで行うよう求めた場合は True
+            (自分の書き込みを読む場合で、キャッシュも使わない)
+
     """
 
-    def __init__(self, db: Database) -> None:
+    def __init__(
+        self,
+        db: Database,
+        read_db: Optional[Database] = None,
+        read_primary: bool = False
+    ) -> None:
         self.db = db
+        self.read_db = db if read_primary or read_db is None else read_db
+        self.read_primary = read_primary
@@ -1,75 +1,513 @@
-from typing import List
+import functools
+import weakref
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple
+)
+from app.core import config
+from app.db.batcher import WriteBatcher
+from app.db.cache import LRUCache
+from app.db.listener import RESET_EVENT
+from app.db.loader import DataLoader
 from app.db.repositories.base import BaseRepository
+from app.db.singleflight import SingleFlight, freeze
+from app.db.version import TableVersion
 from app.models.holo_member import (
+    GenerationType,
+    HoloMemberChange,
     HoloMemberCreate,
     HoloMemberInDB,
+    HoloMemberOrder,
+    HoloMemberTombstone,
     HoloMemberUpdate
 )
+from databases import Database
+from asyncpg.exceptions import DataError, IntegrityConstraintViolationError
 from fastapi import HTTPException
 from starlette.status import HTTP_400_BAD_REQUEST
 import app.db.repositories.queries.holo_member as query
 
+# id をキーにした HoloMemberInDB のキャッシュ
+# ワーカー内の更新・削除と、他のワーカーからの変更通知で無効化する
+# レプリカの行は書き込みより古い可能性があるのでプライマリから読んだ行だけを入れる
+# 変更通知を受け取れていない (LISTEN 用の接続が切れている) 間は使わない
+holo_member_cache = LRUCache(
+    maxsize=config.HOLO_MEMBER_CACHE_SIZE,
+    ttl=config.HOLO_MEMBER_CACHE_TTL
+)
+
+# holo_member の変更のバージョン
+# ワーカー内の作成・更新・削除と、他のワーカーからの変更通知で無効化する
+holo_member_version = TableVersion("get_holo_member_version")
+
+# 同じイベントループの1周の間の id による取得をまとめる DataLoader (接続先ごと)
+holo_member_loaders: "weakref.WeakKeyDictionary[Database, DataLoader]" = \
+    weakref.WeakKeyDictionary()
+
+
+# 同時に受け付けた作成をまとめて1回の INSERT にする WriteBatcher (接続先ごと)
+holo_member_batchers: "weakref.WeakKeyDictionary[Database, WriteBatcher]" = \
+    weakref.WeakKeyDictionary()
+
+# 読み込みのメソッドごとの SingleFlight (メソッド名 → SingleFlight)
+holo_member_flights: Dict[str, SingleFlight] = {}
+
+
+def coalesce(method: Callable) -> Callable:
+    """coalesce
+
+        同じ引数で同時に実行中の読み込みがあれば、その結果を共有するデコレータ\n
+        プライマリからの読み込みはプライマリからの読み込みとだけ共有し
+        (キャッシュを使わない read_primary の読み込みはそれ同士でだけ共有する)、
+        書き込みや変更通知でバージョンが無効化された後は、それより前に始まった
+        読み込みを共有しない
+
+        Args:
+            method (Callable): キーワード引数だけを取るリポジトリの読み込みのメソッド
+
+        Returns:
+            Callable: 結果を共有するメソッド
+    """
+    flights = holo_member_flights.setdefault(
+        method.__name__, SingleFlight(method.__name__))
+
+    @functools.wraps(method)
+    async def wrapper(self: "HoloMemberRepository", **kwargs: Any) -> Any:
+        if not config.SINGLE_FLIGHT_ENABLED:
+            return await method(self, **kwargs)
+        key = (
+            self.read_primary,
+            self.read_db is self.db,
+            holo_member_version.generation,
+            freeze(kwargs)
+        )
+        return await flights.do(key, lambda: method(self, **kwargs))
+    return wrapper
+
+
+def to_holo_member(record: Mapping[str, Any]) -> HoloMemberInDB:
+    """to_holo_member
+
+        DBから取得した行を HoloMemberInDB にする関数\n
+        FAST_SERIALIZATION が有効な場合は検証を省略する
+
+        Args:
+            record (Mapping[str, Any]): DBから取得した行
+
+        Returns:
+            HoloMemberInDB: 作成したモデル
+    """
+    if config.FAST_SERIALIZATION:
+        holo_member = HoloMemberInDB.from_record(record)
+    else:
+        holo_member = HoloMemberInDB(**record)
+    holo_member._updated_at = record.get("updated_at")
+    return holo_member
+
+
+def to_sparse_holo_member(
+    record: Mapping[str, Any], fields: Tuple[str, ...]
+) -> HoloMemberInDB:
+    """to_sparse_holo_member
+
+        DBから取得した行の指定された列だけを持つ HoloMemberInDB にする関数\n
+        必須の列が欠けるため常に検証を省略する
+
+        Args:
+            record (Mapping[str, Any]): DBから取得した行
+            fields (Tuple[str, ...]): 残す列
+
+        Returns:
+            HoloMemberInDB: 指定された列だけを持つモデル
+    """
+    holo_member = HoloMemberInDB.from_record(
+        {field: record[field] for field in fields})
+    holo_member._updated_at = record.get("updated_at")
+    return holo_member
+
+
+def escape_like(value: str) -> str:
+    """escape_like
+
+        LIKE のパターンで特別な意味を持つ文字をエスケープする関数
+
+        Args:
+            value (str): エスケープする文字列
+
+        Returns:
+            str: エスケープした文字列
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace(
+        "_", "\\_")
+
+
+def handle_holo_member_change(event: Dict[str, Any]) -> None:
+    """handle_holo_member_change
+
+        holo_member の変更通知を受け取りキャッシュとバージョンを無効化する関数
+
+        Args:
+            event (Dict[str, Any]): 変更通知のペイロード
+    """
+    holo_member_version.handle_change(event)
+    if event == RESET_EVENT or event.get("op") == "TRUNCATE":
+        holo_member_cache.clear()
+    elif event.get("op") in ("UPDATE", "DELETE"):
+        holo_member_cache.invalidate(event.get("id"))
+
 
 class HoloMemberRepository(BaseRepository):
     """HoloMemberRepository
 
     HoloMemberのRepository\n
-    基本的な操作を司るクラス
+    基本的な操作を司るクラス\n
+    取得系は read_db (レプリカ)、作成・更新・削除は db (プライマリ) を使用する\n
+    取得系は同じ引数で同時に実行中の読み込みがあればその結果を共有する\n
+    id のキャッシュにはプライマリから読んだ行だけを入れ、
+    read_primary の場合はキャッシュを参照しない (自分の書き込みを読むため)
 
     Attributes:
         create_holo_member HoloMemberInDB: ライバーの新規作成
-        get_holo_member_by_id HoloMemberInDB: ライバーをIDを元に取得
+        create_holo_members List[HoloMemberInDB]: ライバーの一括作成
+        get_holo_member_by_id HoloMemberInDB: ライバーをIDを元に取得 (キャッシュあり)
+            fields を指定した場合はその列だけを取得する
+        get_holo_member_by_ids Dict[int, HoloMemberInDB]:
+            複数のライバーをIDを元に1回のクエリで取得 (キャッシュあり)
         get_all_holo_member List[HoloMemberInDB]: 登録されているライバーを全取得
+        get_holo_member_page Tuple[List[HoloMemberInDB], Optional[List[Any]]]:
+            ライバーを絞り込み・並び替えてページ単位に取得
+            fields を指定した場合はその列 (と並び替えのキー) だけを取得する
+        get_holo_member_changes
+            Tuple[List[HoloMemberChange], List[HoloMemberTombstone], bool]:
+            指定された位置より後に作成・更新・削除されたライバーを取得
+        get_holo_member_version int:
+            holo_member の変更のバージョンを取得 (無効化されるまでプロセス内に保持)
+        read_db_is_at_version bool:
+            read_db (レプリカ) が指定したバージョンの変更まで反映しているかを確認
+        iterate_all_holo_member AsyncIterator[HoloMemberInDB]:
+            サーバーサイドカーソルでライバーを1件ずつ取得
         update_holo_member HoloMemberInDB: ライバーをIDを元に更新
         delete_holo_member_by_id int: ライバーをIDを元に削除
     """
 
     # 作成
+    # HOLO_MEMBER_WRITE_BATCH_ENABLED の場合は同時に受け付けた他の作成と
+    # まとめて1回の複数行の INSERT にする (トランザクションの外で書き込む)
     async def create_holo_member(
         self,
         *,
         new_holo_member: HoloMemberCreate
     ) -> HoloMemberInDB:
-        query_values = new_holo_member.dict()
+        if config.HOLO_MEMBER_WRITE_BATCH_ENABLED:
+            batcher = holo_member_batchers.get(self.db)
+            if batcher is None:
+                batcher = WriteBatcher(
+                    self._insert_holo_members,
+                    self._insert_holo_member,
+                    max_size=config.HOLO_MEMBER_WRITE_BATCH_SIZE,
+                    max_delay=config.HOLO_MEMBER_WRITE_BATCH_DELAY
+                )
+                holo_member_batchers[self.db] = batcher
+            holo_member = await batcher.submit(new_holo_member)
+        else:
+            holo_member = await self._insert_holo_member(new_holo_member)
+        holo_member_version.invalidate()
+
+        return holo_member
+
+    async def _insert_holo_member(
+        self, new_holo_member: HoloMemberCreate
+    ) -> HoloMemberInDB:
         holo_member = await self.db.fetch_one(
             query=query.CREATE_HOLO_MEMBER_QUERY,
-            values=query_values
+            values=new_holo_member.dict()
         )
+        return to_holo_member(holo_member)
 
-        return HoloMemberInDB(**holo_member)
+    # 複数行の INSERT を1回発行し、渡した順に返す
+    async def _insert_holo_members(
+        self, new_holo_members: List[HoloMemberCreate]
+    ) -> List[HoloMemberInDB]:
+        holo_member_records = await self.db.fetch_all(
+            query=query.BULK_CREATE_HOLO_MEMBER_QUERY,
+            values={
+                "types": [item.type for item in new_holo_members],
+                "names": [item.name for item in new_holo_members],
+                "descriptions": [
+                    item.description for item in new_holo_members],
+                "twitters": [item.twitter for item in new_holo_members],
+                "ages": [item.age for item in new_holo_members],
+            }
+        )
+        # id は挿入順に採番されるので id 順に並べれば渡した順になる
+        return [
+            to_holo_member(item) for item in sorted(
+                holo_member_records, key=lambda r: r["id"])
+        ]
+
+    # 一括作成
+    # batch_size 件ずつ複数行の INSERT を発行し、全体を1つのトランザクションで扱う
+    async def create_holo_members(
+        self,
+        *,
+        new_holo_members: List[HoloMemberCreate],
+        batch_size: int = config.HOLO_MEMBER_BULK_BATCH_SIZE
+    ) -> List[HoloMemberInDB]:
+        created_holo_members = []
+        try:
+            async with self.db.transaction():
+                for start in range(0, len(new_holo_members), batch_size):
+                    created_holo_members.extend(
+                        await self._insert_holo_members(
+                            new_holo_members[start:start + batch_size]))
+        except (DataError, IntegrityConstraintViolationError):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail='Invalid holo_member in bulk request.')
+        holo_member_version.invalidate()
+
+        return created_holo_members
 
     # id を元に取得
-    async def get_holo_member_by_id(self, *, id: int) -> HoloMemberInDB:
-        holo_member = await self.db.fetch_one(
-            query=query.GET_HOLO_MEMBER_BY_ID_QUERY,
-            values={"id": id}
-        )
+    # キャッシュになければ同時に要求された他の id とまとめて取得する
+    # fields を指定した場合、キャッシュになければその列だけを取得する
+    # (全列が揃わないのでキャッシュには入れない)
+    async def get_holo_member_by_id(
+        self, *, id: int, fields: Optional[Tuple[str, ...]] = None
+    ) -> HoloMemberInDB:
+        cached_holo_member = self._get_cached_holo_member(id)
+        if cached_holo_member is not None:
+            if fields is not None:
+                return to_sparse_holo_member({
+                    **cached_holo_member.__dict__,
+                    "updated_at": cached_holo_member._updated_at
+                }, fields)
+            return cached_holo_member
+
+        return await self._load_holo_member_by_id(id=id, fields=fields)
+
+    @coalesce
+    async def _load_holo_member_by_id(
+        self, *, id: int, fields: Optional[Tuple[str, ...]]
+    ) -> HoloMemberInDB:
+        if fields is not None:
+            holo_member = await self.read_db.fetch_one(
+                query=query.build_get_holo_member_by_id_query(fields),
+                values={"id": id}
+            )
+            if not holo_member:
+                return None
+            return to_sparse_holo_member(holo_member, fields)
 
-        if not holo_member:
+        loader = holo_member_loaders.get(self.read_db)
+        if loader is None:
+            loader = DataLoader(self._fetch_holo_member_by_ids)
+            holo_member_loaders[self.read_db] = loader
+        return await loader.load(id)
+
+    # 複数の id を元に取得
+    # 見つからなかった id は返却する辞書に含まれない
+    @coalesce
+    async def get_holo_member_by_ids(
+        self, *, ids: List[int]
+    ) -> Dict[int, HoloMemberInDB]:
+        holo_members = {}
+        missing_ids = []
+        for id in dict.fromkeys(ids):
+            cached_holo_member = self._get_cached_holo_member(id)
+            if cached_holo_member is not None:
+                holo_members[id] = cached_holo_member
+            else:
+                missing_ids.append(id)
+
+        if missing_ids:
+            holo_members.update(
+                await self._fetch_holo_member_by_ids(missing_ids))
+        return holo_members
+
+    def _get_cached_holo_member(self, id: int) -> Optional[HoloMemberInDB]:
+        # 変更通知が届かない間は他のワーカーの更新で古くなった行を返してしまう
+        if self.read_primary or not holo_member_version.listening:
             return None
+        return holo_member_cache.get(id)
 
-        return HoloMemberInDB(**holo_member)
+    # レプリカから読んだ行は書き込みより古い可能性があるのでキャッシュに入れない
+    async def _fetch_holo_member_by_ids(
+        self, ids: List[int]
+    ) -> Dict[int, HoloMemberInDB]:
+        generation = holo_member_cache.generation
+        holo_member_records = await self.read_db.fetch_all(
+            query=query.GET_HOLO_MEMBER_BY_IDS_QUERY,
+            values={"ids": ids}
+        )
+
+        holo_members = {}
+        for item in holo_member_records:
+            holo_member = to_holo_member(item)
+            holo_members[holo_member.id] = holo_member
+            if self.read_db is self.db and holo_member_version.listening:
+                holo_member_cache.set(
+                    holo_member.id, holo_member, generation=generation)
+        return holo_members
 
     # 全取得
+    @coalesce
     async def get_all_holo_member(self) -> List[HoloMemberInDB]:
-        holo_member_records = await self.db.fetch_all(
+        holo_member_records = await self.read_db.fetch_all(
             query=query.GET_ALL_HOLO_MEMBER_QUERY
         )
-        return [HoloMemberInDB(**item) for item in holo_member_records]
+        return [to_holo_member(item) for item in holo_member_records]
+
+    # ページ単位で取得
+    # 並び替えのキーより後ろの行を (キー, id) のキーセットで読み進める
+    # limit が None の場合は全件を取得する
+    @coalesce
+    async def get_holo_member_page(
+        self,
+        *,
+        limit: Optional[int],
+        after: Optional[List[Any]] = None,
+        order_by: HoloMemberOrder = HoloMemberOrder.id_asc,
+        type: Optional[GenerationType] = None,
+        name_prefix: Optional[str] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[List[HoloMemberInDB], Optional[List[Any]]]:
+        filter_values = {
+            "type": type,
+            "name_prefix": escape_like(name_prefix) + "%"
+            if name_prefix is not None else None,
+            "min_age": min_age,
+            "max_age": max_age,
+        }
+        values = {
+            name: value for name, value in filter_values.items()
+            if value is not None
+        }
+        if after is not None:
+            values.update(
+                {f"after_{i}": value for i, value in enumerate(after)})
+        # 1件多く取得して次のページが存在するかを判定する
+        values["limit"] = limit + 1 if limit is not None else None
+
+        holo_member_records = await self.read_db.fetch_all(
+            query=query.build_get_holo_member_page_query(
+                columns=fields or query.HOLO_MEMBER_COLUMNS,
+                filters=tuple(
+                    name for name in query.HOLO_MEMBER_FILTERS
+                    if name in values),
+                sort=order_by.sort,
+                descending=order_by.descending,
+                after=after is not None
+            ),
+            values=values
+        )
+        if fields is not None:
+            holo_members = [
+                to_sparse_holo_member(item, fields)
+                for item in holo_member_records[:limit]
+            ]
+        else:
+            holo_members = [
+                to_holo_member(item) for item in holo_member_records[:limit]
+            ]
+        next_after = None
+        if limit is not None and len(holo_member_records) > limit:
+            last = holo_member_records[limit - 1]
+            next_after = [
+                last[key] for key in query.HOLO_MEMBER_SORT_KEYS[order_by.sort]
+            ]
+
+        return holo_members, next_after
+
+    # 差分を取得
+    # 更新と削除はそれぞれ (日時, id) のキーセットで limit 件まで読み進める
+    # 返り値の bool はどちらかにまだ続きがある場合に True
+    @coalesce
+    async def get_holo_member_changes(
+        self,
+        *,
+        limit: int,
+        updated_after: List[Any],
+        deleted_after: List[Any]
+    ) -> Tuple[List[HoloMemberChange], List[HoloMemberTombstone], bool]:
+        values = {"limit": limit + 1, "lag": config.HOLO_MEMBER_CHANGES_LAG}
+        updated_records = await self.read_db.fetch_all(
+            query=query.GET_HOLO_MEMBER_CHANGES_QUERY,
+            values={
+                **values,
+                "after_0": updated_after[0],
+                "after_1": updated_after[1]
+            }
+        )
+        deleted_records = await self.read_db.fetch_all(
+            query=query.GET_HOLO_MEMBER_TOMBSTONES_QUERY,
+            values={
+                **values,
+                "after_0": deleted_after[0],
+                "after_1": deleted_after[1]
+            }
+        )
+
+        if config.FAST_SERIALIZATION:
+            updated = [
+                HoloMemberChange.from_record(item)
+                for item in updated_records[:limit]]
+            deleted = [
+                HoloMemberTombstone.from_record(item)
+                for item in deleted_records[:limit]]
+        else:
+            updated = [
+                HoloMemberChange(**item) for item in updated_records[:limit]]
+            deleted = [
+                HoloMemberTombstone(**item)
+                for item in deleted_records[:limit]]
+        has_more = len(updated_records) > limit or \
+            len(deleted_records) > limit
+
+        return updated, deleted, has_more
+
+    # 変更のバージョンを取得
+    # 無効化されるまではプロセス内に保持した値を返し、DBには問い合わせない
+    # 読み直す場合は直後に読むデータがこのバージョン以降になるようプライマリから読む
+    async def get_holo_member_version(self) -> int:
+        return await holo_member_version.get(
+            lambda: self.db.fetch_val(
+                query=query.GET_HOLO_MEMBER_VERSION_QUERY))
+
+    # read_db が version の変更まで反映しているかを確認
+    # プライマリの場合は常に反映しているので問い合わせない
+    async def read_db_is_at_version(self, version: int) -> bool:
+        if self.read_db is self.db:
+            return True
+        read_version = await self.read_db.fetch_val(
+            query=query.GET_HOLO_MEMBER_VERSION_QUERY)
+        return read_version is not None and read_version >= version
+
+    # 全件を逐次取得
+    # fetch_all と違い結果をメモリに溜めずカーソルから1件ずつ返す
+    async def iterate_all_holo_member(self) -> AsyncIterator[HoloMemberInDB]:
+        async for item in self.read_db.iterate(
+            query=query.GET_ALL_HOLO_MEMBER_QUERY
+        ):
+            yield to_holo_member(item)
 
     # 更新
+    # 存在確認を別に行わず UPDATE ... RETURNING の1文で更新する
+    # 行が返らなければ対象の id が存在しない
     async def update_holo_member(
         self, *, id: int, holo_member_update: HoloMemberUpdate
     ) -> HoloMemberInDB:
-        holo_member = await self.get_holo_member_by_id(id=id)
-
-        if not holo_member:
-            return None
-
-        holo_member_update_params = holo_member.copy(
-            update=holo_member_update.dict(exclude_unset=True)
-        )
-        if holo_member_update_params.type is None:
+        holo_member_update_params = holo_member_update.dict(exclude_unset=True)
+        if 'type' in holo_member_update_params and \
+                holo_member_update_params['type'] is None:
             raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST,
                 detail='Invalid color type. Cannot be None.')
@@ -77,22 +515,25 @@ class HoloMemberRepository(BaseRepository):
         try:
             updated_holo_member = await self.db.fetch_one(
                 query=query.UPDATE_HOLO_MEMBER_BY_ID_QUERY,
-                values=holo_member_update_params.dict()
+                values={**holo_member_update.dict(), 'id': id}
             )
-            return HoloMemberInDB(**updated_holo_member)
-        except Exception as e:
-            print(e)
+        except (DataError, IntegrityConstraintViolationError):
             raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST,
                 detail='Invalid update params.')
 
-    # 削除
-    async def delete_holo_member_by_id(self, *, id: int) -> int:
-        holo_member = await self.get_holo_member_by_id(id=id)
-
-        if not holo_member:
+        holo_member_cache.invalidate(id)
+        holo_member_version.invalidate()
+        if not updated_holo_member:
             return None
 
-        deleted_id = await self.db.execute(
+        return to_holo_member(updated_holo_member)
+
+    # 削除
+    # DELETE ... RETURNING id の1文で削除し、行が返らなければ None
+    async def delete_holo_member_by_id(self, *, id: int) -> int:
+        deleted_id = await self.db.fetch_val(
             query=query.DELETE_HOLO_MEMBER_BY_ID_QUERY, values={'id': id})
+        holo_member_cache.invalidate(id)
+        holo_member_version.invalidate()
         return deleted_id
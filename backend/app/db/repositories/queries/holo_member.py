@@ -1,29 +1,194 @@
+from functools import lru_cache
+from typing import Dict, Tuple
+
 CREATE_HOLO_MEMBER_QUERY = """
     INSERT INTO holo_member (type, name, description, twitter, age)
     VALUES (:type, :name, :description, :twitter, :age)
-    RETURNING id, type, name, description, twitter, age;
+    RETURNING id, type, name, description, twitter, age, updated_at;
+"""
+
+# 配列で受け取った値を unnest で展開し1文で複数行を作成する
+BULK_CREATE_HOLO_MEMBER_QUERY = """
+    INSERT INTO holo_member (type, name, description, twitter, age)
+    SELECT type, name, description, twitter, age
+    FROM unnest(
+        CAST(:types AS text[]),
+        CAST(:names AS text[]),
+        CAST(:descriptions AS text[]),
+        CAST(:twitters AS text[]),
+        CAST(:ages AS numeric[])
+    ) WITH ORDINALITY AS t(type, name, description, twitter, age, ord)
+    ORDER BY ord
+    RETURNING id, type, name, description, twitter, age, updated_at;
 """
 
 GET_HOLO_MEMBER_BY_ID_QUERY = """
-    SELECT type, id, name, description, twitter, age
+    SELECT type, id, name, description, twitter, age, updated_at
     FROM holo_member
     WHERE id = :id;
 """
 
+GET_HOLO_MEMBER_BY_IDS_QUERY = """
+    SELECT id, type, name, description, twitter, age, updated_at
+    FROM holo_member
+    WHERE id = ANY(:ids);
+"""
+
 GET_ALL_HOLO_MEMBER_QUERY = """
-    SELECT id, type, name, description, twitter, age
+    SELECT id, type, name, description, twitter, age, updated_at
     FROM holo_member;
 """
 
+# 取得時に選択できる列 (fields パラメータのホワイトリスト)
+HOLO_MEMBER_COLUMNS = ("id", "type", "name", "description", "twitter", "age")
+
+# 一覧取得の並び替えに使用できるキー
+# 同じ値の行の順序を決めるため最後は必ず id にする
+HOLO_MEMBER_SORT_KEYS = {
+    "id": ("id",),
+    "name": ("name", "id"),
+    "updated_at": ("updated_at", "id"),
+}
+
+# 一覧取得の絞り込み条件
+HOLO_MEMBER_FILTERS = {
+    "type": "type = :type",
+    "name_prefix": "name LIKE :name_prefix",
+    "min_age": "age >= :min_age",
+    "max_age": "age <= :max_age",
+}
+
+
+def select_columns(
+    columns: Tuple[str, ...],
+    required: Tuple[str, ...] = ("id",)
+) -> str:
+    """select_columns
+
+        SELECT する列を組み立てる関数
+
+        Args:
+            columns (Tuple[str, ...]): HOLO_MEMBER_COLUMNS から選んだ列
+            required (Tuple[str, ...]): 必ず含める列
+
+        Returns:
+            str: カンマ区切りの列名
+    """
+    selected = dict.fromkeys(
+        column for column in HOLO_MEMBER_COLUMNS if column in columns)
+    selected.update(dict.fromkeys(required))
+    return ", ".join(selected)
+
+
+@lru_cache(maxsize=None)
+def build_get_holo_member_by_id_query(columns: Tuple[str, ...]) -> str:
+    """build_get_holo_member_by_id_query
+
+        id で取得するクエリを指定された列のみ取得するように組み立てる関数
+
+        Args:
+            columns (Tuple[str, ...]):
+                HOLO_MEMBER_COLUMNS から選んだ列 (id と updated_at は常に含める)
+
+        Returns:
+            str: :id の行を取得するクエリ
+    """
+    sql = f"""
+    SELECT {select_columns(columns, ("id", "updated_at"))}
+    FROM holo_member
+    WHERE id = :id;
+"""
+    QUERY_NAMES[sql] = "GET_HOLO_MEMBER_BY_ID_QUERY"
+    return sql
+
+
+@lru_cache(maxsize=None)
+def build_get_holo_member_page_query(
+    *,
+    columns: Tuple[str, ...] = HOLO_MEMBER_COLUMNS,
+    filters: Tuple[str, ...] = (),
+    sort: str = "id",
+    descending: bool = False,
+    after: bool = False
+) -> str:
+    """build_get_holo_member_page_query
+
+        一覧取得のクエリを組み立てる関数\n
+        列名や条件は HOLO_MEMBER_COLUMNS と HOLO_MEMBER_SORT_KEYS と
+        HOLO_MEMBER_FILTERS からのみ選ぶ
+
+        Args:
+            columns (Tuple[str, ...]): 取得する列 (並び替えのキーは常に含める)
+            filters (Tuple[str, ...]): 使用する HOLO_MEMBER_FILTERS のキー
+            sort (str): 使用する HOLO_MEMBER_SORT_KEYS のキー
+            descending (bool): 降順にする場合は True
+            after (bool): :after_0, :after_1 ... より後ろの行から読む場合は True
+
+        Returns:
+            str: :limit 件 (NULL の場合は全件) を取得するクエリ
+    """
+    keys = HOLO_MEMBER_SORT_KEYS[sort]
+    conditions = [HOLO_MEMBER_FILTERS[name] for name in filters]
+    if after:
+        # (name, id) > (:after_0, :after_1) のような行の比較でキーセットを表す
+        row = ", ".join(keys)
+        params = ", ".join(f":after_{i}" for i in range(len(keys)))
+        operator = "<" if descending else ">"
+        conditions.append(f"({row}) {operator} ({params})")
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    direction = " DESC" if descending else ""
+    order = ", ".join(key + direction for key in keys)
+    sql = f"""
+    SELECT {select_columns(columns, keys)}
+    FROM holo_member
+    {where}
+    ORDER BY {order}
+    LIMIT :limit;
+"""
+    QUERY_NAMES[sql] = "GET_HOLO_MEMBER_PAGE_QUERY"
+    return sql
+
+
+# holo_member の変更のバージョン (行を変更した文ごとにトリガーで1増える)
+# 書き込みが1行のロックを取り合わないよう slot ごとに分けて持つので合計する
+GET_HOLO_MEMBER_VERSION_QUERY = """
+    SELECT sum(version)::bigint AS version
+    FROM table_version
+    WHERE table_name = 'holo_member';
+"""
+
+# 差分同期
+# (更新日時, id) / (削除日時, id) のキーセットで読み進め、
+# :lag 秒より新しい変更はまだコミットされていない変更と順序が入れ替わり得るので返さない
+GET_HOLO_MEMBER_CHANGES_QUERY = """
+    SELECT id, type, name, description, twitter, age, created_at, updated_at
+    FROM holo_member
+    WHERE (updated_at, id) > (:after_0, :after_1)
+      AND updated_at < now() - make_interval(secs => :lag)
+    ORDER BY updated_at, id
+    LIMIT :limit;
+"""
+
+GET_HOLO_MEMBER_TOMBSTONES_QUERY = """
+    SELECT id, deleted_at
+    FROM holo_member_tombstone
+    WHERE (deleted_at, id) > (:after_0, :after_1)
+      AND deleted_at < now() - make_interval(secs => :lag)
+    ORDER BY deleted_at, id
+    LIMIT :limit;
+"""
+
+# NULL が渡された列は現在の値を維持する (部分更新)
 UPDATE_HOLO_MEMBER_BY_ID_QUERY = """
     UPDATE holo_member
-    SET type          = :type,
-        name          = :name,
-        description   = :description,
-        age           = :age,
-        twitter       = :twitter
+    SET type          = COALESCE(:type, type),
+        name          = COALESCE(:name, name),
+        description   = COALESCE(:description, description),
+        age           = COALESCE(:age, age),
+        twitter       = COALESCE(:twitter, twitter)
     WHERE id = :id
-    RETURNING id, type, name, description, age, twitter;
+    RETURNING id, type, name, description, age, twitter, updated_at;
 """
 
 DELETE_HOLO_MEMBER_BY_ID_QUERY = '''
@@ -31,3 +196,10 @@ DELETE_HOLO_MEMBER_BY_ID_QUERY = '''
     WHERE id = :id
     RETURNING id;
 '''
+
+# 計測でクエリを区別するための名前 (クエリ文字列 → 定数名)
+# 組み立てたクエリは組み立てた関数が追加する
+QUERY_NAMES: Dict[str, str] = {
+    value: name for name, value in list(globals().items())
+    if name.endswith("_QUERY") and isinstance(value, str)
+}
@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.deadline import request_deadline
+from app.core.profiling import detached_context
+
+T = TypeVar("T")
+
+
+def freeze(value: Any) -> Hashable:
+    """freeze
+
+        引数をキーに使えるようハッシュ可能な値にする関数\n
+        リストはタプルに、辞書はキーで並べた (キー, 値) のタプルにする
+
+        Args:
+            value (Any): 呼び出しの引数
+
+        Returns:
+            Hashable: ハッシュ可能な値
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+class _Flight:
+    # 実行中の呼び出しと、その結果を待っている要求元の数
+    def __init__(self, future: asyncio.Future) -> None:
+        self.future = future
+        self.waiters = 0
+
+
+class SingleFlight:
+    """SingleFlight
+
+    実行中の同じキーの呼び出しがあれば、新たに実行せずその結果を共有するクラス\n
+    呼び出しは要求元とは別のタスクで実行するので、一部の要求元がキャンセルされても
+    結果を待っている他の要求元には影響しない\n
+    結果を待つ要求元が全てキャンセルされた場合は呼び出し (実行中のクエリも) を取り消す\n
+    呼び出しには始めた要求元のリクエストの期限を引き継ぐ
+
+    Attributes:
+        name str: 計測値に付ける名前
+        calls int: 実際に実行した回数
+        coalesced int: 実行中の呼び出しの結果を共有した回数
+        cancelled int: 待っている要求元がいなくなり取り消した回数
+
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """do
+
+            key の呼び出しが実行中であればその結果を待ち、無ければ call を実行する関数
+
+            Args:
+                key (Hashable): 同じ呼び出しを判定するキー
+                call (Callable[[], Awaitable[T]]): 実行する呼び出し
+
+            Returns:
+                T: 呼び出しの結果 (例外の場合は同じ例外を送出する)
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            flight = self._start(key, call)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.future)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                # 最後の要求元がキャンセルされたので結果を待つ者はいない
+                self.cancelled += 1
+                self._forget(key, flight)
+                flight.future.cancel()
+
+    def _start(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[T]]
+    ) -> _Flight:
+        # 要求元の接続やトランザクションを引き継がずに実行する
+        # プール等の待ち時間が要求元の期限を超えないよう期限は引き継ぐ
+        context = detached_context()
+        context.run(request_deadline.set, request_deadline.get())
+        flight = _Flight(context.run(asyncio.ensure_future, call()))
+        self._flights[key] = flight
+
+        def done(future: asyncio.Future) -> None:
+            self._forget(key, flight)
+            # 誰も待っていない場合に例外が回収されないという警告を出さない
+            if not future.cancelled():
+                future.exception()
+
+        flight.future.add_done_callback(done)
+        return flight
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "in_flight": self.in_flight,
+        }
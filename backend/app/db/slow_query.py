@@ -0,0 +1,136 @@
+import asyncio
+import contextvars
+import json
+import logging
+import random
+import re
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.core import config
+from databases import Database
+
+logger = logging.getLogger(__name__)
+
+
+def parameter_shape(values: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """parameter_shape
+
+        バインドするパラメータを値を含まない形 (型と件数) にする関数\n
+        ログに個人情報等の値を残さないために使う
+
+        Args:
+            values (Optional[Dict[str, Any]]): バインドするパラメータ
+
+        Returns:
+            Dict[str, str]: パラメータ名と型 (リストの場合は件数も)
+    """
+    shape = {}
+    for name, value in (values or {}).items():
+        if isinstance(value, (list, tuple)):
+            shape[name] = f"{type(value).__name__}[{len(value)}]"
+        else:
+            shape[name] = type(value).__name__
+    return shape
+
+
+class SlowQueryLog:
+    """SlowQueryLog
+
+    threshold ミリ秒以上かかったクエリを直近 size 件まで保持するリングバッファ\n
+    記録と同時にログにも出力し、explain_rate の割合で SELECT の
+    EXPLAIN (ANALYZE, BUFFERS) を別のタスクで取得して追記する
+
+    Attributes:
+        threshold float: 記録する実行時間の下限 (ミリ秒, 0 以下の場合は記録しない)
+        explain_rate float: EXPLAIN を取得する割合 (0.0 ~ 1.0)
+        recorded int: 記録したクエリの数
+
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        size: int,
+        explain_rate: float = 0.0,
+        sample: Callable[[], float] = random.random
+    ) -> None:
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.recorded = 0
+        self._entries: deque = deque(maxlen=size)
+        self._sample = sample
+        self._explaining: Set[asyncio.Task] = set()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def record(
+        self,
+        database: Database,
+        name: str,
+        query: Any,
+        values: Optional[Dict[str, Any]],
+        duration: float
+    ) -> Optional[Dict[str, Any]]:
+        duration_ms = duration * 1000
+        if self.threshold <= 0 or duration_ms < self.threshold:
+            return None
+
+        sql = re.sub(r"\s+", " ", str(query)).strip()
+        entry = {
+            "query": name,
+            "sql": sql,
+            "params": parameter_shape(values),
+            "duration_ms": round(duration_ms, 3),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "plan": None,
+        }
+        self._entries.append(entry)
+        self.recorded += 1
+        logger.warning("slow query: %s", json.dumps(entry, ensure_ascii=False))
+
+        # EXPLAIN ANALYZE はクエリを実際に実行するので、副作用のない SELECT に限る
+        if isinstance(query, str) and sql.upper().startswith("SELECT") and \
+                self._sample() < self.explain_rate:
+            # 呼び出し元の接続やトランザクションを引き継がないよう空のコンテキストで実行する
+            task = contextvars.Context().run(
+                asyncio.ensure_future,
+                self._explain(database, entry, query, values))
+            self._explaining.add(task)
+            task.add_done_callback(self._explaining.discard)
+        return entry
+
+    async def _explain(
+        self,
+        database: Database,
+        entry: Dict[str, Any],
+        query: str,
+        values: Optional[Dict[str, Any]]
+    ) -> None:
+        try:
+            plan = await database.fetch_val(
+                query="EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query,
+                values=values
+            )
+        except Exception as e:
+            logger.warning("slow query explain failed: %s: %s", entry["query"], e)
+            return
+        entry["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+        logger.warning(
+            "slow query plan: %s",
+            json.dumps(
+                {"query": entry["query"], "plan": entry["plan"]},
+                ensure_ascii=False))
+
+
+# プライマリとレプリカで共有する遅いクエリの記録 (ワーカーごと)
+slow_query_log = SlowQueryLog(
+    threshold=config.SLOW_QUERY_THRESHOLD,
+    size=config.SLOW_QUERY_LOG_SIZE,
+    explain_rate=config.SLOW_QUERY_EXPLAIN_RATE
+)
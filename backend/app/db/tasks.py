@@ -1,24 +1,94 @@
+import asyncio
 import logging
 import os
 from fastapi import FastAPI
-from databases import Database
-from app.core.config import DATABASE_URL
+from databases import Database, DatabaseURL
+from app.core import config
+from app.core.config import DATABASE_URL, HOLO_MEMBER_NOTIFY_CHANNEL
+from app.db.broadcast import Broadcaster
+from app.db.instrumented import InstrumentedDatabase
+from app.db.slow_query import slow_query_log
+from app.db.listener import ChangeListener
+from app.db.pool import instrument_pool
+from app.db.replicas import ReplicaSet
+from app.db.repositories.holo_member import (
+    handle_holo_member_change,
+    holo_member_version
+)
+from app.db.repositories.queries.holo_member import QUERY_NAMES
 
 logger = logging.getLogger(__name__)
 
 
-async def connect_to_db(app: FastAPI) -> None:
+def get_database_url() -> DatabaseURL:
     CONTAINER_DSN = os.environ.get('CONTAINER_DSN', '')
-    DB_URL = CONTAINER_DSN if CONTAINER_DSN else DATABASE_URL
-    database = Database(DB_URL, min_size=2, max_size=5)
+    return DatabaseURL(CONTAINER_DSN) if CONTAINER_DSN else DATABASE_URL
 
-    try:
-        await database.connect()
-        app.state._db = database
-    except Exception as e:
-        logger.warn("--- DATABASE CONNECTION ERROR ---")
-        logger.warn(e)
-        logger.warn("--- DATABASE CONNECTION ERROR ---")
+
+def get_pool_options() -> dict:
+    options = {
+        "min_size": config.DB_POOL_MIN_SIZE,
+        "max_size": config.DB_POOL_MAX_SIZE,
+        "max_queries": config.DB_POOL_MAX_QUERIES,
+        "max_inactive_connection_lifetime":
+            config.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME,
+    }
+    if config.DB_STATEMENT_TIMEOUT > 0:
+        options["server_settings"] = {
+            "statement_timeout": str(config.DB_STATEMENT_TIMEOUT)}
+    return options
+
+
+def instrument_database(database: Database) -> Database:
+    # METRICS_ENABLED の場合はクエリごとの実行時間を計測する Database を使う
+    # プロファイルの内訳 (db) と遅いクエリの記録もここで計測するので、
+    # プロファイルか遅いクエリの記録が有効な場合も使う
+    if config.METRICS_ENABLED or str(config.PROFILING_TOKEN) or \
+            config.SLOW_QUERY_THRESHOLD > 0:
+        return InstrumentedDatabase(database, QUERY_NAMES, slow_query_log)
+    return database
+
+
+async def connect_to_db(app: FastAPI) -> None:
+    DB_URL = get_database_url()
+    database = Database(DB_URL, **get_pool_options())
+
+    # 接続できないまま起動すると全てのリクエストが失敗するので、
+    # 再試行しても接続できなければ例外を投げて起動を失敗させる
+    interval = config.DB_CONNECT_RETRY_INTERVAL
+    for attempt in range(config.DB_CONNECT_RETRIES + 1):
+        try:
+            await database.connect()
+            break
+        except Exception as e:
+            logger.warn("--- DATABASE CONNECTION ERROR ---")
+            logger.warn(e)
+            logger.warn("--- DATABASE CONNECTION ERROR ---")
+            if attempt == config.DB_CONNECT_RETRIES:
+                raise
+        await asyncio.sleep(interval)
+        interval *= 2
+
+    instrument_pool(database, config.DB_POOL_ACQUIRE_TIMEOUT)
+    app.state._db = instrument_database(database)
+
+
+async def connect_to_replicas(app: FastAPI) -> None:
+    replicas = []
+    for replica_url in config.DATABASE_REPLICA_URLS:
+        replica = Database(replica_url, **get_pool_options())
+        try:
+            await replica.connect()
+            instrument_pool(replica, config.DB_POOL_ACQUIRE_TIMEOUT)
+            replicas.append(instrument_database(replica))
+        except Exception as e:
+            # 接続できなかったレプリカは使わずプライマリと残りのレプリカで動かす
+            logger.warn("--- REPLICA CONNECTION ERROR ---")
+            logger.warn(e)
+            logger.warn("--- REPLICA CONNECTION ERROR ---")
+
+    app.state._replicas = ReplicaSet(
+        replicas, config.DATABASE_REPLICA_STRATEGY)
 
 
 async def close_db_connection(app: FastAPI) -> None:
@@ -28,3 +98,58 @@ async def close_db_connection(app: FastAPI) -> None:
         logger.warn("--- DATABASEDISCONNECT ERROR ---")
         logger.warn(e)
         logger.warn("--- DATABASE DISCONNECT ERROR ---")
+
+
+async def close_replica_connections(app: FastAPI) -> None:
+    for replica in app.state._replicas.replicas:
+        try:
+            await replica.disconnect()
+        except Exception as e:
+            logger.warn("--- REPLICA DISCONNECT ERROR ---")
+            logger.warn(e)
+            logger.warn("--- REPLICA DISCONNECT ERROR ---")
+
+
+async def start_change_listener(app: FastAPI) -> None:
+    listener = ChangeListener(
+        str(get_database_url()),
+        HOLO_MEMBER_NOTIFY_CHANNEL,
+        retry_interval=config.LISTEN_RETRY_INTERVAL,
+        max_retry_interval=config.LISTEN_MAX_RETRY_INTERVAL,
+        health_check_interval=config.LISTEN_HEALTH_CHECK_INTERVAL
+    )
+    listener.add_handler(handle_holo_member_change)
+    # 1本の LISTEN 接続で受け取った通知をワーカー内の購読者に配る
+    broadcaster = Broadcaster(config.HOLO_MEMBER_EVENTS_QUEUE_SIZE)
+    listener.add_handler(broadcaster.publish)
+    app.state._listener = listener
+    app.state._broadcaster = broadcaster
+    # LISTEN している間だけバージョンをプロセス内に保持する
+    holo_member_version.track(listener)
+
+    try:
+        await listener.start()
+    except Exception as e:
+        # 接続できるまで listener が接続し直す (それまではバージョンを毎回DBから読む)
+        logger.warn("--- LISTEN CONNECTION ERROR ---")
+        logger.warn(e)
+        logger.warn("--- LISTEN CONNECTION ERROR ---")
+
+
+def close_event_streams(app: FastAPI) -> None:
+    # 購読中のストリームは終わらないので、サーバーは接続の完了を待つ前にこれを呼ぶ
+    # (lifespan の shutdown は接続が全て閉じた後にしか呼ばれない)
+    broadcaster = getattr(app.state, "_broadcaster", None)
+    if broadcaster is not None:
+        broadcaster.close()
+
+
+async def stop_change_listener(app: FastAPI) -> None:
+    # サーバーを経由せずに停止した場合 (テスト等) のためここでも終了させる
+    close_event_streams(app)
+    try:
+        await app.state._listener.stop()
+    except Exception as e:
+        logger.warn("--- LISTEN DISCONNECT ERROR ---")
+        logger.warn(e)
+        logger.warn("--- LISTEN DISCONNECT ERROR ---")
@@ -0,0 +1,89 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.db.listener import ChangeListener
+from app.db.singleflight import SingleFlight
+
+
+class TableVersion:
+    """TableVersion
+
+    テーブルの変更のバージョンをプロセス内に保持するクラス\n
+    ワーカー内の書き込みと LISTEN で受け取った変更通知で無効化し、
+    無効化された後に初めて要求された時だけDBから読み直す\n
+    LISTEN していない間は他のワーカーの変更を取りこぼすので毎回DBから読む\n
+    同時に読み直しが必要になった場合は1回の読み込みを共有する
+
+    Attributes:
+        listener Optional[ChangeListener]: 変更通知を受け取る接続
+        hits int: 保持しているバージョンを返した回数
+        generation int: 無効化のたびに増える世代番号
+
+    """
+
+    def __init__(self, name: str) -> None:
+        self.listener: Optional[ChangeListener] = None
+        self.hits = 0
+        self.generation = 0
+        self._value: Optional[int] = None
+        self._flights = SingleFlight(name)
+
+    @property
+    def listening(self) -> bool:
+        return self.listener is not None and self.listener.is_listening
+
+    @property
+    def refreshes(self) -> int:
+        return self._flights.calls
+
+    @property
+    def coalesced(self) -> int:
+        return self._flights.coalesced
+
+    def track(self, listener: Optional[ChangeListener]) -> None:
+        # 接続し直すまでの変更は受け取れていないので保持している値は捨てる
+        self.listener = listener
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._value = None
+
+    def handle_change(self, event: Dict[str, Any]) -> None:
+        # RESET (LISTEN の切断) を含め、どの通知でもバージョンは変わり得る
+        self.invalidate()
+
+    async def get(self, fetch: Callable[[], Awaitable[int]]) -> int:
+        """get
+
+            バージョンを取得する関数\n
+            保持している値が使えなければ fetch でDBから読み直す
+
+            Args:
+                fetch (Callable[[], Awaitable[int]]): DBからバージョンを読む関数
+
+            Returns:
+                int: 現在のバージョン
+        """
+        listening = self.listening
+        if listening and self._value is not None:
+            self.hits += 1
+            return self._value
+
+        generation = self.generation
+
+        async def refresh() -> int:
+            value = await fetch()
+            # 読んでいる間に無効化されていれば古い値の可能性があるので保持しない
+            if listening and generation == self.generation:
+                self._value = value
+            return value
+
+        # 無効化より前に始まった読み直しは共有しないよう世代をキーにする
+        return await self._flights.do(generation, refresh)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "coalesced": self.coalesced,
+        }
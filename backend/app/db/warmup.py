@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Iterable
+
+from databases import Database
+from sqlalchemy import text
+
+
+def compile_query(database: Database, query: str) -> str:
+    """compile_query
+
+        databases がクエリを実行する際と同じ文字列 (:name を $1, $2 ... に置き換えたもの)
+        にする関数\n
+        asyncpg は実行した文字列ごとに準備済みの文をキャッシュするので、
+        同じ文字列でなければ準備しておいた文は使われない\n
+        databases の内部の _compile を使うため requirements.txt でバージョンを固定している
+
+        Args:
+            database (Database): 接続済みの Database
+            query (str): :name 形式のパラメータを含むクエリ
+
+        Returns:
+            str: asyncpg に渡される文字列
+    """
+    compiled_query, _, _ = database._backend.connection()._compile(text(query))
+    return compiled_query
+
+
+async def prepare_statements(connection: Any, queries: Iterable[str]) -> int:
+    """prepare_statements
+
+        接続の文のキャッシュにクエリを準備しておく関数\n
+        fetch 等が使うキャッシュに入れるため prepare() ではなく
+        fetch 等と同じ _get_statement() を使う (クエリは実行しない)\n
+        asyncpg の内部のメソッドなので requirements.txt でバージョンを固定している
+
+        Args:
+            connection (Any): asyncpg の接続
+            queries (Iterable[str]): compile_query() で変換したクエリ
+
+        Returns:
+            int: 準備した文の数
+    """
+    count = 0
+    for query in queries:
+        await connection._get_statement(query, None)
+        count += 1
+    return count
+
+
+async def warm_up_pool(database: Database, queries: Iterable[str]) -> int:
+    """warm_up_pool
+
+        プールの接続を min_size まで確立し、それぞれの接続でクエリを準備する関数\n
+        min_size 本を同時に取得するので全ての接続に準備が行き渡る
+
+        Args:
+            database (Database): 接続済みの Database
+            queries (Iterable[str]): :name 形式のパラメータを含むクエリ
+
+        Returns:
+            int: 準備した接続の数
+    """
+    compiled = list(dict.fromkeys(
+        compile_query(database, query) for query in queries))
+    pool = database._backend._pool
+    results = await asyncio.gather(
+        *(pool.acquire() for _ in range(pool.get_min_size())),
+        return_exceptions=True
+    )
+    connections = [
+        result for result in results
+        if not isinstance(result, BaseException)
+    ]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(
+            *(prepare_statements(connection, compiled)
+              for connection in connections))
+    finally:
+        # 取得できた接続は失敗した場合でも必ず返す
+        for connection in connections:
+            await pool.release(connection)
+    return len(connections)
@@ -1,9 +1,12 @@
-from typing import Optional
+from typing import Any, Mapping, Optional, Type, TypeVar
 from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 from pydantic import BaseModel, validator
 
 JST = timezone(timedelta(hours=+9), 'JST')
 
+Model = TypeVar("Model", bound="CoreModel")
+
 
 class CoreModel(BaseModel):
     """CoreModel
@@ -13,7 +16,34 @@ class CoreModel(BaseModel):
 
     """
     # いずれモデル間でロジックを共有できるように拡張していく
-    pass
+
+    @classmethod
+    def from_record(cls: Type[Model], record: Mapping[str, Any]) -> Model:
+        """from_record
+
+            DBから取得した行を検証せずにモデルにする\n
+            DBの制約で型が保証されている行にのみ使用する\n
+            モデルに存在しない列は捨て、numeric 列の Decimal は float にする
+
+            Args:
+                record (Mapping[str, Any]): DBから取得した行
+
+            Returns:
+                Model: 検証を省略して作成したモデル
+        """
+        # construct() はデフォルト値のコピーを伴うので、同等の処理を直接行う
+        fields = cls.__fields__
+        values = {}
+        for name, value in record.items():
+            if name in fields:
+                if isinstance(value, Decimal):
+                    value = float(value)
+                values[name] = value
+        model = cls.__new__(cls)
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__fields_set__", set(values))
+        model._init_private_attributes()
+        return model
 
 
 class DateTimeModelMixin(BaseModel):
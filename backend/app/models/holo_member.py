@@ -1,7 +1,9 @@
+from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
-from app.models.core import CoreModel, IDModelMixin
+from app.models.core import CoreModel, DateTimeModelMixin, IDModelMixin
+from pydantic import PrivateAttr
 
 
 class GenerationType(str, Enum):
@@ -26,6 +28,36 @@ class GenerationType(str, Enum):
     _ID = "ID"
     _Gamers = "Gamers"
 
+# 一覧取得の並び順
+
+
+class HoloMemberOrder(str, Enum):
+    """HoloMemberOrder
+
+    一覧取得の並び順の列挙型\n
+    先頭に - が付くものは降順
+
+    Attributes:
+        id_asc str: idの昇順
+        name_asc str: 名前の昇順
+        updated_at_asc str: 更新日時の昇順
+
+    """
+    id_asc = "id"
+    id_desc = "-id"
+    name_asc = "name"
+    name_desc = "-name"
+    updated_at_asc = "updated_at"
+    updated_at_desc = "-updated_at"
+
+    @property
+    def sort(self) -> str:
+        return self.value.lstrip("-")
+
+    @property
+    def descending(self) -> bool:
+        return self.value.startswith("-")
+
 # 全リソースで共有する属性
 
 
@@ -73,21 +105,18 @@ class HoloMemberUpdate(HoloMemberBase):
     """HoloMemberUpdate
 
     Update\n
-    更新することが可能な属性
+    更新することが可能な属性\n
+    部分更新に対応するため全て任意で、指定されなかった属性は現在の値を維持する
 
     Attributes:
-        type GenerationType: どこに所属するか
-        name str: ライバーの名前
-        description str: ライバーの詳細
-        age float: ライバーの年齢
-        twitter str: ライバーのTwitterアカウント
+        type Optional[GenerationType]: どこに所属するか
+        name Optional[str]: ライバーの名前
+        description Optional[str]: ライバーの詳細
+        age Optional[float]: ライバーの年齢
+        twitter Optional[str]: ライバーのTwitterアカウント
 
     """
-    type: GenerationType
-    name: str
-    description: str
-    age: float
-    twitter: str
+    pass
 
 # データベースから取得するリソースに存在する属性
 
@@ -104,6 +133,7 @@ class HoloMemberInDB(IDModelMixin, HoloMemberBase):
         description str: ライバーの詳細
         age float: ライバーの年齢
         twitter str: ライバーのTwitterアカウント
+        _updated_at Optional[datetime]: 更新日時 (ETag に使用し、レスポンスには含めない)
 
     """
     type: GenerationType
@@ -111,6 +141,7 @@ class HoloMemberInDB(IDModelMixin, HoloMemberBase):
     description: str
     age: float
     twitter: str
+    _updated_at: Optional[datetime] = PrivateAttr(None)
 
 # GET, POST, PUTリクエストで返されるデータに存在する属性
 
@@ -129,3 +160,65 @@ class HoloMemberPublic(IDModelMixin, HoloMemberBase):
 
     """
     pass
+
+# 複数のidを元に取得した際に返されるデータに存在する属性
+
+
+class HoloMemberLookup(CoreModel):
+    """HoloMemberLookup
+
+    複数のidを元に取得した結果
+
+    Attributes:
+        holo_members List[HoloMemberPublic]: 見つかったライバー (リクエストのid順)
+        missing_ids List[int]: 見つからなかったid
+
+    """
+    holo_members: List[HoloMemberPublic]
+    missing_ids: List[int]
+
+# 差分同期で返されるデータに存在する属性
+
+
+class HoloMemberChange(DateTimeModelMixin, HoloMemberPublic):
+    """HoloMemberChange
+
+    指定された時点より後に作成・更新されたライバー
+
+    Attributes:
+        created_at datetime: 作成日時
+        updated_at datetime: 更新日時
+
+    """
+    pass
+
+
+class HoloMemberTombstone(IDModelMixin, CoreModel):
+    """HoloMemberTombstone
+
+    指定された時点より後に削除されたライバー
+
+    Attributes:
+        id int: 削除されたライバーのid
+        deleted_at datetime: 削除日時
+
+    """
+    deleted_at: datetime
+
+
+class HoloMemberChanges(CoreModel):
+    """HoloMemberChanges
+
+    差分同期の結果
+
+    Attributes:
+        updated List[HoloMemberChange]: 作成・更新されたライバー (更新日時順)
+        deleted List[HoloMemberTombstone]: 削除されたライバー (削除日時順)
+        next_cursor str: 次回の取得で cursor に渡す値
+        has_more bool: まだ取得していない変更がある場合は True
+
+    """
+    updated: List[HoloMemberChange]
+    deleted: List[HoloMemberTombstone]
+    next_cursor: str
+    has_more: bool
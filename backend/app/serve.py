@@ -0,0 +1,169 @@
+'''serve
+
+serve.py
+
+* 本番用のサーバーを起動するモジュール
+* python -m app.serve で起動し、設定は環境変数 (app.core.config) から読む
+* CPU数 (SERVER_WORKERS) のワーカーを起動し、uvloop / httptools があれば使用する
+* ワーカーごとのプールは全ワーカーの接続数が Postgres の max_connections に
+  収まる大きさにする
+
+'''
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Dict, Optional
+
+import uvicorn
+from uvicorn.importer import import_from_string
+from uvicorn.supervisors import Multiprocess
+
+from app.core import config
+from app.db.tasks import close_event_streams
+
+logger = logging.getLogger(__name__)
+
+APP = "app.api.server:app"
+# ワーカーごとにプール以外に使う接続 (変更通知の LISTEN 用)
+EXTRA_CONNECTIONS_PER_WORKER = 1
+
+
+def is_installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_count(workers: int) -> int:
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def worker_pool_sizes(
+    workers: int,
+    max_connections: int,
+    reserved_connections: int,
+    min_size: int,
+    max_size: int
+) -> Dict[str, int]:
+    """worker_pool_sizes
+
+        ワーカーごとのプールの大きさを決める関数\n
+        ワーカー数 × (max_size + LISTEN 用の接続) が
+        max_connections - reserved_connections に収まるよう max_size を小さくする
+
+        Args:
+            workers (int): ワーカー数
+            max_connections (int): Postgres の max_connections
+            reserved_connections (int): ワーカー以外に残す接続数
+            min_size (int): 設定されたプールの min_size
+            max_size (int): 設定されたプールの max_size
+
+        Returns:
+            Dict[str, int]: DB_POOL_MIN_SIZE と DB_POOL_MAX_SIZE
+    """
+    budget = (max_connections - reserved_connections) // workers - \
+        EXTRA_CONNECTIONS_PER_WORKER
+    if budget < 1:
+        logger.warning(
+            "%d workers need more than %d connections; using 1 per worker",
+            workers, max_connections - reserved_connections)
+        budget = 1
+    max_size = min(max_size, budget)
+    return {
+        "DB_POOL_MIN_SIZE": min(min_size, max_size),
+        "DB_POOL_MAX_SIZE": max_size,
+    }
+
+
+class GracefulServer(uvicorn.Server):
+    """GracefulServer
+
+    停止時に処理中のリクエストの完了を最大 graceful_timeout 秒だけ待つサーバー\n
+    (uvicorn 0.13 には停止を待つ時間の上限の設定がない)\n
+    待つ前に変更通知のストリーム (/events/) を終了させる\n
+    時間を過ぎた場合は残っている接続を閉じ、lifespan の shutdown は通常通り行う
+
+    Attributes:
+        graceful_timeout Optional[float]: 待つ最大秒数 (None は無制限)
+
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        graceful_timeout: Optional[float]
+    ) -> None:
+        super().__init__(config=config)
+        self.graceful_timeout = graceful_timeout
+
+    async def shutdown(self, sockets: Optional[list] = None) -> None:
+        # 変更通知のストリームは自分からは終わらないため、接続の完了を待つ前に終了させる
+        # (ワーカー内では config.app の import は読み込み済みのアプリを返す)
+        close_event_streams(import_from_string(self.config.app))
+        timer = None
+        if self.graceful_timeout is not None:
+            timer = asyncio.get_event_loop().call_later(
+                self.graceful_timeout, self._close_connections)
+        try:
+            await super().shutdown(sockets=sockets)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _close_connections(self) -> None:
+        # force_exit にすると lifespan の shutdown が飛ばされ、プールや LISTEN 用の
+        # 接続が閉じられないので、残っているリクエストと接続だけを打ち切る
+        logger.warning(
+            "graceful shutdown timed out after %ss; closing %d connections",
+            self.graceful_timeout, len(self.server_state.connections))
+        # 実行中のクエリはタスクのキャンセルで取り消され、接続はプールに返る
+        for task in list(self.server_state.tasks):
+            task.cancel()
+        for connection in list(self.server_state.connections):
+            connection.transport.close()
+
+
+def get_server_config(workers: int) -> uvicorn.Config:
+    return uvicorn.Config(
+        APP,
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        workers=workers,
+        loop="uvloop" if is_installed("uvloop") else "asyncio",
+        http="httptools" if is_installed("httptools") else "h11",
+        timeout_keep_alive=config.SERVER_KEEP_ALIVE,
+        backlog=config.SERVER_BACKLOG,
+        proxy_headers=True
+    )
+
+
+def main() -> None:
+    workers = worker_count(config.SERVER_WORKERS)
+    # ワーカーは起動時に環境変数から設定を読み直すので、プールの大きさを渡しておく
+    pool_sizes = worker_pool_sizes(
+        workers,
+        config.DB_MAX_CONNECTIONS,
+        config.DB_RESERVED_CONNECTIONS,
+        config.DB_POOL_MIN_SIZE,
+        config.DB_POOL_MAX_SIZE
+    )
+    os.environ.update({name: str(size) for name, size in pool_sizes.items()})
+
+    server_config = get_server_config(workers)
+    server = GracefulServer(
+        server_config,
+        config.SERVER_GRACEFUL_TIMEOUT
+        if config.SERVER_GRACEFUL_TIMEOUT > 0 else None)
+    logging.getLogger("uvicorn.error").info(
+        "Starting %d workers (loop=%s, http=%s, pool max_size=%d)",
+        workers, server_config.loop, server_config.http,
+        pool_sizes["DB_POOL_MAX_SIZE"])
+
+    if workers > 1:
+        sock = server_config.bind_socket()
+        Multiprocess(server_config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+'''benchmarks
+
+__init__.py
+
+* マイクロベンチマークを管理するモジュール
+* python -m benchmarks.<モジュール名> で実行する
+
+モジュール検索のためのマーカー。
+存在するディレクトリ名を名前とする名前空間の初期化を行う。
+同、名前空間におけるワイルドカード import の対象を定義する (__all__ の定義) 。
+同じディレクトリにある他のモジュールの名前空間を定義する。
+
+'''
@@ -0,0 +1,84 @@
+"""serialization
+
+一覧レスポンスの1行あたりのシリアライズのコストを計測する
+
+* before: HoloMemberInDB(**record) で検証し、response_model で再検証して
+  jsonable_encoder と標準の json でエンコードする (従来の経路)
+* after: HoloMemberInDB.from_record(record) で検証を省略し、
+  ModelJSONResponse (orjson) でエンコードする (FAST_SERIALIZATION の経路)
+
+使い方: python -m benchmarks.serialization [行数] [繰り返し回数]
+
+"""
+
+import asyncio
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.responses import ModelJSONResponse
+from app.models.holo_member import HoloMemberInDB, HoloMemberPublic
+
+response_field = create_response_field(
+    name="benchmark", type_=List[HoloMemberPublic])
+
+
+def make_records(rows: int) -> List[Dict[str, Any]]:
+    # asyncpg の numeric 列と同じく age は Decimal で渡す
+    return [
+        {
+            "id": i,
+            "type": "3",
+            "name": f"holo_member {i}",
+            "description": "description " * 16,
+            "twitter": f"https://twitter.com/holo_member_{i}",
+            "age": Decimal("17.0"),
+        }
+        for i in range(rows)
+    ]
+
+
+async def before(records: List[Dict[str, Any]]) -> bytes:
+    holo_members = [HoloMemberInDB(**record) for record in records]
+    content = await serialize_response(
+        field=response_field, response_content=holo_members)
+    return JSONResponse(content).body
+
+
+async def after(records: List[Dict[str, Any]]) -> bytes:
+    holo_members = [HoloMemberInDB.from_record(record) for record in records]
+    return ModelJSONResponse(holo_members).body
+
+
+async def measure(
+    path: Callable[[List[Dict[str, Any]]], Awaitable[bytes]],
+    records: List[Dict[str, Any]],
+    repeat: int
+) -> float:
+    await path(records)
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        await path(records)
+        best = min(best, time.perf_counter() - started_at)
+    return best / len(records) * 1e6
+
+
+async def main(rows: int, repeat: int) -> None:
+    records = make_records(rows)
+    before_us = await measure(before, records, repeat)
+    after_us = await measure(after, records, repeat)
+    print(f"rows={rows} repeat={repeat} (best of)")
+    print(f"before: {before_us:.2f} us/row")
+    print(f"after:  {after_us:.2f} us/row ({before_us / after_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(rows, repeat))
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from app.api.middleware.admission import AdmissionController, AdmissionRejected
+from app.core import config
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestAdmissionController:
+    async def test_reads_are_admitted_before_writes(self) -> None:
+        controller = AdmissionController(
+            limit=1, write_limit=1, queue_size=10, timeout=1)
+        await controller.acquire("read")
+        order = []
+
+        async def acquire(kind: str) -> None:
+            await controller.acquire(kind)
+            order.append(kind)
+            controller.release(kind)
+
+        waiting = [
+            asyncio.ensure_future(acquire("write")),
+            asyncio.ensure_future(acquire("read")),
+        ]
+        await asyncio.sleep(0)
+        controller.release("read")
+        await asyncio.gather(*waiting)
+        assert order == ["read", "write"]
+        assert controller.stats()["read"]["active"] == 0
+
+    async def test_writes_do_not_use_every_slot(self) -> None:
+        controller = AdmissionController(
+            limit=2, write_limit=1, queue_size=0, timeout=1)
+        await controller.acquire("write")
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.acquire("write")
+        assert e.value.reason == "queue_full"
+        # 書き込みが上限に達していても読み込みの枠は残っている
+        await controller.acquire("read")
+        assert controller.stats()["write"]["rejected_queue_full"] == 1
+
+    async def test_waiting_past_timeout_is_rejected(self) -> None:
+        controller = AdmissionController(
+            limit=1, write_limit=1, queue_size=1, timeout=0.01)
+        await controller.acquire("read")
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.acquire("read")
+        assert e.value.reason == "timeout"
+        assert controller.stats()["read"]["queued"] == 0
+
+    async def test_cancelled_waiter_does_not_leak_slot(self) -> None:
+        controller = AdmissionController(
+            limit=1, write_limit=1, queue_size=1, timeout=1)
+        await controller.acquire("read")
+        waiting = asyncio.ensure_future(controller.acquire("read"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        controller.release("read")
+        assert controller.stats()["read"]["active"] == 0
+        await controller.acquire("read")
+
+
+@pytest.mark.skipif(
+    not config.ADMISSION_ENABLED, reason="ADMISSION_ENABLED is off")
+class TestAdmissionMiddleware:
+    async def test_overloaded_request_fails_fast(
+        self,
+        app: FastAPI,
+        client: AsyncClient
+    ) -> None:
+        controller = app.state._admission
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        res = await client.get(url)
+        assert res.status_code == HTTP_200_OK
+
+        # 読み込みの枠を全て埋め、待たせずに断るようにする
+        controller.queue_size = 0
+        for _ in range(controller.limit):
+            await controller.acquire("read")
+        res = await client.get(url)
+        assert res.status_code == HTTP_503_SERVICE_UNAVAILABLE
+        assert res.headers['Retry-After'] == str(config.ADMISSION_RETRY_AFTER)
+
+        # 制限しないパスはそのまま処理する
+        res = await client.get(app.url_path_for('metrics:get-metrics'))
+        assert res.status_code == HTTP_200_OK
+
+        for _ in range(controller.limit):
+            controller.release("read")
+        res = await client.get(url)
+        assert res.status_code == HTTP_200_OK
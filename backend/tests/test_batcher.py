@@ -0,0 +1,96 @@
+import asyncio
+from typing import List
+
+import pytest
+from asyncpg.exceptions import DataError
+from databases import Database
+from httpx import AsyncClient
+
+from app.core import config
+from app.db.batcher import WriteBatcher
+from app.db.repositories.holo_member import (
+    HoloMemberRepository,
+    holo_member_batchers
+)
+from app.models.holo_member import HoloMemberCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestWriteBatcher:
+    async def test_concurrent_writes_are_batched(self) -> None:
+        batches: List[List[int]] = []
+
+        async def write_many(items: List[int]) -> List[int]:
+            batches.append(items)
+            return [item * 10 for item in items]
+
+        async def write_one(item: int) -> int:
+            raise AssertionError("not expected")
+
+        batcher = WriteBatcher(
+            write_many, write_one, max_size=3, max_delay=0.01)
+        results = await asyncio.gather(
+            *(batcher.submit(item) for item in range(5)))
+        assert results == [0, 10, 20, 30, 40]
+        # 3件溜まった時点で書き込み、残りは max_delay 後に書き込む
+        assert batches == [[0, 1, 2], [3, 4]]
+        assert batcher.stats() == {
+            "batches": 2, "writes": 5, "fallbacks": 0, "pending": 0}
+
+    async def test_failed_batch_returns_each_error(self) -> None:
+        async def write_many(items: List[int]) -> List[int]:
+            if any(item < 0 for item in items):
+                raise ValueError("invalid batch")
+            return items
+
+        async def write_one(item: int) -> int:
+            if item < 0:
+                raise ValueError(f"invalid item {item}")
+            return item
+
+        batcher = WriteBatcher(
+            write_many, write_one, max_size=10, max_delay=0.001)
+        results = await asyncio.gather(
+            batcher.submit(1),
+            batcher.submit(-1),
+            batcher.submit(2),
+            return_exceptions=True)
+        assert results[0] == 1 and results[2] == 2
+        assert str(results[1]) == "invalid item -1"
+        assert batcher.fallbacks == 1
+
+
+class TestCreateHoloMemberBatching:
+    async def test_concurrent_creates_share_one_insert(
+        self,
+        client: AsyncClient,
+        db: Database,
+        monkeypatch
+    ) -> None:
+        monkeypatch.setattr(config, 'HOLO_MEMBER_WRITE_BATCH_ENABLED', True)
+        repo = HoloMemberRepository(db)
+        new_holo_members = [
+            HoloMemberCreate(
+                type="3", name=f"batched {i}", description="batched",
+                twitter="fake", age=i)
+            for i in range(5)
+        ]
+        # numeric(10, 1) に収まらないので INSERT が失敗する
+        new_holo_members.append(HoloMemberCreate(
+            type="3", name="overflow", description="overflow",
+            twitter="fake", age=10 ** 12))
+
+        results = await asyncio.gather(
+            *(repo.create_holo_member(new_holo_member=item)
+              for item in new_holo_members),
+            return_exceptions=True)
+        assert [item.name for item in results[:5]] == [
+            f"batched {i}" for i in range(5)]
+        assert isinstance(results[5], DataError)
+        assert holo_member_batchers[db].stats()["fallbacks"] == 1
+
+        created = await repo.get_holo_member_by_ids(
+            ids=[item.id for item in results[:5]])
+        assert sorted(item.name for item in created.values()) == [
+            f"batched {i}" for i in range(5)]
@@ -0,0 +1,54 @@
+import pytest
+
+from app.db.broadcast import DROPPED_EVENT, Broadcaster
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestBroadcaster:
+    async def test_publish_fans_out_to_subscribers(self) -> None:
+        broadcaster = Broadcaster(queue_size=10)
+        first = broadcaster.subscribe()
+        second = broadcaster.subscribe()
+        broadcaster.publish({"op": "INSERT", "id": 1})
+
+        assert await first.get() == {"op": "INSERT", "id": 1}
+        assert await second.get() == {"op": "INSERT", "id": 1}
+
+        broadcaster.unsubscribe(second)
+        broadcaster.publish({"op": "DELETE", "id": 1})
+        assert await first.get() == {"op": "DELETE", "id": 1}
+        assert second.empty()
+        assert broadcaster.stats() == {
+            "subscribers": 1, "published": 2, "dropped": 0}
+
+    async def test_slow_subscriber_is_dropped(self) -> None:
+        broadcaster = Broadcaster(queue_size=2)
+        slow = broadcaster.subscribe()
+        fast = broadcaster.subscribe()
+        for id in range(3):
+            broadcaster.publish({"op": "UPDATE", "id": id})
+            await fast.get()
+
+        # 溜まっていた通知は捨てられ、切り離されたことだけが届く
+        assert await slow.get() is DROPPED_EVENT
+        assert await slow.get() is None
+        assert broadcaster.stats() == {
+            "subscribers": 1, "published": 3, "dropped": 1}
+
+    async def test_close_ends_all_subscriptions(self) -> None:
+        broadcaster = Broadcaster(queue_size=2)
+        queue = broadcaster.subscribe()
+        broadcaster.publish({"op": "INSERT", "id": 1})
+        broadcaster.close()
+
+        assert await queue.get() is None
+        assert broadcaster.subscribers == 0
+
+    async def test_subscribe_after_close_ends_immediately(self) -> None:
+        broadcaster = Broadcaster(queue_size=2)
+        broadcaster.close()
+        queue = broadcaster.subscribe()
+
+        assert await queue.get() is None
+        assert broadcaster.subscribers == 0
@@ -0,0 +1,51 @@
+import pytest
+
+from app.db.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self, clock: FakeClock) -> None:
+        cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        assert cache.get(1) == "a"
+        cache.set(3, "c")
+
+        assert cache.get(2) is None
+        assert cache.get(1) == "a"
+        assert cache.get(3) == "c"
+        assert cache.stats() == {
+            "size": 2, "maxsize": 2, "hits": 3, "misses": 1}
+
+    def test_expires_after_ttl(self, clock: FakeClock) -> None:
+        cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+        cache.set(1, "a")
+        clock.now = 9.9
+        assert cache.get(1) == "a"
+        clock.now = 10
+        assert cache.get(1) is None
+
+    def test_set_is_skipped_after_invalidation(self, clock: FakeClock) -> None:
+        cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+        generation = cache.generation
+        cache.invalidate(1)
+        cache.set(1, "stale", generation=generation)
+        assert cache.get(1) is None
+
+    def test_zero_maxsize_disables_cache(self, clock: FakeClock) -> None:
+        cache = LRUCache(maxsize=0, ttl=10, clock=clock)
+        cache.set(1, "a")
+        assert cache.get(1) is None
@@ -0,0 +1,237 @@
+import asyncio
+import gzip
+
+import pytest
+from databases import Database
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette.status import HTTP_200_OK
+
+from app.api.compression import brotli, negotiate_encoding
+from app.api.routes.holo_member import holo_member_list_cache
+from app.core import config
+from app.db.replicas import ReplicaSet
+from app.db.repositories.holo_member import (
+    HoloMemberRepository,
+    holo_member_version
+)
+from app.models.holo_member import HoloMemberCreate, HoloMemberInDB
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestNegotiateEncoding:
+    @pytest.mark.parametrize(
+        'accept_encoding, expected',
+        (
+            (None, None),
+            ('identity', None),
+            ('gzip', 'gzip'),
+            ('gzip;q=0', None),
+            ('*', 'br' if brotli is not None else 'gzip'),
+            ('gzip, br', 'br' if brotli is not None else 'gzip'),
+            ('gzip;q=1.0, br;q=0.5', 'gzip'),
+        ),
+    )
+    async def test_negotiate_encoding(
+        self,
+        accept_encoding: str,
+        expected: str
+    ) -> None:
+        assert negotiate_encoding(accept_encoding) == expected
+
+
+class TestCompressionMiddleware:
+    @pytest.fixture
+    def app(self, monkeypatch) -> FastAPI:
+        monkeypatch.setattr(config, 'COMPRESSION_MINIMUM_SIZE', 100)
+        from app.api.server import get_application
+        return get_application()
+
+    async def test_compresses_above_threshold(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:lookup-holo_member')
+        res = await client.post(
+            url,
+            json={'ids': [test_holo_member.id] * 2},
+            headers={'Accept-Encoding': 'gzip'})
+        assert res.status_code == HTTP_200_OK
+        assert res.headers['content-encoding'] == 'gzip'
+        assert res.headers['vary'] == 'Accept-Encoding'
+        assert res.json()['holo_members'][0]['id'] == test_holo_member.id
+
+        res = await client.post(
+            url, json={'ids': [50000]}, headers={'Accept-Encoding': 'gzip'})
+        assert 'content-encoding' not in res.headers
+
+        res = await client.post(
+            url,
+            json={'ids': [test_holo_member.id]},
+            headers={'Accept-Encoding': 'identity'})
+        assert 'content-encoding' not in res.headers
+
+    async def test_compresses_streaming_response(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        async with client.stream(
+            'GET',
+            app.url_path_for('holo_member:export-holo_member'),
+            headers={'Accept-Encoding': 'gzip'}
+        ) as res:
+            assert res.headers['content-encoding'] == 'gzip'
+            assert 'content-length' not in res.headers
+            body = b''.join([chunk async for chunk in res.aiter_raw()])
+        lines = gzip.decompress(body).decode().splitlines()
+        assert str(test_holo_member.id) in lines[-1]
+
+
+class StubReplica:
+    # version まで反映したレプリカとして rows を返す
+    def __init__(self, version: int, rows: list) -> None:
+        self.version = version
+        self.rows = rows
+
+    async def fetch_val(self, query: str, values: dict = None) -> int:
+        return self.version
+
+    async def fetch_all(self, query: str, values: dict = None) -> list:
+        return self.rows
+
+    async def disconnect(self) -> None:
+        pass
+
+
+class TestListResponseCache:
+    @pytest.fixture(autouse=True)
+    def small_threshold(self, monkeypatch) -> None:
+        monkeypatch.setattr(config, 'COMPRESSION_MINIMUM_SIZE', 100)
+
+    async def test_list_is_cached_until_table_changes(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        params = {'order_by': '-id', 'limit': 10}
+        first = await client.get(url, params=params)
+        hits = holo_member_list_cache.hits
+        second = await client.get(url, params=params)
+        assert holo_member_list_cache.hits == hits + 1
+        assert second.content == first.content
+
+        created = await HoloMemberRepository(db).create_holo_member(
+            new_holo_member=HoloMemberCreate(**test_holo_member.dict()))
+        third = await client.get(url, params=params)
+        assert created.id in [item['id'] for item in third.json()]
+
+    async def test_cached_list_does_not_query_version(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        await client.get(url)
+        refreshes = holo_member_version.refreshes
+        await client.get(url)
+        assert holo_member_version.refreshes == refreshes
+
+        # 別のワーカーからの更新を想定してリポジトリを通さずに更新する
+        await db.execute(
+            "UPDATE holo_member SET name = 'renamed in list' WHERE id = :id",
+            values={'id': test_holo_member.id}
+        )
+        for _ in range(50):
+            res = await client.get(url, params={'all': 'true'})
+            if 'renamed in list' in [item['name'] for item in res.json()]:
+                break
+            await asyncio.sleep(0.02)
+        assert 'renamed in list' in [item['name'] for item in res.json()]
+
+    async def test_concurrent_misses_are_coalesced(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        await client.get(url)
+        holo_member_list_cache.clear()
+        coalesced = holo_member_list_cache.coalesced
+
+        responses = await asyncio.gather(
+            *(client.get(url, params={'limit': 3}) for _ in range(5)))
+        assert {res.content for res in responses} == {responses[0].content}
+        assert holo_member_list_cache.coalesced > coalesced
+
+    async def test_unpaginated_list_is_not_stored(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        holo_member_list_cache.clear()
+        hits = holo_member_list_cache.hits
+        for _ in range(2):
+            res = await client.get(
+                url,
+                params={'all': 'true'},
+                headers={'Accept-Encoding': 'gzip'})
+            assert res.status_code == HTTP_200_OK
+            assert test_holo_member.id in [item['id'] for item in res.json()]
+        assert holo_member_list_cache.hits == hits
+        assert holo_member_list_cache.stats()['size'] == 0
+
+    async def test_cached_list_is_compressed_per_encoding(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        params = {'order_by': '-id'}
+        encodings = ['gzip', 'br'] if brotli is not None else ['gzip']
+        plain = await client.get(
+            url, params=params, headers={'Accept-Encoding': 'identity'})
+        assert 'content-encoding' not in plain.headers
+        for encoding in encodings * 2:
+            res = await client.get(
+                url, params=params, headers={'Accept-Encoding': encoding})
+            assert res.headers['content-encoding'] == encoding
+            assert res.content == plain.content
+
+    async def test_list_reads_replica_only_when_caught_up(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        replica_row = {
+            **test_holo_member.dict(),
+            'name': 'read from replica',
+            'updated_at': None
+        }
+
+        # 遅れているレプリカの行はキャッシュに入れずプライマリから読む
+        holo_member_list_cache.clear()
+        app.state._replicas = ReplicaSet([StubReplica(0, [replica_row])])
+        res = await client.get(url, params={'all': 'true'})
+        assert test_holo_member.id in [item['id'] for item in res.json()]
+        assert 'read from replica' not in [item['name'] for item in res.json()]
+
+        holo_member_list_cache.clear()
+        app.state._replicas = ReplicaSet([StubReplica(2 ** 62, [replica_row])])
+        res = await client.get(url, params={'all': 'true'})
+        assert [item['name'] for item in res.json()] == ['read from replica']
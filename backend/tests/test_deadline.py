@@ -0,0 +1,388 @@
+import asyncio
+import time
+from typing import Callable
+
+import asyncpg
+import pytest
+from databases import Database
+from fastapi import FastAPI, Request
+from httpx import AsyncClient
+from starlette.status import HTTP_200_OK, HTTP_504_GATEWAY_TIMEOUT
+
+from app.api.middleware.deadline import DeadlineMiddleware
+from app.api.routes.holo_member import holo_member_list_cache
+from app.core.deadline import (
+    later_deadline,
+    parse_timeout,
+    remaining,
+    request_deadline
+)
+from app.db.loader import DataLoader
+from app.db.repositories.holo_member import holo_member_cache
+from app.db.tasks import get_database_url
+from app.models.holo_member import HoloMemberInDB
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    (
+        (None, 30.0),
+        ('5', 5.0),
+        ('0.25', 0.25),
+        ('120', 60.0),
+        ('invalid', 30.0),
+        ('-1', 30.0),
+    ),
+)
+async def test_parse_timeout(value: str, expected: float) -> None:
+    assert parse_timeout(value, 30.0, 60.0) == expected
+
+
+@pytest.mark.parametrize(
+    'deadline, other, expected',
+    (
+        (1.0, 2.0, 2.0),
+        (2.0, 1.0, 2.0),
+        (None, 1.0, None),
+        (1.0, None, None),
+    ),
+)
+async def test_later_deadline(
+    deadline: float,
+    other: float,
+    expected: float
+) -> None:
+    assert later_deadline(deadline, other) == expected
+
+
+async def running_sleeps(db: Database) -> int:
+    return await db.fetch_val(
+        "SELECT count(*) FROM pg_stat_activity "
+        "WHERE query LIKE 'SELECT pg_sleep%' AND state = 'active'")
+
+
+@pytest.fixture
+def sleep_app(db: Database) -> DeadlineMiddleware:
+    app = FastAPI()
+
+    @app.get('/sleep/')
+    async def sleep(seconds: float) -> dict:
+        await db.execute(f"SELECT pg_sleep({seconds})")
+        return {"remaining": remaining()}
+
+    @app.post('/sleep/')
+    async def sleep_after_body(request: Request, seconds: float) -> dict:
+        await request.body()
+        await db.execute(f"SELECT pg_sleep({seconds})")
+        return {"remaining": remaining()}
+
+    return DeadlineMiddleware(
+        app, timeout=5.0, max_timeout=10.0, header='X-Request-Timeout')
+
+
+class TestDeadlineMiddleware:
+    async def test_request_within_deadline(
+        self,
+        client: AsyncClient,
+        sleep_app: DeadlineMiddleware
+    ) -> None:
+        async with AsyncClient(
+            app=sleep_app, base_url="http://testserver"
+        ) as sleep_client:
+            res = await sleep_client.get(
+                '/sleep/',
+                params={'seconds': 0},
+                headers={'X-Request-Timeout': '2'})
+        assert res.status_code == HTTP_200_OK
+        assert 0 < res.json()['remaining'] <= 2
+
+    async def test_query_is_cancelled_past_deadline(
+        self,
+        client: AsyncClient,
+        db: Database,
+        sleep_app: DeadlineMiddleware
+    ) -> None:
+        started_at = time.perf_counter()
+        async with AsyncClient(
+            app=sleep_app, base_url="http://testserver"
+        ) as sleep_client:
+            res = await sleep_client.get(
+                '/sleep/',
+                params={'seconds': 5},
+                headers={'X-Request-Timeout': '0.2'})
+        assert res.status_code == HTTP_504_GATEWAY_TIMEOUT
+        assert time.perf_counter() - started_at < 2
+        # サーバー側のクエリも取り消されている
+        for _ in range(50):
+            if await running_sleeps(db) == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert await running_sleeps(db) == 0
+
+    async def test_query_is_cancelled_on_disconnect(
+        self,
+        client: AsyncClient,
+        db: Database,
+        sleep_app: DeadlineMiddleware
+    ) -> None:
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/sleep/",
+            "root_path": "",
+            "query_string": b"seconds=5",
+            "headers": [],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 1234),
+        }
+        messages = [
+            {"type": "http.request", "body": b"", "more_body": False}]
+        sent = []
+
+        async def receive() -> dict:
+            if messages:
+                return messages.pop(0)
+            # クエリの実行中にクライアントが切断する
+            await asyncio.sleep(0.2)
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+
+        started_at = time.perf_counter()
+        await sleep_app(scope, receive, send)
+        assert time.perf_counter() - started_at < 2
+        assert sent == []
+        for _ in range(50):
+            if await running_sleeps(db) == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert await running_sleeps(db) == 0
+
+    async def test_body_is_passed_through_without_buffering(self) -> None:
+        chunks = [
+            {"type": "http.request", "body": b"[1,", "more_body": True},
+            {"type": "http.request", "body": b"2]", "more_body": False},
+        ]
+        received = 0
+        received_before_app = None
+        sent = []
+
+        async def receive() -> dict:
+            nonlocal received
+            if received < len(chunks):
+                received += 1
+                return chunks[received - 1]
+            await asyncio.sleep(10)
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+
+        async def app(scope: dict, receive: Callable, send: Callable) -> None:
+            nonlocal received_before_app
+            received_before_app = received
+            body = b""
+            more_body = True
+            while more_body:
+                message = await receive()
+                body += message["body"]
+                more_body = message["more_body"]
+            await send({"type": "http.response.start", "status": 200})
+            await send({"type": "http.response.body", "body": body})
+
+        middleware = DeadlineMiddleware(
+            app, timeout=5.0, max_timeout=10.0, header='X-Request-Timeout')
+        scope = {
+            "type": "http",
+            "headers": [(b"content-length", b"5")],
+        }
+        await middleware(scope, receive, send)
+        # 本文は処理が読むまで受け取らない
+        assert received_before_app == 0
+        assert sent[-1]["body"] == b"[1,2]"
+
+    async def test_query_is_cancelled_on_disconnect_after_body(
+        self,
+        client: AsyncClient,
+        db: Database,
+        sleep_app: DeadlineMiddleware
+    ) -> None:
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/sleep/",
+            "root_path": "",
+            "query_string": b"seconds=5",
+            "headers": [(b"content-length", b"2")],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 1234),
+        }
+        messages = [
+            {"type": "http.request", "body": b"{}", "more_body": False}]
+
+        async def receive() -> dict:
+            if messages:
+                return messages.pop(0)
+            # 本文を送り終えた後、クエリの実行中にクライアントが切断する
+            await asyncio.sleep(0.2)
+            return {"type": "http.disconnect"}
+
+        sent = []
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+
+        started_at = time.perf_counter()
+        await sleep_app(scope, receive, send)
+        assert time.perf_counter() - started_at < 2
+        assert sent == []
+        for _ in range(50):
+            if await running_sleeps(db) == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert await running_sleeps(db) == 0
+
+    async def test_query_is_cancelled_with_request_task(
+        self,
+        client: AsyncClient,
+        db: Database,
+        sleep_app: DeadlineMiddleware
+    ) -> None:
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/sleep/",
+            "root_path": "",
+            "query_string": b"seconds=5",
+            "headers": [],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 1234),
+        }
+        messages = [
+            {"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive() -> dict:
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(10)
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            pass
+
+        # サーバーがリクエストのタスクを取り消す (停止時に接続を打ち切る場合)
+        request = asyncio.ensure_future(sleep_app(scope, receive, send))
+        for _ in range(50):
+            if await running_sleeps(db) == 1:
+                break
+            await asyncio.sleep(0.02)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        # タスクが終わった時点でクエリも取り消されている
+        for _ in range(50):
+            if await running_sleeps(db) == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert await running_sleeps(db) == 0
+
+
+class TestDataLoader:
+    async def test_batch_runs_until_latest_deadline(self) -> None:
+        deadlines = []
+
+        async def batch_load(keys: list) -> dict:
+            deadlines.append(request_deadline.get())
+            return {key: key for key in keys}
+
+        loader = DataLoader(batch_load)
+
+        async def load(key: int, deadline: float) -> int:
+            request_deadline.set(deadline)
+            return await loader.load(key)
+
+        assert await asyncio.gather(load(1, 1.0), load(2, 2.0)) == [1, 2]
+        assert await asyncio.gather(load(1, 1.0), load(2, None)) == [1, 2]
+        assert deadlines == [2.0, None]
+
+    async def test_last_cancelled_load_cancels_batch(self) -> None:
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def batch_load(keys: list) -> dict:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return {}
+
+        loader = DataLoader(batch_load)
+        loads = [asyncio.ensure_future(loader.load(key)) for key in (1, 2)]
+        await started.wait()
+        loads[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+        loads[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+
+class TestRepositoryCancellation:
+    # 別の接続でテーブルをロックし、リポジトリのクエリを待たせる
+    @pytest.fixture
+    async def locked_table(self, client: AsyncClient) -> asyncpg.Connection:
+        connection = await asyncpg.connect(str(get_database_url()))
+        transaction = connection.transaction()
+        await transaction.start()
+        await connection.execute(
+            "LOCK TABLE holo_member IN ACCESS EXCLUSIVE MODE")
+        yield connection
+        await transaction.rollback()
+        await connection.close()
+
+    async def waiting_queries(self, connection: asyncpg.Connection) -> int:
+        return await connection.fetchval(
+            "SELECT count(*) FROM pg_stat_activity "
+            "WHERE wait_event_type = 'Lock' AND pid <> pg_backend_pid()")
+
+    @pytest.mark.parametrize(
+        'name, params',
+        (
+            ('holo_member:get-all-holo_member', {}),
+            ('holo_member:get-holo_member-by-id', {'id': 1}),
+        ),
+    )
+    async def test_query_is_cancelled_past_deadline(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB,
+        locked_table: asyncpg.Connection,
+        name: str,
+        params: dict
+    ) -> None:
+        holo_member_cache.clear()
+        holo_member_list_cache.clear()
+        started_at = time.perf_counter()
+        res = await client.get(
+            app.url_path_for(name, **params),
+            headers={'X-Request-Timeout': '0.3'})
+        assert res.status_code == HTTP_504_GATEWAY_TIMEOUT
+        assert time.perf_counter() - started_at < 2
+
+        # ロックが解放される前にリポジトリのクエリが取り消されている
+        for _ in range(50):
+            if await self.waiting_queries(locked_table) == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert await self.waiting_queries(locked_table) == 0
@@ -1,8 +1,19 @@
+import asyncio
+import json
+
 import pytest
+from databases import Database
 from fastapi import FastAPI
 from httpx import AsyncClient
 from typing import List
 
+from app.core import config
+from app.db.repositories.holo_member import (
+    HoloMemberRepository,
+    holo_member_cache,
+    holo_member_loaders
+)
+from app.db.replicas import ReplicaSet
 from app.models.holo_member import (
     HoloMemberCreate,
     HoloMemberInDB
@@ -11,6 +22,7 @@ from app.models.holo_member import (
 from starlette.status import (
     HTTP_200_OK,
     HTTP_201_CREATED,
+    HTTP_304_NOT_MODIFIED,
     HTTP_404_NOT_FOUND,
     HTTP_422_UNPROCESSABLE_ENTITY,
 )
@@ -19,6 +31,18 @@ from starlette.status import (
 pytestmark = pytest.mark.asyncio
 
 
+class LaggingReplica:
+    # 書き込みがまだ反映されていないレプリカ (rows の内容を返し続ける)
+    def __init__(self, rows: List[dict]) -> None:
+        self.rows = rows
+
+    async def fetch_all(self, query: str, values: dict) -> List[dict]:
+        return [row for row in self.rows if row['id'] in values['ids']]
+
+    async def disconnect(self) -> None:
+        pass
+
+
 @pytest.fixture
 def new_holo_member():
     return HoloMemberCreate(
@@ -101,6 +125,65 @@ class TestCreateHoloMember:
         )
         assert res.status_code == status_code
 
+    async def test_bulk_create_holo_member_in_request_order(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        new_holo_members = [
+            new_holo_member.copy(update={'name': f'bulk {i}'})
+            for i in range(5)
+        ]
+        holo_member_repo = HoloMemberRepository(db)
+        created = await holo_member_repo.create_holo_members(
+            new_holo_members=new_holo_members, batch_size=2
+        )
+        assert [item.name for item in created] == [
+            item.name for item in new_holo_members]
+        assert len({item.id for item in created}) == len(new_holo_members)
+
+        res = await client.post(
+            app.url_path_for('holo_member:bulk-create-holo_member'),
+            json={'new_holo_members': [
+                item.dict() for item in new_holo_members]}
+        )
+        assert res.status_code == HTTP_201_CREATED
+        assert [
+            HoloMemberCreate(**item) for item in res.json()
+        ] == new_holo_members
+
+    @pytest.mark.parametrize(
+        'invalid_payload, status_code',
+        (
+            (None, 422),
+            ([], 422),
+            ([{'name': 'test_name'}], 422),
+            # twitter は DB 上 NOT NULL なので INSERT で失敗する
+            ([{'type': '3', 'name': 'valid', 'twitter': 'a', 'age': 1},
+              {'type': '3', 'name': 'invalid', 'age': 1}], 400),
+        ),
+    )
+    async def test_bulk_create_invalid_input_creates_nothing(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        invalid_payload: list,
+        status_code: int
+    ) -> None:
+        list_url = app.url_path_for('holo_member:get-all-holo_member')
+        before = await client.get(list_url, params={'all': True})
+
+        res = await client.post(
+            app.url_path_for('holo_member:bulk-create-holo_member'),
+            json={'new_holo_members': invalid_payload}
+        )
+        assert res.status_code == status_code
+
+        after = await client.get(list_url, params={'all': True})
+        assert len(after.json()) == len(before.json())
+
 # Get Test
 
 
@@ -159,17 +242,662 @@ class TestGetHoloMember:
         holo_member = [HoloMemberInDB(**item) for item in res.json()]
         assert test_holo_member in holo_member
 
-# FIXME: Updateのテストが通るように修正
+    async def test_get_all_holo_member_follows_cursor(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        res = await client.get(url, params={'all': True})
+        assert res.status_code == HTTP_200_OK
+        all_ids = [item['id'] for item in res.json()]
+
+        paged_ids = []
+        params = {'limit': 2}
+        while True:
+            res = await client.get(url, params=params)
+            assert res.status_code == HTTP_200_OK
+            assert len(res.json()) <= 2
+            paged_ids.extend(item['id'] for item in res.json())
+            next_cursor = res.headers.get('X-Next-Cursor')
+            if next_cursor is None:
+                assert 'Link' not in res.headers
+                break
+            assert 'rel="next"' in res.headers['Link']
+            params = {'limit': 2, 'after': next_cursor}
+
+        assert paged_ids == sorted(all_ids)
+        assert test_holo_member.id in paged_ids
+
+    @pytest.mark.parametrize(
+        'order_by', ('id', '-id', 'name', '-name', 'updated_at', '-updated_at'))
+    async def test_get_all_holo_member_sorted_pages(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate,
+        order_by: str
+    ) -> None:
+        await HoloMemberRepository(db).create_holo_members(
+            new_holo_members=[
+                new_holo_member.copy(update={'name': name})
+                for name in ('sort b', 'sort a', 'sort b', 'sort c')
+            ])
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        res = await client.get(
+            url, params={'all': True, 'order_by': order_by})
+        all_ids = [item['id'] for item in res.json()]
+
+        paged_ids = []
+        params = {'limit': 3, 'order_by': order_by}
+        while True:
+            res = await client.get(url, params=params)
+            assert res.status_code == HTTP_200_OK
+            paged_ids.extend(item['id'] for item in res.json())
+            if 'X-Next-Cursor' not in res.headers:
+                break
+            params['after'] = res.headers['X-Next-Cursor']
+        assert paged_ids == all_ids
+
+        if order_by.lstrip('-') == 'name':
+            res = await client.get(
+                url, params={'all': True, 'order_by': order_by})
+            names = [
+                item['name'] for item in res.json()
+                if item['name'].startswith('sort ')
+            ]
+            assert names == sorted(names, reverse=order_by.startswith('-'))
+
+    async def test_get_all_holo_member_filters(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        await HoloMemberRepository(db).create_holo_members(
+            new_holo_members=[
+                new_holo_member.copy(
+                    update={'name': '100%_filter', 'type': 'EN', 'age': 10}),
+                new_holo_member.copy(
+                    update={'name': '100%xfilter', 'type': 'EN', 'age': 20}),
+                new_holo_member.copy(
+                    update={'name': '100%_filter', 'type': 'ID', 'age': 30}),
+            ])
+        url = app.url_path_for('holo_member:get-all-holo_member')
+
+        res = await client.get(
+            url, params={'all': True, 'name_prefix': '100%_'})
+        assert [item['type'] for item in res.json()] == ['EN', 'ID']
+
+        res = await client.get(url, params={
+            'all': True, 'name_prefix': '100%', 'type': 'EN', 'min_age': 15})
+        assert [item['name'] for item in res.json()] == ['100%xfilter']
+
+        res = await client.get(url, params={
+            'all': True, 'name_prefix': '100%', 'max_age': 25})
+        assert [item['age'] for item in res.json()] == [10, 20]
+
+    async def test_cursor_is_bound_to_order(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        res = await client.get(url, params={'limit': 1, 'order_by': 'name'})
+        res = await client.get(url, params={
+            'limit': 1, 'after': res.headers['X-Next-Cursor']})
+        assert res.status_code == 400
+
+    async def test_get_all_holo_member_sparse_fields(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        res = await client.get(url, params={
+            'fields': 'name,type', 'order_by': '-updated_at', 'limit': 1})
+        assert res.status_code == HTTP_200_OK
+        assert [set(item) for item in res.json()] == [{'id', 'type', 'name'}]
+
+        # 並び替えのキーは返さなくてもカーソルで次のページを読める
+        res = await client.get(url, params={
+            'fields': 'age', 'order_by': 'name', 'limit': 1})
+        assert set(res.json()[0]) == {'id', 'age'}
+        res = await client.get(url, params={
+            'fields': 'age',
+            'order_by': 'name',
+            'limit': 1,
+            'after': res.headers['X-Next-Cursor']})
+        assert res.status_code == HTTP_200_OK
+        assert set(res.json()[0]) == {'id', 'age'}
+
+    async def test_get_holo_member_by_id_sparse_fields(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for(
+            "holo_member:get-holo_member-by-id", id=test_holo_member.id)
+        # キャッシュにない場合とある場合で同じ形で返す
+        for _ in range(2):
+            res = await client.get(url, params={'fields': 'name'})
+            assert res.status_code == HTTP_200_OK
+            assert res.json() == {
+                'id': test_holo_member.id, 'name': test_holo_member.name}
+            holo_member_cache.clear()
+        await client.get(url)
+
+        res = await client.get(url, params={'fields': 'twitter'})
+        assert res.json() == {
+            'id': test_holo_member.id, 'twitter': test_holo_member.twitter}
+
+        res = await client.get(
+            app.url_path_for("holo_member:get-holo_member-by-id", id=50000),
+            params={'fields': 'name'})
+        assert res.status_code == HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize(
+        'params, status_code',
+        (
+            ({'after': 'invalid cursor'}, 400),
+            ({'after': 'e30'}, 400),
+            ({'limit': 0}, 422),
+            ({'order_by': 'age'}, 422),
+            ({'type': 'invalid type'}, 422),
+            ({'fields': 'password'}, 400),
+            ({'fields': ','}, 400),
+        ),
+    )
+    async def test_get_all_holo_member_invalid_params(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        params: dict,
+        status_code: int
+    ) -> None:
+        res = await client.get(
+            app.url_path_for('holo_member:get-all-holo_member'),
+            params=params
+        )
+        assert res.status_code == status_code
+
+# Lookup Test
+
+
+class TestLookupHoloMember:
+    async def test_lookup_holo_member_keeps_request_order(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        created = await HoloMemberRepository(db).create_holo_members(
+            new_holo_members=[new_holo_member] * 3)
+        ids = [created[2].id, 50000, created[0].id, created[1].id]
+
+        res = await client.post(
+            app.url_path_for('holo_member:lookup-holo_member'),
+            json={'ids': ids}
+        )
+        assert res.status_code == HTTP_200_OK
+        assert [
+            item['id'] for item in res.json()['holo_members']
+        ] == [created[2].id, created[0].id, created[1].id]
+        assert res.json()['missing_ids'] == [50000]
+
+    @pytest.mark.parametrize(
+        'invalid_payload, status_code',
+        (
+            (None, 422),
+            ([], 422),
+            (['a'], 422),
+        ),
+    )
+    async def test_lookup_invalid_input_raises_error(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        invalid_payload: list,
+        status_code: int
+    ) -> None:
+        res = await client.post(
+            app.url_path_for('holo_member:lookup-holo_member'),
+            json={'ids': invalid_payload}
+        )
+        assert res.status_code == status_code
+
+    async def test_concurrent_get_by_id_is_batched(
+        self,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        holo_member_repo = HoloMemberRepository(db)
+        created = await holo_member_repo.create_holo_members(
+            new_holo_members=[new_holo_member] * 3)
+        holo_member_cache.clear()
+
+        results = await asyncio.gather(*(
+            holo_member_repo.get_holo_member_by_id(id=item.id)
+            for item in created
+        ), holo_member_repo.get_holo_member_by_id(id=50000))
+        assert results == created + [None]
+        assert holo_member_loaders[db].batches == 1
+
+# Cache Test
+
+
+class TestHoloMemberCache:
+    async def test_get_holo_member_by_id_is_cached(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for(
+            'holo_member:get-holo_member-by-id', id=test_holo_member.id)
+        # キャッシュにはプライマリから読んだ行だけが入る
+        await client.get(url, headers={config.READ_PRIMARY_HEADER: '1'})
+        hits = holo_member_cache.hits
+
+        res = await client.get(url)
+        assert res.status_code == HTTP_200_OK
+        assert HoloMemberInDB(**res.json()) == test_holo_member
+        assert holo_member_cache.hits == hits + 1
+
+    async def test_cache_is_invalidated_by_external_write(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for(
+            'holo_member:get-holo_member-by-id', id=test_holo_member.id)
+        await client.get(url)
+
+        # 別のワーカーからの更新を想定してリポジトリを通さずに更新する
+        await db.execute(
+            "UPDATE holo_member SET name = 'renamed elsewhere' WHERE id = :id",
+            values={'id': test_holo_member.id}
+        )
+        for _ in range(50):
+            res = await client.get(url)
+            if res.json()['name'] == 'renamed elsewhere':
+                break
+            await asyncio.sleep(0.02)
+        assert res.json()['name'] == 'renamed elsewhere'
+
+    async def test_cache_is_not_used_while_listener_is_down(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for(
+            'holo_member:get-holo_member-by-id', id=test_holo_member.id)
+        listener = app.state._listener
+        listener.retry_interval = 0.5
+        await db.execute(
+            "SELECT pg_terminate_backend(:pid)",
+            values={"pid": listener._connection.get_server_pid()})
+        while listener.is_listening:
+            await asyncio.sleep(0.01)
+
+        # 切断中は他のワーカーの更新が届かないのでキャッシュから返さず、入れもしない
+        hits = holo_member_cache.hits
+        await client.get(url, headers={config.READ_PRIMARY_HEADER: '1'})
+        await db.execute(
+            "UPDATE holo_member SET name = 'renamed elsewhere' WHERE id = :id",
+            values={'id': test_holo_member.id}
+        )
+        res = await client.get(url)
+        assert res.json()['name'] == 'renamed elsewhere'
+        assert holo_member_cache.hits == hits
+        assert holo_member_cache.get(test_holo_member.id) is None
+
+        # 接続し直した後は再びキャッシュする
+        while not listener.is_listening:
+            await asyncio.sleep(0.01)
+        await client.get(url, headers={config.READ_PRIMARY_HEADER: '1'})
+        hits = holo_member_cache.hits
+        res = await client.get(url)
+        assert res.json()['name'] == 'renamed elsewhere'
+        assert holo_member_cache.hits == hits + 1
+
+    async def test_replica_rows_are_not_cached(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for(
+            'holo_member:get-holo_member-by-id', id=test_holo_member.id)
+        await client.get(url, headers={config.READ_PRIMARY_HEADER: '1'})
+        stale = {**test_holo_member.dict(), 'updated_at': None}
+        app.state._replicas = ReplicaSet([LaggingReplica([stale])])
+
+        res = await client.put(
+            app.url_path_for(
+                'holo_member:update-holo_member-by-id',
+                id=test_holo_member.id),
+            json={'holo_member_update': {'name': 'written to primary'}})
+        assert res.status_code == HTTP_200_OK
+
+        # 遅れているレプリカからは古い行が返るが、キャッシュには入れない
+        res = await client.get(url)
+        assert res.json()['name'] == test_holo_member.name
+        assert holo_member_cache.get(test_holo_member.id) is None
+
+        # プライマリを指定した読み込みは自分の書き込みを読める
+        res = await client.get(url, headers={config.READ_PRIMARY_HEADER: '1'})
+        assert res.json()['name'] == 'written to primary'
+        assert holo_member_cache.get(
+            test_holo_member.id).name == 'written to primary'
+
+        res = await client.post(
+            app.url_path_for('holo_member:lookup-holo_member'),
+            json={'ids': [test_holo_member.id]},
+            headers={config.READ_PRIMARY_HEADER: '1'})
+        assert res.json()['holo_members'][0]['name'] == 'written to primary'
+
+# Conditional GET Test
+
+
+class TestHoloMemberConditionalGet:
+    async def test_get_holo_member_by_id_not_modified(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for(
+            'holo_member:get-holo_member-by-id', id=test_holo_member.id)
+        res = await client.get(url)
+        etag = res.headers['ETag']
+        assert etag.startswith('W/"')
+        assert res.headers['Cache-Control'] == config.HOLO_MEMBER_CACHE_CONTROL
+
+        res = await client.get(url, headers={'If-None-Match': etag})
+        assert res.status_code == HTTP_304_NOT_MODIFIED
+        assert res.content == b''
+        assert res.headers['ETag'] == etag
+
+        # fields が異なれば別の表現になる
+        res = await client.get(
+            url, params={'fields': 'name'}, headers={'If-None-Match': etag})
+        assert res.status_code == HTTP_200_OK
+        assert res.headers['ETag'] != etag
+
+        await client.patch(url, json={'holo_member_update': {'age': 20}})
+        res = await client.get(url, headers={'If-None-Match': etag})
+        assert res.status_code == HTTP_200_OK
+        assert res.json()['age'] == 20
+        assert res.headers['ETag'] != etag
+
+    async def test_get_all_holo_member_not_modified(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        url = app.url_path_for('holo_member:get-all-holo_member')
+        res = await client.get(url)
+        etag = res.headers['ETag']
+        # キャッシュから返した場合も同じ ETag を返す
+        res = await client.get(url)
+        assert res.headers['ETag'] == etag
+
+        res = await client.get(
+            url, headers={'If-None-Match': f'"other", {etag}'})
+        assert res.status_code == HTTP_304_NOT_MODIFIED
+        assert res.content == b''
+
+        await client.post(
+            app.url_path_for('holo_member:create-holo_member'),
+            json={'new_holo_member': new_holo_member.dict()})
+        res = await client.get(url, headers={'If-None-Match': etag})
+        assert res.status_code == HTTP_200_OK
+        assert res.headers['ETag'] != etag
+
+# Events Test
+
+
+class TestHoloMemberEvents:
+    async def test_events_are_pushed_from_notify(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        broadcaster = app.state._broadcaster
+        request = asyncio.ensure_future(client.get(
+            app.url_path_for('holo_member:stream-holo_member-events')))
+        while not broadcaster.subscribers:
+            await asyncio.sleep(0.01)
+
+        repo = HoloMemberRepository(db)
+        created = await repo.create_holo_member(
+            new_holo_member=new_holo_member)
+        await repo.delete_holo_member_by_id(id=created.id)
+        while broadcaster.published < 2:
+            await asyncio.sleep(0.01)
+        broadcaster.close()
+
+        res = await request
+        assert res.status_code == HTTP_200_OK
+        assert res.headers['content-type'].startswith('text/event-stream')
+        events = [
+            block.split('\n') for block in res.text.split('\n\n')
+            if block.startswith('event:')
+        ]
+        assert events == [
+            ['event: insert', 'data: ' + json.dumps(
+                {'op': 'INSERT', 'id': created.id}, separators=(',', ':'))],
+            ['event: delete', 'data: ' + json.dumps(
+                {'op': 'DELETE', 'id': created.id}, separators=(',', ':'))],
+        ]
+
+    async def test_events_resume_after_listen_connection_is_lost(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        listener = app.state._listener
+        listener.retry_interval = 0.3
+        broadcaster = app.state._broadcaster
+        request = asyncio.ensure_future(client.get(
+            app.url_path_for('holo_member:stream-holo_member-events')))
+        while not broadcaster.subscribers:
+            await asyncio.sleep(0.01)
+
+        # ネットワークの切断やプライマリの再起動と同じく LISTEN 用の接続が切れる
+        await db.execute(
+            "SELECT pg_terminate_backend(:pid)",
+            values={"pid": listener._connection.get_server_pid()})
+        while listener.is_listening:
+            await asyncio.sleep(0.01)
+        res = await client.get(app.url_path_for('health:get-ready'))
+        assert res.json() == {'ready': True, 'listening': False}
+
+        while not listener.is_listening:
+            await asyncio.sleep(0.01)
+        res = await client.get(app.url_path_for('health:get-ready'))
+        assert res.json() == {'ready': True, 'listening': True}
+        assert listener.reconnects == 1
+
+        repo = HoloMemberRepository(db)
+        created = await repo.create_holo_member(
+            new_holo_member=new_holo_member)
+        while broadcaster.published < 3:
+            await asyncio.sleep(0.01)
+        broadcaster.close()
+
+        res = await request
+        events = [
+            block.split('\n') for block in res.text.split('\n\n')
+            if block.startswith('event:')
+        ]
+        # 切断時と接続し直した時に reset が届き、その後の変更も届く
+        reset = ['event: reset', 'data: {"op":"RESET"}']
+        assert events == [
+            reset,
+            reset,
+            ['event: insert', 'data: ' + json.dumps(
+                {'op': 'INSERT', 'id': created.id}, separators=(',', ':'))],
+        ]
+
+# Export Test
+
+
+class TestExportHoloMember:
+    async def test_export_holo_member_as_ndjson(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        res = await client.get(
+            app.url_path_for('holo_member:export-holo_member')
+        )
+        assert res.status_code == HTTP_200_OK
+        assert res.headers['content-type'].startswith('application/x-ndjson')
+        holo_member = [
+            HoloMemberInDB(**json.loads(line))
+            for line in res.text.splitlines()
+        ]
+        assert test_holo_member in holo_member
+
+    async def test_export_holo_member_as_json_matches_list(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        res = await client.get(
+            app.url_path_for('holo_member:export-holo_member'),
+            params={'format': 'json'}
+        )
+        assert res.status_code == HTTP_200_OK
+        exported = sorted(res.json(), key=lambda item: item['id'])
+
+        res = await client.get(
+            app.url_path_for('holo_member:get-all-holo_member'),
+            params={'all': True}
+        )
+        assert exported == sorted(res.json(), key=lambda item: item['id'])
+
+# Changes Test
+
+
+class TestHoloMemberChanges:
+    @pytest.fixture(autouse=True)
+    def no_lag(self, monkeypatch) -> None:
+        monkeypatch.setattr(config, 'HOLO_MEMBER_CHANGES_LAG', 0.0)
+
+    async def test_changes_include_updates_and_deletes(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        db: Database,
+        new_holo_member: HoloMemberCreate
+    ) -> None:
+        url = app.url_path_for('holo_member:get-holo_member-changes')
+        res = await client.get(url, params={'limit': 1000})
+        assert res.status_code == HTTP_200_OK
+        while res.json()['has_more']:
+            res = await client.get(url, params={
+                'cursor': res.json()['next_cursor'], 'limit': 1000})
+        cursor = res.json()['next_cursor']
+
+        repo = HoloMemberRepository(db)
+        created = await repo.create_holo_members(
+            new_holo_members=[new_holo_member] * 3)
+        await repo.delete_holo_member_by_id(id=created[1].id)
+
+        res = await client.get(url, params={'cursor': cursor, 'limit': 1})
+        assert res.status_code == HTTP_200_OK
+        changes = res.json()
+        assert [item['id'] for item in changes['updated']] == [created[0].id]
+        assert {'created_at', 'updated_at'} <= set(changes['updated'][0])
+        assert [item['id'] for item in changes['deleted']] == [created[1].id]
+        assert changes['has_more']
+
+        res = await client.get(url, params={
+            'cursor': changes['next_cursor'], 'limit': 1})
+        changes = res.json()
+        assert [item['id'] for item in changes['updated']] == [created[2].id]
+        assert changes['deleted'] == []
+        assert not changes['has_more']
+
+        # 追いついた後は何も返さずカーソルも進まない
+        res = await client.get(url, params={
+            'cursor': changes['next_cursor']})
+        assert res.json()['updated'] == []
+        assert res.json()['next_cursor'] == changes['next_cursor']
+
+    async def test_changes_since_timestamp(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for('holo_member:get-holo_member-changes')
+        res = await client.get(url, params={
+            'updated_since': '2999-01-01T00:00:00+00:00'})
+        assert res.status_code == HTTP_200_OK
+        assert res.json()['updated'] == []
+
+        res = await client.get(url, params={
+            'updated_since': '2000-01-01T00:00:00', 'limit': 1000})
+        assert res.status_code == HTTP_200_OK
+        assert res.json()['updated']
+
+    @pytest.mark.parametrize(
+        'params, status_code',
+        (
+            ({'cursor': 'invalid cursor'}, 400),
+            ({'cursor': 'e30'}, 400),
+            ({'cursor': 'e30', 'updated_since': '2000-01-01T00:00:00'}, 400),
+            ({'updated_since': 'yesterday'}, 422),
+            ({'limit': 0}, 422),
+        ),
+    )
+    async def test_changes_invalid_params(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        params: dict,
+        status_code: int
+    ) -> None:
+        res = await client.get(
+            app.url_path_for('holo_member:get-holo_member-changes'),
+            params=params
+        )
+        assert res.status_code == status_code
+
 # Update Test
 
 
 class TestUpdateHoloMember:
+    # 変更後の値は test_holo_member と異なり、age は DB の精度 (小数点以下1桁) に収まる値にする
     @pytest.mark.parametrize(
         'attrs_to_change, values',
         (
             (
                 ['type'],
-                ['3']
+                ['4']
             ),
             (
                 ['name'],
@@ -181,7 +909,7 @@ class TestUpdateHoloMember:
             ),
             (
                 ['age'],
-                [3.14]
+                [3.5]
             ),
             (
                 ['twitter'],
@@ -197,7 +925,7 @@ class TestUpdateHoloMember:
             (
                 ['type', 'name', 'description',
                     'age', 'twitter'],
-                ['3', 'test', 'testttttttt',
+                ['4', 'test', 'testttttttt',
                     2.00, 'https://aaa']
             ),
         ),
@@ -273,6 +1001,24 @@ class TestUpdateHoloMember:
         )
         assert res.status_code == status_code
 
+    async def test_patch_holo_member_keeps_unset_attrs(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        res = await client.patch(
+            app.url_path_for(
+                'holo_member:patch-holo_member-by-id',
+                id=test_holo_member.id
+            ),
+            json={'holo_member_update': {'name': 'patched name'}}
+        )
+        assert res.status_code == HTTP_200_OK
+        patched_holo_member = HoloMemberInDB(**res.json())
+        assert patched_holo_member == test_holo_member.copy(
+            update={'name': 'patched name'})
+
 # Delete Test
 
 
@@ -0,0 +1,76 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.core import config
+from app.core.metrics import Counter, Gauge, Histogram
+from app.models.holo_member import HoloMemberInDB
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestMetricTypes:
+    async def test_histogram_renders_cumulative_buckets(self) -> None:
+        histogram = Histogram(
+            "test_seconds", "Test.", ("route",), buckets=(0.1, 1))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5, "/a")
+
+        assert histogram.render() == [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{route="/a",le="0.1"} 1',
+            'test_seconds_bucket{route="/a",le="1"} 2',
+            'test_seconds_bucket{route="/a",le="+Inf"} 3',
+            'test_seconds_sum{route="/a"} 5.55',
+            'test_seconds_count{route="/a"} 3',
+        ]
+
+    async def test_counter_and_gauge_escape_labels(self) -> None:
+        counter = Counter("test_total", "Test.", ("path",))
+        counter.inc('a"b')
+        counter.inc('a"b', amount=2)
+        gauge = Gauge("test_in_flight", "Test.")
+        gauge.inc()
+        gauge.dec()
+
+        assert counter.render()[-1] == 'test_total{path="a\\"b"} 3'
+        assert gauge.render()[-1] == "test_in_flight 0"
+
+
+@pytest.mark.skipif(
+    not config.METRICS_ENABLED, reason="METRICS_ENABLED is off")
+class TestMetricsRoute:
+    async def test_metrics_record_routes_and_queries(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        await client.get(app.url_path_for(
+            "holo_member:get-holo_member-by-id", id=test_holo_member.id))
+        await client.get("/api/v1/unknown/")
+
+        res = await client.get(app.url_path_for("metrics:get-metrics"))
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/plain")
+        lines = res.text.splitlines()
+        assert any(line.startswith(
+            'favue_http_requests_total{method="GET",'
+            'route="/api/v1/holo_member/{id}/",status="200"}'
+        ) for line in lines)
+        assert any(line.startswith(
+            'favue_http_requests_total{method="GET",'
+            'route="unmatched",status="404"}'
+        ) for line in lines)
+        assert any(line.startswith(
+            'favue_db_query_duration_seconds_count'
+            '{query="CREATE_HOLO_MEMBER_QUERY"}'
+        ) for line in lines)
+        assert any(line.startswith(
+            'favue_db_query_duration_seconds_count'
+            '{query="GET_HOLO_MEMBER_BY_IDS_QUERY"}'
+        ) for line in lines)
+        assert 'favue_db_pool{database="primary",stat="in_use"} 0' in lines
+        assert 'favue_http_requests_in_flight{method="GET"} 1' in lines
@@ -0,0 +1,25 @@
+import pytest
+
+from app.db.replicas import ReplicaSet
+
+
+class TestReplicaSet:
+    def test_round_robin(self) -> None:
+        replica_set = ReplicaSet(["a", "b", "c"])
+        assert [replica_set.choose() for _ in range(4)] == [
+            "a", "b", "c", "a"]
+
+    def test_least_busy(self) -> None:
+        load = {"a": 3, "b": 1, "c": 2}
+        replica_set = ReplicaSet(
+            ["a", "b", "c"], "least_busy", load=load.get)
+        assert replica_set.choose() == "b"
+        load["b"] = 5
+        assert replica_set.choose() == "c"
+
+    def test_no_replicas(self) -> None:
+        assert ReplicaSet([]).choose() is None
+
+    def test_unknown_strategy(self) -> None:
+        with pytest.raises(ValueError):
+            ReplicaSet(["a"], "random")
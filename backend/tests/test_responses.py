@@ -0,0 +1,68 @@
+import json
+from decimal import Decimal
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.utils import create_response_field
+from pydantic import ValidationError
+
+from app.api.responses import ModelJSONResponse, encode_response
+from app.core import config
+from app.db.repositories.holo_member import to_sparse_holo_member
+from app.models.holo_member import (
+    HoloMemberInDB,
+    HoloMemberLookup,
+    HoloMemberPublic
+)
+
+record = {
+    "id": 1,
+    "type": "3",
+    "name": "テスト潤羽るしあ",
+    "description": "るしあはいいぞ",
+    "twitter": "https://twitter.com/uruharushia",
+    "age": Decimal("1600.0"),
+    "updated_at": "not a model field",
+}
+
+
+class TestTrustedSerialization:
+    def test_from_record_matches_validated_model(self) -> None:
+        validated = HoloMemberInDB(**record)
+        trusted = HoloMemberInDB.from_record(record)
+        assert trusted == validated
+        assert isinstance(trusted.age, float)
+        assert "updated_at" not in trusted.dict()
+
+    def test_model_json_response_matches_jsonable_encoder(self) -> None:
+        holo_member = HoloMemberInDB.from_record(record)
+        lookup = HoloMemberLookup.construct(
+            holo_members=[holo_member], missing_ids=[2])
+        body = ModelJSONResponse(lookup).body
+        assert json.loads(body) == jsonable_encoder(lookup)
+
+    @pytest.mark.asyncio
+    async def test_encode_response_follows_fast_serialization(
+        self,
+        monkeypatch
+    ) -> None:
+        field = create_response_field(
+            name='holo_member_list', type_=List[HoloMemberPublic])
+        sparse = to_sparse_holo_member(record, ("id", "name"))
+        invalid = HoloMemberInDB.construct(**{**record, "id": "not an id"})
+
+        monkeypatch.setattr(config, 'FAST_SERIALIZATION', True)
+        assert json.loads(await encode_response(
+            [sparse], field, exclude_unset=True)) == [
+                {"id": 1, "name": record["name"]}]
+        assert json.loads(await encode_response([invalid], field))[0]["id"] \
+            == "not an id"
+
+        # 無効な場合は response_model と同じく検証し、指定されていない項目は含めない
+        monkeypatch.setattr(config, 'FAST_SERIALIZATION', False)
+        assert json.loads(await encode_response(
+            [sparse], field, exclude_unset=True)) == [
+                {"id": 1, "name": record["name"]}]
+        with pytest.raises(ValidationError):
+            await encode_response([invalid], field)
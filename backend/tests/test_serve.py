@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+
+from app.db.broadcast import Broadcaster
+from app.serve import GracefulServer, worker_count, worker_pool_sizes
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestWorkerPoolSizes:
+    @pytest.mark.parametrize(
+        'workers, expected',
+        (
+            (1, {'DB_POOL_MIN_SIZE': 2, 'DB_POOL_MAX_SIZE': 5}),
+            (16, {'DB_POOL_MIN_SIZE': 2, 'DB_POOL_MAX_SIZE': 4}),
+            (45, {'DB_POOL_MIN_SIZE': 1, 'DB_POOL_MAX_SIZE': 1}),
+            (200, {'DB_POOL_MIN_SIZE': 1, 'DB_POOL_MAX_SIZE': 1}),
+        ),
+    )
+    async def test_pools_fit_in_max_connections(
+        self,
+        workers: int,
+        expected: dict
+    ) -> None:
+        sizes = worker_pool_sizes(
+            workers,
+            max_connections=100,
+            reserved_connections=10,
+            min_size=2,
+            max_size=5)
+        assert sizes == expected
+        if workers <= 45:
+            # LISTEN 用の接続を含めても max_connections を超えない
+            assert workers * (sizes['DB_POOL_MAX_SIZE'] + 1) <= 90
+
+    async def test_worker_count_defaults_to_cpu_count(self) -> None:
+        assert worker_count(3) == 3
+        assert worker_count(0) >= 1
+
+
+class StuckConnection:
+    """応答を返し終わらない接続 (transport を閉じると接続の一覧から外れる)"""
+
+    def __init__(self, server: uvicorn.Server) -> None:
+        self.server = server
+        self.transport = self
+
+    def shutdown(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.server.server_state.connections.discard(self)
+
+
+class EventStreamConnection:
+    """変更通知のストリームを送っている接続 (ストリームが終わるまで閉じない)"""
+
+    def __init__(self, server: uvicorn.Server, queue: asyncio.Queue) -> None:
+        self.server = server
+        self.task = asyncio.ensure_future(self.stream(queue))
+
+    async def stream(self, queue: asyncio.Queue) -> None:
+        while await queue.get() is not None:
+            pass
+        self.server.server_state.connections.discard(self)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class LifespanStub:
+    def __init__(self) -> None:
+        self.shut_down = False
+
+    async def shutdown(self) -> None:
+        self.shut_down = True
+
+
+class TestGracefulServer:
+    async def test_shutdown_closes_connections_after_timeout(self) -> None:
+        server = GracefulServer(
+            uvicorn.Config("app.api.server:app"), graceful_timeout=0.05)
+        # 完了しない接続とリクエストが残っている状態で停止する
+        server.servers = []
+        server.server_state.connections.add(StuckConnection(server))
+        request = asyncio.ensure_future(asyncio.sleep(10))
+        request.add_done_callback(server.server_state.tasks.discard)
+        server.server_state.tasks.add(request)
+        server.lifespan = LifespanStub()
+
+        await asyncio.wait_for(server.shutdown(), timeout=2)
+        assert request.cancelled()
+        assert not server.server_state.connections
+        # プール等を閉じるため lifespan の shutdown は飛ばさない
+        assert not server.force_exit
+        assert server.lifespan.shut_down
+
+    async def test_shutdown_ends_event_streams(self) -> None:
+        app = FastAPI()
+        app.state._broadcaster = Broadcaster(queue_size=10)
+        server = GracefulServer(uvicorn.Config(app), graceful_timeout=None)
+        server.servers = []
+        connection = EventStreamConnection(
+            server, app.state._broadcaster.subscribe())
+        server.server_state.connections.add(connection)
+        server.lifespan = LifespanStub()
+
+        # ストリームが終わり、接続の完了を待たずに lifespan の shutdown まで進む
+        await asyncio.wait_for(server.shutdown(), timeout=2)
+        assert connection.task.done()
+        assert not server.server_state.connections
+        assert server.lifespan.shut_down
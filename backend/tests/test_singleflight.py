@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from databases import Database
+from httpx import AsyncClient
+
+from app.core import config
+from app.core.deadline import request_deadline
+from app.db.repositories.holo_member import (
+    HoloMemberRepository,
+    holo_member_flights,
+    holo_member_version
+)
+from app.db.singleflight import SingleFlight, freeze
+from app.models.holo_member import HoloMemberInDB
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_result(self) -> None:
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def call() -> int:
+            nonlocal calls
+            calls += 1
+            value = calls
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            *(flights.do("key", call) for _ in range(5)),
+            flights.do("other", call))
+        assert results == [1, 1, 1, 1, 1, 2]
+        assert flights.stats() == {
+            "calls": 2, "coalesced": 4, "cancelled": 0, "in_flight": 0}
+
+        # 完了した呼び出しの結果は共有しない
+        assert await flights.do("key", call) == 3
+
+    async def test_exception_is_shared(self) -> None:
+        flights = SingleFlight("test")
+
+        async def call() -> None:
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        results = await asyncio.gather(
+            flights.do("key", call),
+            flights.do("key", call),
+            return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError] * 2
+        assert flights.calls == 1
+
+    async def test_cancelled_caller_does_not_cancel_others(self) -> None:
+        flights = SingleFlight("test")
+
+        async def call() -> str:
+            await asyncio.sleep(0.01)
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+
+    async def test_last_cancelled_caller_cancels_call(self) -> None:
+        flights = SingleFlight("test")
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def call() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "done"
+
+        waiters = [
+            asyncio.ensure_future(flights.do("key", call)) for _ in range(2)]
+        await started.wait()
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+
+        waiters[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flights.stats()["cancelled"] == 1
+        assert flights.in_flight == 0
+
+    async def test_call_inherits_deadline(self) -> None:
+        flights = SingleFlight("test")
+
+        async def call() -> float:
+            await asyncio.sleep(0.01)
+            return request_deadline.get()
+
+        async def do(deadline: float) -> float:
+            request_deadline.set(deadline)
+            return await flights.do("key", call)
+
+        assert await asyncio.gather(do(1.0), do(2.0)) == [1.0, 1.0]
+
+    async def test_freeze_makes_arguments_hashable(self) -> None:
+        key = freeze({"after": ["a", 1], "fields": ("id",), "limit": 3})
+        assert key == (("after", ("a", 1)), ("fields", ("id",)), ("limit", 3))
+        assert hash(key) == hash(freeze(
+            {"limit": 3, "fields": ["id"], "after": ("a", 1)}))
+
+
+@pytest.mark.skipif(
+    not config.SINGLE_FLIGHT_ENABLED, reason="SINGLE_FLIGHT_ENABLED is off")
+class TestRepositorySingleFlight:
+    async def test_concurrent_identical_reads_are_coalesced(
+        self,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        repo = HoloMemberRepository(db)
+        flights = holo_member_flights["get_holo_member_page"]
+        calls, coalesced = flights.calls, flights.coalesced
+
+        pages = await asyncio.gather(
+            *(repo.get_holo_member_page(limit=5) for _ in range(5)))
+        assert all(page == pages[0] for page in pages)
+        assert flights.calls == calls + 1
+        assert flights.coalesced == coalesced + 4
+
+        await asyncio.gather(
+            repo.get_holo_member_page(limit=5),
+            repo.get_holo_member_page(limit=6))
+        assert flights.calls == calls + 3
+
+    async def test_read_started_before_write_is_not_shared(
+        self,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        repo = HoloMemberRepository(db)
+        flights = holo_member_flights["get_holo_member_page"]
+        calls = flights.calls
+
+        before = asyncio.ensure_future(repo.get_holo_member_page(limit=5))
+        await asyncio.sleep(0)
+        holo_member_version.invalidate()
+        after = asyncio.ensure_future(repo.get_holo_member_page(limit=5))
+        await asyncio.gather(before, after)
+        assert flights.calls == calls + 2
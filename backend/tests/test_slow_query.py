@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from databases import Database
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette.datastructures import Secret
+from starlette.status import HTTP_200_OK
+
+from app.core import config
+from app.db.instrumented import InstrumentedDatabase
+from app.db.slow_query import SlowQueryLog, parameter_shape, slow_query_log
+from app.db.tasks import instrument_database
+from app.models.holo_member import HoloMemberInDB
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestSlowQueryLog:
+    async def test_records_only_slow_queries(self) -> None:
+        log = SlowQueryLog(threshold=100, size=2)
+        assert log.record(None, "A", "SELECT 1", None, 0.099) is None
+        for name in ("A", "B", "C"):
+            log.record(None, name, "UPDATE x\n  SET y = 1", {"id": 1}, 0.1)
+
+        assert [entry["query"] for entry in log.entries()] == ["C", "B"]
+        assert log.entries()[0]["sql"] == "UPDATE x SET y = 1"
+        assert log.entries()[0]["duration_ms"] == 100
+        assert log.recorded == 3
+
+    async def test_parameter_shape_hides_values(self) -> None:
+        assert parameter_shape({"ids": [1, 2, 3], "name": "secret"}) == {
+            "ids": "list[3]", "name": "str"}
+
+
+class TestInstrumentDatabase:
+    @pytest.mark.parametrize(
+        "threshold, instrumented",
+        (
+            (100.0, True),
+            (0.0, False),
+        ),
+    )
+    async def test_slow_query_log_alone_instruments(
+        self,
+        monkeypatch,
+        threshold: float,
+        instrumented: bool
+    ) -> None:
+        monkeypatch.setattr(config, "METRICS_ENABLED", False)
+        monkeypatch.setattr(config, "PROFILING_TOKEN", Secret(""))
+        monkeypatch.setattr(config, "SLOW_QUERY_THRESHOLD", threshold)
+        database = Database("postgresql://localhost/example")
+        assert isinstance(
+            instrument_database(database), InstrumentedDatabase
+        ) is instrumented
+
+
+class TestSlowQueryRoute:
+    @pytest.fixture(autouse=True)
+    def record_everything(self, monkeypatch) -> None:
+        # 計測もプロファイルも無効でも遅いクエリは記録する
+        monkeypatch.setattr(config, "METRICS_ENABLED", False)
+        monkeypatch.setattr(config, "PROFILING_TOKEN", Secret("secret"))
+        monkeypatch.setattr(config, "SLOW_QUERY_THRESHOLD", 1e-3)
+        monkeypatch.setattr(slow_query_log, "threshold", 1e-6)
+        monkeypatch.setattr(slow_query_log, "explain_rate", 1.0)
+        slow_query_log.clear()
+        yield
+        slow_query_log.clear()
+
+    async def test_slow_select_is_explained(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        await client.get(
+            app.url_path_for("holo_member:get-all-holo_member"),
+            params={"type": "3"})
+        url = app.url_path_for("system:get-slow-queries")
+        for _ in range(100):
+            res = await client.get(
+                url, headers={config.PROFILING_HEADER: "secret"})
+            page_queries = [
+                entry for entry in res.json()
+                if entry["query"] == "GET_HOLO_MEMBER_PAGE_QUERY"]
+            if page_queries and page_queries[0]["plan"] is not None:
+                break
+            await asyncio.sleep(0.01)
+
+        assert res.status_code == HTTP_200_OK
+        entry = page_queries[0]
+        assert entry["params"] == {"type": "GenerationType", "limit": "int"}
+        assert "Plan" in entry["plan"][0]
+        # INSERT は EXPLAIN ANALYZE で再実行しない
+        create = [
+            entry for entry in res.json()
+            if entry["query"] == "CREATE_HOLO_MEMBER_QUERY"]
+        assert create and create[0]["plan"] is None
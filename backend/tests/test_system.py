@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from databases import Database
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette.datastructures import Secret
+from starlette.status import HTTP_200_OK
+
+from app.core import config
+from app.db.pool import InstrumentedPool, PoolTimeoutError, instrument_pool
+from app.models.holo_member import HoloMemberInDB
+
+pytestmark = pytest.mark.asyncio
+
+
+class SlowPool:
+    async def acquire(self, timeout: float = None) -> None:
+        await asyncio.sleep(timeout)
+        raise asyncio.TimeoutError()
+
+
+class TestPool:
+    async def test_get_pool_stats(
+        self,
+        monkeypatch,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        monkeypatch.setattr(config, 'PROFILING_TOKEN', Secret('secret'))
+        res = await client.get(
+            app.url_path_for('system:get-pool-stats'),
+            headers={config.PROFILING_HEADER: 'secret'})
+        assert res.status_code == HTTP_200_OK
+        stats = res.json()
+        assert stats['max_size'] == config.DB_POOL_MAX_SIZE
+        assert stats['min_size'] == config.DB_POOL_MIN_SIZE
+        assert stats['in_use'] == 0
+        assert stats['idle'] == stats['size']
+        assert stats['acquired'] >= 1
+        assert stats['waiters'] == 0
+
+    async def test_acquire_timeout_raises_pool_timeout(self) -> None:
+        pool = InstrumentedPool(SlowPool(), acquire_timeout=0.01)
+        with pytest.raises(PoolTimeoutError):
+            await pool.acquire()
+        assert pool.timeouts == 1
+        assert pool.waiters == 0
+        assert pool.in_use == 0
+        assert pool.wait_seconds_max >= 0.01
+
+    async def test_instrument_pool_fails_without_backend_pool(self) -> None:
+        # databases の内部が変わった場合は起動時に分かるようにする
+        database = Database('postgresql://localhost/none')
+        with pytest.raises(RuntimeError):
+            instrument_pool(database, acquire_timeout=1.0)
+
+
+class TestProfiling:
+    @pytest.fixture
+    def app(self, monkeypatch) -> FastAPI:
+        monkeypatch.setattr(config, 'PROFILING_TOKEN', Secret('secret'))
+        from app.api.server import get_application
+        return get_application()
+
+    async def test_profile_request_with_token(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        url = app.url_path_for(
+            'holo_member:get-all-holo_member')
+        res = await client.get(url)
+        assert 'x-profile-id' not in res.headers
+        res = await client.get(url, headers={config.PROFILING_HEADER: 'x'})
+        assert 'x-profile-id' not in res.headers
+
+        # キャッシュから返すとDBに問い合わせないので別のページを取得する
+        res = await client.get(
+            url,
+            params={'limit': 1},
+            headers={config.PROFILING_HEADER: 'secret'})
+        assert res.status_code == HTTP_200_OK
+        profile_id = res.headers['x-profile-id']
+        timings = dict(
+            item.strip().split(';dur=')
+            for item in res.headers['server-timing'].split(','))
+        assert set(timings) == {'total', 'db', 'validation', 'serialization'}
+        assert float(timings['db']) > 0
+
+        res = await client.get(
+            app.url_path_for('system:get-profile-by-id', id=profile_id),
+            headers={config.PROFILING_HEADER: 'secret'})
+        assert res.status_code == HTTP_200_OK
+        assert res.json()['path'] == url
+        # 一覧の組み立ては single-flight のタスクで行われ、外側のルート関数の累積時間は
+        # ほとんど無いため、ルートのモジュールが呼び出しツリーに含まれることを確認する
+        assert 'routes/holo_member.py' in res.json()['call_tree']
+
+    @pytest.mark.parametrize(
+        'token, status_code',
+        (
+            (None, 403),
+            ('x', 403),
+            ('secret', 200),
+        ),
+    )
+    async def test_profiles_require_token(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        token: str,
+        status_code: int
+    ) -> None:
+        headers = {config.PROFILING_HEADER: token} if token else {}
+        res = await client.get(
+            app.url_path_for('system:get-profiles'), headers=headers)
+        assert res.status_code == status_code
+
+    @pytest.mark.parametrize(
+        'name, token, status_code',
+        (
+            ('system:get-pool-stats', None, 403),
+            ('system:get-pool-stats', 'secret', 200),
+            ('system:get-slow-queries', None, 403),
+            ('system:get-slow-queries', 'secret', 200),
+        ),
+    )
+    async def test_diagnostics_require_token(
+        self,
+        app: FastAPI,
+        client: AsyncClient,
+        name: str,
+        token: str,
+        status_code: int
+    ) -> None:
+        headers = {config.PROFILING_HEADER: token} if token else {}
+        res = await client.get(app.url_path_for(name), headers=headers)
+        assert res.status_code == status_code
+
+    async def test_profiles_are_disabled_without_token(
+        self,
+        monkeypatch,
+        client: AsyncClient
+    ) -> None:
+        monkeypatch.setattr(config, 'PROFILING_TOKEN', Secret(''))
+        for path in ('profiles/', 'pool/', 'slow-queries/'):
+            res = await client.get(
+                f'/api/v1/system/{path}',
+                headers={config.PROFILING_HEADER: ''})
+            assert res.status_code == 404
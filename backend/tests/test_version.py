@@ -0,0 +1,147 @@
+import asyncio
+
+import asyncpg
+import pytest
+from databases import Database
+from httpx import AsyncClient
+
+from app.db.listener import RESET_EVENT
+from app.db.repositories.queries.holo_member import (
+    GET_HOLO_MEMBER_VERSION_QUERY
+)
+from app.db.tasks import get_database_url
+from app.db.version import TableVersion
+from app.models.holo_member import HoloMemberInDB
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeListener:
+    def __init__(self) -> None:
+        self.is_listening = True
+
+
+class TestTableVersion:
+    async def test_version_is_kept_until_invalidated(self) -> None:
+        version = TableVersion("test")
+        version.track(FakeListener())
+        values = iter([1, 2])
+
+        async def fetch() -> int:
+            return next(values)
+
+        assert await version.get(fetch) == 1
+        assert await version.get(fetch) == 1
+        version.handle_change({"op": "INSERT", "id": 1})
+        assert await version.get(fetch) == 2
+        assert version.stats() == {"hits": 1, "refreshes": 2, "coalesced": 0}
+
+    async def test_version_is_not_kept_without_listener(self) -> None:
+        version = TableVersion("test")
+        listener = FakeListener()
+        version.track(listener)
+        listener.is_listening = False
+        values = iter([1, 2])
+
+        async def fetch() -> int:
+            return next(values)
+
+        assert await version.get(fetch) == 1
+        assert await version.get(fetch) == 2
+
+    async def test_version_is_kept_again_after_reconnect(self) -> None:
+        version = TableVersion("test")
+        listener = FakeListener()
+        version.track(listener)
+        listener.is_listening = False
+        values = iter([1, 2, 3])
+
+        async def fetch() -> int:
+            return next(values)
+
+        assert await version.get(fetch) == 1
+        # 接続し直すと RESET が届き、その後に読んだ値は再び保持する
+        listener.is_listening = True
+        version.handle_change(RESET_EVENT)
+        assert await version.get(fetch) == 2
+        assert await version.get(fetch) == 2
+        assert version.listening
+
+    async def test_concurrent_refreshes_are_coalesced(self) -> None:
+        version = TableVersion("test")
+        version.track(FakeListener())
+        calls = 0
+
+        async def fetch() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        assert await asyncio.gather(*(version.get(fetch) for _ in range(5))) \
+            == [1] * 5
+        assert calls == 1
+        assert version.coalesced == 4
+
+    async def test_refresh_started_before_invalidation_is_not_kept(
+        self
+    ) -> None:
+        version = TableVersion("test")
+        version.track(FakeListener())
+        calls = 0
+
+        async def fetch() -> int:
+            nonlocal calls
+            calls += 1
+            value = calls
+            await asyncio.sleep(0.01)
+            return value
+
+        stale = asyncio.ensure_future(version.get(fetch))
+        await asyncio.sleep(0)
+        version.handle_change(RESET_EVENT)
+        # 無効化の後の要求は実行中の読み直しを共有せずに読み直す
+        assert await version.get(fetch) == 2
+        assert await stale == 1
+        assert await version.get(fetch) == 2
+        assert calls == 2
+
+
+class TestTableVersionTrigger:
+    async def test_only_statements_that_change_rows_bump_version(
+        self,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        before = await db.fetch_val(GET_HOLO_MEMBER_VERSION_QUERY)
+        await db.execute("UPDATE holo_member SET name = name WHERE id = -1")
+        await db.execute("DELETE FROM holo_member WHERE id = -1")
+        assert await db.fetch_val(GET_HOLO_MEMBER_VERSION_QUERY) == before
+
+        await db.execute(
+            "UPDATE holo_member SET name = name WHERE id = :id",
+            values={"id": test_holo_member.id})
+        assert await db.fetch_val(GET_HOLO_MEMBER_VERSION_QUERY) == before + 1
+
+    async def test_version_changes_only_when_committed(
+        self,
+        client: AsyncClient,
+        db: Database,
+        test_holo_member: HoloMemberInDB
+    ) -> None:
+        before = await db.fetch_val(GET_HOLO_MEMBER_VERSION_QUERY)
+        async with db.connection() as writer:
+            transaction = await writer.transaction()
+            await writer.execute(
+                "UPDATE holo_member SET name = name WHERE id = :id",
+                values={"id": test_holo_member.id})
+            # 別の接続からはコミットされるまで変わらない
+            reader = await asyncpg.connect(str(get_database_url()))
+            try:
+                assert await reader.fetchval(
+                    GET_HOLO_MEMBER_VERSION_QUERY) == before
+            finally:
+                await reader.close()
+            await transaction.rollback()
+        assert await db.fetch_val(GET_HOLO_MEMBER_VERSION_QUERY) == before